@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     ManufacturerVersionInfo, ColumnOptions, UCMDeviceInventory, 
-    UCMRequirement, TemplateConfig
+    UCMRequirement, UCMRequirementArchive, TemplateConfig, ChangeDateOverride,
+    LocationRule
 )
 
 
@@ -38,7 +39,30 @@ class UCMRequirementAdmin(admin.ModelAdmin):
     readonly_fields = ['submit_time', 'process_time']
 
 
+@admin.register(UCMRequirementArchive)
+class UCMRequirementArchiveAdmin(admin.ModelAdmin):
+    list_display = ['requirement_type', 'device_name', 'ip', 'ucm_change_date', 'submitter', 'status', 'archived_at']
+    list_filter = ['requirement_type', 'ucm_change_date']
+    search_fields = ['device_name', 'ip']
+    ordering = ['-ucm_change_date']
+
+
 @admin.register(TemplateConfig)
 class TemplateConfigAdmin(admin.ModelAdmin):
     list_display = ['template_type', 'updated_at']
     ordering = ['template_type']
+
+
+@admin.register(ChangeDateOverride)
+class ChangeDateOverrideAdmin(admin.ModelAdmin):
+    list_display = ['date', 'override_type', 'deadline', 'reason', 'updated_at']
+    list_filter = ['override_type']
+    ordering = ['-date']
+
+
+@admin.register(LocationRule)
+class LocationRuleAdmin(admin.ModelAdmin):
+    list_display = ['rule_type', 'pattern', 'location', 'priority', 'enabled', 'note', 'updated_at']
+    list_filter = ['rule_type', 'location', 'enabled']
+    search_fields = ['pattern', 'note']
+    ordering = ['-priority', 'rule_type', 'pattern']
@@ -0,0 +1,137 @@
+"""
+需求量趋势分析
+按变更日期所在的周 / 月，以及需求类型、状态、地点分组统计需求数（含已归档需求），
+统计在数据库中基于日期统计汇总表完成。
+
+已结束的周期（结束日期早于今天 settings.UCM_ANALYTICS_SETTLE_DAYS 天以上，期间的需求
+已处理或归档，一般不再变化）按周期和分组维度永久缓存；其余周期每次请求重新统计。
+删除需求、重新计算地点、重建汇总表（rebuild_requirement_stats）后调用 clear_analytics_cache
+递增缓存代数，使所有进程的已缓存周期失效。缓存代数保存在 TableVersion 表中，每次统计读取一次。
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .date_stats import aggregate_date_stats
+
+PERIODS = ('week', 'month')
+
+# 允许的分组维度
+DIMENSIONS = ('requirement_type', 'status', 'location')
+
+DEFAULT_SETTLE_DAYS = 7
+
+# 缓存代数在 TableVersion 中的名称（不对应实际数据表），递增后旧缓存全部失效
+GENERATION_NAME = 'ucm_analytics_cache'
+
+
+def period_start(day, period):
+    """day 所在周期的首日（周从周一开始）"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start, period):
+    """周期首日对应的最后一天"""
+    if period == 'week':
+        return start + timedelta(days=6)
+    next_month = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return next_month - timedelta(days=1)
+
+
+def iter_periods(start_date, end_date, period):
+    """[start_date, end_date] 覆盖的所有周期首日"""
+    start = period_start(start_date, period)
+    while start <= end_date:
+        yield start
+        start = period_end(start, period) + timedelta(days=1)
+
+
+def is_finished(start, period, today):
+    """周期是否已结束且不再变化"""
+    settle_days = getattr(settings, 'UCM_ANALYTICS_SETTLE_DAYS', DEFAULT_SETTLE_DAYS)
+    return period_end(start, period) + timedelta(days=settle_days) < today
+
+
+def _get_generation():
+    """读取当前缓存代数"""
+    from .models import TableVersion
+    return TableVersion.objects.filter(table_name=GENERATION_NAME).values_list('version', flat=True).first() or 0
+
+
+def _cache_key(generation, period, group_by, start):
+    return f"ucm:analytics:{generation}:{period}:{','.join(group_by)}:{start.isoformat()}"
+
+
+def clear_analytics_cache():
+    """递增缓存代数，使所有进程已缓存的周期统计失效"""
+    from .models import TableVersion
+    from .write_queue import submit_write
+
+    def bump():
+        TableVersion.objects.get_or_create(table_name=GENERATION_NAME)
+        TableVersion.objects.filter(table_name=GENERATION_NAME).update(version=F('version') + 1)
+
+    submit_write(bump)
+
+
+def requirement_volume(period, group_by, start_date, end_date, today):
+    """
+    按周期统计需求数
+
+    Args:
+        period: 'week' 或 'month'
+        group_by: DIMENSIONS 中的分组维度列表
+        start_date / end_date: 统计范围，按周期边界向外扩展
+        today: 当天日期，用于判断周期是否已结束
+
+    Returns:
+        [{'period', 'period_end', 'total', 'finished', 'rows': [{分组维度..., 'total'}]}]，按周期排序
+    """
+    group_by = [dimension for dimension in DIMENSIONS if dimension in group_by]
+    periods = list(iter_periods(start_date, end_date, period))
+    # 先读缓存代数再统计，统计期间清除缓存时结果写入旧代数，不会被读到
+    generation = _get_generation()
+
+    rows_by_period = {}
+    missing = []
+    for start in periods:
+        rows = None
+        if is_finished(start, period, today):
+            rows = cache.get(_cache_key(generation, period, group_by, start))
+        if rows is None:
+            missing.append(start)
+        else:
+            rows_by_period[start] = rows
+
+    if missing:
+        # 未缓存的周期一次查询统计
+        fresh = {start: [] for start in missing}
+        stats = aggregate_date_stats(
+            group_by,
+            period=period,
+            ucm_change_date__range=(missing[0], period_end(missing[-1], period))
+        )
+        for row in stats:
+            start = row.pop('period')
+            if start in fresh:
+                fresh[start].append(row)
+        for start, rows in fresh.items():
+            rows.sort(key=lambda row: tuple(str(row[dimension]) for dimension in group_by))
+            rows_by_period[start] = rows
+            if is_finished(start, period, today):
+                cache.set(_cache_key(generation, period, group_by, start), rows, None)
+
+    return [
+        {
+            'period': start.strftime('%Y-%m-%d'),
+            'period_end': period_end(start, period).strftime('%Y-%m-%d'),
+            'total': sum(row['total'] for row in rows_by_period[start]),
+            'finished': is_finished(start, period, today),
+            'rows': rows_by_period[start],
+        }
+        for start in periods
+    ]
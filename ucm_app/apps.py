@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class UcmAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ucm_app'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_migrate, post_save
+        from .change_calendar import connect_signals as connect_calendar_signals
+        from .date_stats import install_date_stat_triggers_after_migrate
+        from .locations import connect_signals as connect_location_signals
+        from .search import install_search_index_after_migrate
+        from .versioning import install_version_triggers_after_migrate
+        from .write_queue import connect_signals
+        connect_signals()
+        connect_calendar_signals()
+        connect_location_signals()
+        # 保存或删除日期配置时清除单例的进程内缓存
+        date_config = self.get_model('UCMDateConfig')
+        post_save.connect(date_config.clear_solo_cache, sender=date_config, dispatch_uid='ucm_date_config_solo_save')
+        post_delete.connect(date_config.clear_solo_cache, sender=date_config, dispatch_uid='ucm_date_config_solo_delete')
+        post_migrate.connect(install_search_index_after_migrate, sender=self)
+        post_migrate.connect(install_version_triggers_after_migrate, sender=self)
+        post_migrate.connect(install_date_stat_triggers_after_migrate, sender=self)
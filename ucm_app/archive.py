@@ -0,0 +1,68 @@
+"""
+需求归档
+将超过保留期限的已处理需求分批迁移到归档表，保持需求登记表及其索引精简。
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UCMRequirement, UCMRequirementArchive
+from .write_queue import submit_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 180
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_archivable_requirements(older_than_days=None):
+    """
+    获取可归档的需求：已处理且UCM变更日期早于保留期限
+
+    Args:
+        older_than_days: 保留天数，默认取 settings.UCM_ARCHIVE_AFTER_DAYS
+
+    Returns:
+        QuerySet
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'UCM_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    cutoff_date = timezone.now().date() - timedelta(days=older_than_days)
+    return UCMRequirement.objects.filter(status='processed', ucm_change_date__lt=cutoff_date)
+
+
+def _archive_batch(ids):
+    """在同一事务中将一批需求写入归档表并从需求登记表删除"""
+    requirements = list(UCMRequirement.objects.filter(id__in=ids, status='processed'))
+    UCMRequirementArchive.objects.bulk_create(
+        [UCMRequirementArchive.from_requirement(requirement) for requirement in requirements]
+    )
+    UCMRequirement.objects.filter(id__in=[requirement.id for requirement in requirements]).delete()
+    return len(requirements)
+
+
+def archive_processed_requirements(older_than_days=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    分批归档已处理的历史需求
+
+    每批在写队列中单独提交事务，避免长时间占用写锁。
+
+    Returns:
+        归档的记录数
+    """
+    queryset = get_archivable_requirements(older_than_days)
+    archived_count = 0
+
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        count = submit_write(lambda: _archive_batch(ids))
+        archived_count += count
+        logger.info(f"需求归档: 本批 {count} 条, 累计 {archived_count} 条")
+        if count == 0:
+            break
+
+    return archived_count
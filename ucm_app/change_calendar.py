@@ -0,0 +1,249 @@
+"""
+UCM变更日历
+统一计算变更日期（每周三、周六）和登记截止时间，并叠加 ChangeDateOverride 中的停止变更
+日期、临时加开日期和单独指定的截止时间。可选日期、需求列表日期、周视图等接口共用，
+提交需求时也按同一日历在服务端校验截止时间（check_deadline）。
+
+日历按当天日期和 ChangeDateOverride / UCMDateConfig 的表版本号缓存
+settings.UCM_CHANGE_CALENDAR_CACHE_SECONDS 秒：任一进程修改日期配置或调整日期后版本号变化，
+所有进程都会使用新的缓存键重新计算；跨天后同样使用新的缓存键。不支持表版本号的数据库
+退化为按当天日期缓存，保存、删除时清除本进程缓存。
+
+进程内另外保留最近一次校验过的日程，settings.UCM_CHANGE_CALENDAR_RECHECK_SECONDS 秒内
+直接使用、不查询数据库（提交需求校验截止时间时不增加查询），超过后重新读取表版本号。
+"""
+import math
+from datetime import datetime, time, timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .versioning import get_table_versions
+
+DEFAULT_CACHE_SECONDS = 300
+DEFAULT_RECHECK_SECONDS = 5
+
+WEDNESDAY = 2
+SATURDAY = 5
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 可选登记日期范围：本周及未来3周
+AVAILABLE_WEEKS = 4
+
+# 需求列表可选日期范围：本周三前后8周
+LIST_WEEKS = 8
+
+
+def _cache_key(today, versions=None):
+    key = f'ucm:change_calendar:{today.isoformat()}'
+    if versions:
+        key += ':' + '-'.join(str(version) for _, version, _ in versions)
+    return key
+
+
+def _week_label(offset):
+    """周偏移对应的标签"""
+    if offset == 0:
+        return '本周'
+    elif offset == 1:
+        return '下周'
+    elif offset == -1:
+        return '上周'
+    return f'{abs(offset)}周前' if offset < 0 else f'{offset}周后'
+
+
+def format_deadline(deadline):
+    """截止时间显示文本，如 2026-10-20周二 17:00"""
+    return f"{deadline.strftime('%Y-%m-%d')}{WEEKDAY_NAMES[deadline.weekday()]} {deadline.strftime('%H:%M')}"
+
+
+class ChangeCalendar:
+    """某一天看到的变更日程"""
+
+    def __init__(self, today, wednesday_deadline_hours, saturday_deadline_hours, overrides=None):
+        """
+        Args:
+            today: 当天日期
+            wednesday_deadline_hours / saturday_deadline_hours: 变更日零点前多少小时截止登记
+            overrides: {日期: (调整类型, 截止时间或None)}
+        """
+        self.today = today
+        self.deadline_hours = {
+            WEDNESDAY: wednesday_deadline_hours,
+            SATURDAY: saturday_deadline_hours,
+        }
+        self.overrides = overrides or {}
+        self.this_wednesday = today + timedelta(days=(WEDNESDAY - today.weekday()) % 7)
+        self.this_saturday = today + timedelta(days=(SATURDAY - today.weekday()) % 7)
+
+        # 可选登记日期在缓存时一并算好，请求时只需按当前时间过滤截止时间
+        end = max(self.this_wednesday, self.this_saturday) + timedelta(weeks=AVAILABLE_WEEKS - 1)
+        self.upcoming = [
+            (day, self.deadline(day), self.day_type(day))
+            for day in self.change_dates(today, end)
+        ]
+
+    def is_blackout(self, day):
+        override = self.overrides.get(day)
+        return override is not None and override[0] == 'blackout'
+
+    def is_change_date(self, day):
+        """是否为变更日（周三、周六，或临时加开且未停止变更的日期）"""
+        override = self.overrides.get(day)
+        if override is not None:
+            return override[0] == 'extra'
+        return day.weekday() in (WEDNESDAY, SATURDAY)
+
+    def day_type(self, day):
+        """变更日类型：周三 / 周六 / 周X临时"""
+        if day.weekday() in (WEDNESDAY, SATURDAY):
+            return WEEKDAY_NAMES[day.weekday()]
+        return f'{WEEKDAY_NAMES[day.weekday()]}临时'
+
+    def deadline(self, day):
+        """登记截止时间，临时加开日期未指定截止时间时按周三配置计算"""
+        override = self.overrides.get(day)
+        if override is not None and override[1] is not None:
+            return override[1]
+        hours = self.deadline_hours.get(day.weekday(), self.deadline_hours[WEDNESDAY])
+        return datetime.combine(day, time(0, 0, 0)) - timedelta(hours=hours)
+
+    def check_deadline(self, day, now):
+        """
+        校验当前时间能否登记 day 的变更需求
+
+        Returns:
+            不能登记时返回原因，可以登记时返回 None
+        """
+        date_str = day.strftime('%Y-%m-%d')
+        if self.is_blackout(day):
+            return f'{date_str}停止变更，不能登记'
+        if not self.is_change_date(day):
+            return f'{date_str}不是UCM变更日'
+        deadline = self.deadline(day)
+        if now >= deadline:
+            return f'{date_str}{self.day_type(day)}UCM变更已于{format_deadline(deadline)}截止登记'
+        return None
+
+    def change_dates(self, start, end, include_blackout=False):
+        """[start, end] 范围内的变更日，include_blackout 为 True 时包含停止变更的日期"""
+        days = set()
+        day = start
+        while day <= end:
+            if self.is_change_date(day) or (include_blackout and self.is_blackout(day)):
+                days.add(day)
+            day += timedelta(days=1)
+        return sorted(days)
+
+    def available_dates(self, now):
+        """
+        当前时间仍可登记的变更日期
+
+        Returns:
+            (日期字符串列表, {日期字符串: 截止说明})
+        """
+        dates = []
+        deadlines = {}
+        for day, deadline, day_type in self.upcoming:
+            if now < deadline:
+                date_str = day.strftime('%Y-%m-%d')
+                dates.append(date_str)
+                deadlines[date_str] = f"{day_type}UCM变更，最晚登记时间在{format_deadline(deadline)}前"
+        return dates, deadlines
+
+    def list_window_dates(self):
+        """需求列表可选的日期范围（本周三前后8周的变更日，含停止变更的日期）"""
+        start = self.this_wednesday - timedelta(weeks=LIST_WEEKS)
+        end = self.this_wednesday + timedelta(weeks=LIST_WEEKS, days=3)
+        return self.change_dates(start, end, include_blackout=True)
+
+    def week_dates(self, offset):
+        """相对本周偏移 offset 周的周三、周六"""
+        label = _week_label(offset)
+        wednesday = self.this_wednesday + timedelta(weeks=offset)
+        saturday = self.this_saturday + timedelta(weeks=offset)
+        return [
+            {
+                'date': day.strftime('%Y-%m-%d'),
+                'day_type': day_type,
+                'label': f'{day.strftime("%Y年%m月%d日")}（{label}{day_type[-1]}）',
+                'blackout': self.is_blackout(day),
+            }
+            for day, day_type in ((wednesday, '周三'), (saturday, '周六'))
+        ]
+
+    def week_offset_of(self, day, now):
+        """day 相对当前时间的周偏移（向下取整）"""
+        days_diff = (datetime.combine(day, time(0, 0, 0)) - now).days
+        return math.floor(days_diff / 7)
+
+
+def build_change_calendar(today, table_versions=None):
+    """从数据库读取配置和调整日期，生成 today 的变更日程（table_versions 为已读取的表版本号）"""
+    from .models import ChangeDateOverride, UCMDateConfig
+
+    config = UCMDateConfig.get_solo(table_versions)
+    overrides = {
+        row.date: (row.override_type, row.deadline)
+        for row in ChangeDateOverride.objects.all()
+    }
+    return ChangeCalendar(
+        today,
+        config.wednesday_deadline_hours,
+        config.saturday_deadline_hours,
+        overrides
+    )
+
+
+# 进程内最近一次校验过的日程：(日期, 日程, 表版本号, 校验时间)
+_validated_calendar = None
+
+
+def get_change_calendar(today=None):
+    """
+    获取当天的变更日程
+
+    进程内日程在重新校验间隔内直接返回，不查询数据库；超过间隔后读取一次表版本号，
+    版本号未变时继续使用，变化时从缓存或数据库重新获取。
+    """
+    global _validated_calendar
+    from .models import ChangeDateOverride, UCMDateConfig
+
+    today = today or timezone.now().date()
+    validated = _validated_calendar
+    is_same_day = validated is not None and validated[0] == today
+    recheck_seconds = getattr(settings, 'UCM_CHANGE_CALENDAR_RECHECK_SECONDS', DEFAULT_RECHECK_SECONDS)
+    if is_same_day and monotonic() - validated[3] < recheck_seconds:
+        return validated[1]
+
+    versions = get_table_versions([ChangeDateOverride, UCMDateConfig])
+    if is_same_day and versions is not None and validated[2] == versions:
+        calendar = validated[1]
+    else:
+        key = _cache_key(today, versions)
+        calendar = cache.get(key)
+        if calendar is None:
+            calendar = build_change_calendar(today, versions)
+            cache.set(key, calendar, getattr(settings, 'UCM_CHANGE_CALENDAR_CACHE_SECONDS', DEFAULT_CACHE_SECONDS))
+    _validated_calendar = (today, calendar, versions, monotonic())
+    return calendar
+
+
+def invalidate_change_calendar(**kwargs):
+    """post_save / post_delete 信号处理：清除本进程日程和不带表版本号的当天日程缓存"""
+    global _validated_calendar
+    _validated_calendar = None
+    cache.delete(_cache_key(timezone.now().date()))
+
+
+def connect_signals():
+    """注册日程缓存失效信号"""
+    from django.db.models.signals import post_delete, post_save
+    from .models import ChangeDateOverride, UCMDateConfig
+
+    for model in (UCMDateConfig, ChangeDateOverride):
+        post_save.connect(invalidate_change_calendar, sender=model, dispatch_uid=f'ucm_change_calendar_{model.__name__}_save')
+        post_delete.connect(invalidate_change_calendar, sender=model, dispatch_uid=f'ucm_change_calendar_{model.__name__}_delete')
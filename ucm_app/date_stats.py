@@ -0,0 +1,175 @@
+"""
+需求按日期统计汇总
+SQLite 下由需求表、归档表上的触发器在同一事务中增量维护 ucm_app_requirementdatestat
+（按 UCM变更日期、需求类型、状态、地点计数），批量 update / delete、bulk_create 和
+归档迁移同样生效。日期统计、可选日期等接口直接读取汇总表，耗时只与日期数有关。
+
+触发器在每次 migrate 后检查并补建，补建时从源表重建汇总；也可以手动执行
+rebuild_requirement_stats 命令重建。非 SQLite 数据库直接对需求表和归档表分组统计。
+"""
+import logging
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+logger = logging.getLogger(__name__)
+
+STAT_TABLE = 'ucm_app_requirementdatestat'
+STAT_KEY_COLUMNS = ['ucm_change_date', 'requirement_type', 'status', 'location']
+
+# 参与统计的源表（需求表 + 归档表）
+SOURCE_TABLES = ['ucm_app_ucmrequirement', 'ucm_app_ucmrequirementarchive']
+
+# aggregate_date_stats 支持的日期分组周期
+PERIOD_FUNCTIONS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def is_summary_supported(conn=None):
+    """当前数据库是否使用触发器维护汇总表"""
+    return (conn or connection).vendor == 'sqlite'
+
+
+def _key_match(row):
+    return ' AND '.join(f'{column} = {row}.{column}' for column in STAT_KEY_COLUMNS)
+
+
+def _trigger_statements(table):
+    """生成维护汇总表的触发器建表语句"""
+    columns = ', '.join(STAT_KEY_COLUMNS)
+    increment = (
+        f"INSERT INTO {STAT_TABLE}({columns}, count) "
+        f"VALUES ({', '.join(f'new.{column}' for column in STAT_KEY_COLUMNS)}, 1) "
+        f"ON CONFLICT({columns}) DO UPDATE SET count = count + 1;"
+    )
+    decrement = (
+        f"UPDATE {STAT_TABLE} SET count = count - 1 WHERE {_key_match('old')}; "
+        f"DELETE FROM {STAT_TABLE} WHERE {_key_match('old')} AND count <= 0;"
+    )
+    changed = ' OR '.join(f'old.{column} IS NOT new.{column}' for column in STAT_KEY_COLUMNS)
+    return {
+        f'{table}_stat_ai': (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_stat_ai AFTER INSERT ON {table} "
+            f"BEGIN {increment} END"
+        ),
+        f'{table}_stat_ad': (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_stat_ad AFTER DELETE ON {table} "
+            f"BEGIN {decrement} END"
+        ),
+        f'{table}_stat_au': (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_stat_au "
+            f"AFTER UPDATE OF {', '.join(STAT_KEY_COLUMNS)} ON {table} WHEN {changed} "
+            f"BEGIN {decrement} {increment} END"
+        ),
+    }
+
+
+def rebuild_date_stats(conn=None):
+    """清空并从需求表和归档表重建汇总表"""
+    conn = conn or connection
+    columns = ', '.join(STAT_KEY_COLUMNS)
+    union = ' UNION ALL '.join(f"SELECT {columns} FROM {table}" for table in SOURCE_TABLES)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {STAT_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {STAT_TABLE}({columns}, count) "
+            f"SELECT {columns}, COUNT(*) FROM ({union}) GROUP BY {columns}"
+        )
+
+
+def install_date_stat_triggers(conn=None):
+    """
+    补建缺失的汇总触发器，补建过触发器时重建汇总表
+
+    Returns:
+        补建过触发器的源表列表
+    """
+    conn = conn or connection
+    if not is_summary_supported(conn):
+        return []
+
+    existing_tables = set(conn.introspection.table_names())
+    if STAT_TABLE not in existing_tables or not existing_tables.issuperset(SOURCE_TABLES):
+        return []
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+
+    installed = []
+    with conn.cursor() as cursor:
+        for table in SOURCE_TABLES:
+            triggers = _trigger_statements(table)
+            if existing_triggers.issuperset(triggers):
+                continue
+            for statement in triggers.values():
+                cursor.execute(statement)
+            installed.append(table)
+
+    if installed:
+        rebuild_date_stats(conn)
+        logger.info(f"需求日期统计触发器已安装并重建: {', '.join(installed)}")
+    return installed
+
+
+def install_date_stat_triggers_after_migrate(sender, using='default', **kwargs):
+    """post_migrate 信号处理：迁移后补建汇总触发器"""
+    from django.db import connections
+    install_date_stat_triggers(connections[using])
+
+
+def aggregate_date_stats(group_by, period=None, **filters):
+    """
+    按 group_by 字段汇总需求数
+
+    Args:
+        group_by: 分组字段列表，取自 ucm_change_date / requirement_type / status / location
+        period: 按变更日期所在的 'week'（周一开始）或 'month' 分组，结果中以 period 字段返回周期首日
+        filters: 作用于上述字段的过滤条件（如 ucm_change_date__range=(start, end)）
+
+    Returns:
+        [{分组字段..., 'total': 数量}]
+    """
+    from .models import RequirementDateStat, UCMRequirement, UCMRequirementArchive
+
+    fields = list(group_by)
+    annotations = {}
+    if period is not None:
+        annotations['period'] = PERIOD_FUNCTIONS[period]('ucm_change_date')
+        fields.insert(0, 'period')
+
+    if is_summary_supported():
+        return list(
+            RequirementDateStat.objects.filter(**filters).annotate(**annotations)
+            .values(*fields).annotate(total=Sum('count')).order_by()
+        )
+
+    # 无触发器维护时直接对需求表和归档表分组统计后合并
+    totals = defaultdict(int)
+    for model in (UCMRequirement, UCMRequirementArchive):
+        rows = (
+            model.objects.filter(**filters).annotate(**annotations)
+            .values(*fields).annotate(total=Count('id')).order_by()
+        )
+        for row in rows:
+            totals[tuple(row[field] for field in fields)] += row['total']
+    return [dict(zip(fields, key), total=total) for key, total in totals.items()]
+
+
+def earliest_change_date():
+    """有需求（含已归档）的最早 UCM 变更日期，没有需求时返回 None"""
+    from .models import RequirementDateStat, UCMRequirement, UCMRequirementArchive
+
+    if is_summary_supported():
+        return RequirementDateStat.objects.aggregate(earliest=Min('ucm_change_date'))['earliest']
+
+    dates = [
+        model.objects.aggregate(earliest=Min('ucm_change_date'))['earliest']
+        for model in (UCMRequirement, UCMRequirementArchive)
+    ]
+    dates = [value for value in dates if value is not None]
+    return min(dates) if dates else None
@@ -0,0 +1,149 @@
+"""
+需求变更推送（服务器推送事件 SSE）
+
+每个进程一个 RequirementEventBroker：有订阅者时后台每 settings.UCM_EVENTS_POLL_SECONDS 秒
+读取一次需求表、归档表的版本号（见 versioning.py），版本变化时对比日期统计汇总表
+（见 date_stats.py）前后两次的数量，生成“某日期新增 / 处理 / 删除了多少需求”事件
+推送给本进程的所有订阅者。不论有多少客户端订阅，每个进程只有一个轮询，且批量
+update / delete、后台管理、其他进程的写入都能感知。
+
+同一轮询间隔内相互抵消的变化（如新增后立即删除）不会产生事件；只修改需求内容、
+不影响数量时推送不带日期的 requirements_updated 事件。
+SSE 接口需要以 ASGI 方式运行（如 uvicorn ucm_backend.asgi:application）。
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_SECONDS = 0.5
+
+# 只对比最近一段时间的变更日期，更早的日期不再推送
+LOOKBACK_DAYS = 120
+
+# 单个订阅者最多积压的事件数，超过后丢弃积压并通知客户端全量刷新
+MAX_PENDING_EVENTS = 100
+
+
+def diff_date_stats(old, new):
+    """
+    对比两次汇总 {(日期, 需求类型): {'pending', 'processed'}}，推断新增、处理、删除数量
+
+    Returns:
+        [{'type': 'requirements_changed', 'date', 'requirement_type', 'created', 'processed', 'deleted'}]
+    """
+    events = []
+    empty = {'pending': 0, 'processed': 0}
+    for key in sorted(set(old) | set(new)):
+        before = old.get(key, empty)
+        after = new.get(key, empty)
+        pending_delta = after['pending'] - before['pending']
+        processed_delta = after['processed'] - before['processed']
+        if not pending_delta and not processed_delta:
+            continue
+
+        # 待处理减少、已处理增加的部分视为处理，其余增加为新增、减少为删除
+        pending_removed = max(-pending_delta, 0)
+        processed_added = max(processed_delta, 0)
+        processed = min(pending_removed, processed_added)
+        events.append({
+            'type': 'requirements_changed',
+            'date': key[0].strftime('%Y-%m-%d'),
+            'requirement_type': key[1],
+            'created': max(pending_delta, 0) + processed_added - processed,
+            'processed': processed,
+            'deleted': pending_removed - processed + max(-processed_delta, 0),
+        })
+    return events
+
+
+class RequirementEventBroker:
+    """进程内事件分发：一个轮询任务，多个订阅队列"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._task = None
+        self._versions = None
+        self._snapshot = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    async def subscribe(self):
+        """订阅事件，返回 asyncio.Queue；没有轮询任务时启动"""
+        queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.get_loop() is not asyncio.get_running_loop():
+            self._task = asyncio.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event):
+        """推送事件给所有订阅者（在事件循环线程中调用）"""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 客户端消费太慢，丢弃积压，让客户端重新加载
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({'type': 'resync'})
+
+    async def _poll(self):
+        interval = getattr(settings, 'UCM_EVENTS_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+        # 轮询停止期间的变化不推送，重新启动后首次检查只记录当前汇总作为基准
+        self._snapshot = None
+        try:
+            while self._subscribers:
+                try:
+                    events = await sync_to_async(self._check)()
+                except Exception:
+                    logger.exception('需求变更检查失败')
+                    events = []
+                for event in events:
+                    self.publish(event)
+                await asyncio.sleep(interval)
+        finally:
+            self._task = None
+
+    def _check(self):
+        """版本号变化时重新读取汇总并与上次对比，返回事件列表"""
+        from .date_stats import aggregate_date_stats
+        from .models import UCMRequirement, UCMRequirementArchive
+        from .versioning import get_table_versions
+
+        versions = get_table_versions([UCMRequirement, UCMRequirementArchive])
+        if versions is not None and versions == self._versions and self._snapshot is not None:
+            return []
+
+        since = timezone.now().date() - timedelta(days=LOOKBACK_DAYS)
+        snapshot = {}
+        for row in aggregate_date_stats(
+            ['ucm_change_date', 'requirement_type', 'status'], ucm_change_date__gte=since
+        ):
+            counts = snapshot.setdefault(
+                (row['ucm_change_date'], row['requirement_type']), {'pending': 0, 'processed': 0}
+            )
+            counts[row['status']] = counts.get(row['status'], 0) + row['total']
+
+        previous = self._snapshot
+        self._versions = versions
+        self._snapshot = snapshot
+        if previous is None:
+            return []
+
+        events = diff_date_stats(previous, snapshot)
+        if not events and versions is not None:
+            events = [{'type': 'requirements_updated'}]
+        return events
+
+
+broker = RequirementEventBroker()
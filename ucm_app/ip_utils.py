@@ -0,0 +1,67 @@
+"""
+IP地址工具
+IPv4 地址以整数形式冗余存储（ip_int 列，带索引），网段和区间查询编译为
+索引上的 BETWEEN 查询，不再依赖 LIKE 扫描和 Python 侧过滤。
+"""
+import ipaddress
+
+
+def ip_to_int(value):
+    """IPv4 地址转换为整数，无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return int(ipaddress.IPv4Address(str(value).strip()))
+    except ValueError:
+        return None
+
+
+def parse_ip_range(cidr=None, ip_from=None, ip_to=None):
+    """
+    解析网段或IP区间
+
+    Args:
+        cidr: 网段，如 84.12.0.0/16
+        ip_from: 起始IP（含）
+        ip_to: 结束IP（含）
+
+    Returns:
+        (start, end) 整数区间，未提供任何条件时返回 None
+
+    Raises:
+        ValueError: 格式错误
+    """
+    if cidr:
+        try:
+            network = ipaddress.IPv4Network(cidr.strip(), strict=False)
+        except ValueError:
+            raise ValueError(f'网段格式不正确: {cidr}')
+        return int(network.network_address), int(network.broadcast_address)
+
+    if ip_from or ip_to:
+        start = ip_to_int(ip_from) if ip_from else 0
+        end = ip_to_int(ip_to) if ip_to else int(ipaddress.IPv4Address('255.255.255.255'))
+        if start is None or end is None:
+            raise ValueError('IP区间格式不正确（IPv4）')
+        if start > end:
+            raise ValueError('起始IP不能大于结束IP')
+        return start, end
+
+    return None
+
+
+def filter_by_ip_range(queryset, query_params, field='ip_int'):
+    """
+    根据请求参数 cidr / ip_from / ip_to 过滤查询集
+
+    Raises:
+        ValueError: 参数格式错误
+    """
+    ip_range = parse_ip_range(
+        cidr=query_params.get('cidr'),
+        ip_from=query_params.get('ip_from'),
+        ip_to=query_params.get('ip_to'),
+    )
+    if ip_range is None:
+        return queryset
+    return queryset.filter(**{f'{field}__range': ip_range})
@@ -0,0 +1,310 @@
+"""
+需求地点识别
+根据 IP 网段和设备名称前缀判断需求所属地点，用于变更方案分组和按地点统计。
+
+识别规则存放在 LocationRule 表（IP网段 / 名称前缀 + 优先级），编译为两棵前缀树：
+IP 按位的二叉树和名称按字符的前缀树。一条记录沿两棵树各走一遍，命中的规则中
+优先级最高者生效，优先级相同时前缀更长（网段更小）者生效，均未命中时为默认地点。
+
+编译结果进程内缓存，按 LocationRule 的表版本号校验：任一进程修改规则后，所有进程下次
+识别时重新编译。不支持表版本号的数据库缓存 settings.UCM_LOCATION_RULES_CACHE_SECONDS 秒，
+本进程保存或删除规则时立即失效。规则变化只影响之后保存的需求，已有记录需执行 recompute_requirement_locations
+命令（或分段调用 location-rules/recompute 接口）重新计算。
+"""
+import ipaddress
+import threading
+import time
+
+from django.conf import settings
+
+from .ip_utils import ip_to_int
+from .versioning import get_table_versions
+
+# 变更方案按此顺序分地点生成
+LOCATIONS = ['外高桥', '嘉定', '境外机构', '分行']
+
+DEFAULT_LOCATION = '分行'
+
+DEFAULT_CACHE_SECONDS = 60
+
+RULE_CIDR = 'cidr'
+RULE_NAME_PREFIX = 'name_prefix'
+
+# 同优先级、同前缀长度时 IP 规则优先于名称规则
+_RULE_TYPE_RANK = {RULE_CIDR: 1, RULE_NAME_PREFIX: 0}
+
+
+def normalize_rule_pattern(rule_type, pattern):
+    """
+    规范化规则内容：网段转为标准写法（如 84.0.0.0/8），名称前缀转为大写
+
+    Raises:
+        ValueError: 格式错误
+    """
+    pattern = str(pattern or '').strip()
+    if rule_type == RULE_CIDR:
+        try:
+            return str(ipaddress.IPv4Network(pattern, strict=False))
+        except ValueError:
+            raise ValueError(f'网段格式不正确: {pattern}')
+    if rule_type == RULE_NAME_PREFIX:
+        if not pattern:
+            raise ValueError('名称前缀不能为空')
+        return pattern.upper()
+    raise ValueError(f'未知的规则类型: {rule_type}')
+
+
+def _row_columns(requirement_type):
+    """需求数据中 IP 列和名称列的列名"""
+    if requirement_type in ['import', 'delete']:
+        return 'IP', '名称'
+    return '设备ip', '老指标'
+
+
+class _TrieNode:
+    __slots__ = ('children', 'best')
+
+    def __init__(self):
+        self.children = {}
+        # 从根到本节点路径上命中的最优规则：(优先级, 前缀长度, 类型次序, 地点)
+        self.best = None
+
+
+def _finalize(node, inherited=None):
+    """把祖先节点的最优规则向下合并，查询时只需取走到的最深节点"""
+    stack = [(node, inherited)]
+    while stack:
+        node, inherited = stack.pop()
+        if inherited is not None and (node.best is None or inherited > node.best):
+            node.best = inherited
+        for child in node.children.values():
+            stack.append((child, node.best))
+
+
+class LocationClassifier:
+    """由地点规则编译的前缀树分类器（只读，可在线程间共享）"""
+
+    def __init__(self, rules, default=DEFAULT_LOCATION):
+        """
+        Args:
+            rules: [(规则类型, 规则内容, 地点, 优先级)]，规则内容需已规范化
+            default: 均未命中时的地点
+        """
+        self.default = default
+        self._ip_root = _TrieNode()
+        self._name_root = _TrieNode()
+        for rule_type, pattern, location, priority in rules:
+            if rule_type == RULE_CIDR:
+                network = ipaddress.IPv4Network(pattern, strict=False)
+                address = int(network.network_address)
+                node = self._ip_root
+                for shift in range(31, 31 - network.prefixlen, -1):
+                    node = node.children.setdefault((address >> shift) & 1, _TrieNode())
+                length = network.prefixlen
+            else:
+                node = self._name_root
+                for char in pattern:
+                    node = node.children.setdefault(char, _TrieNode())
+                length = len(pattern)
+            candidate = (priority, length, _RULE_TYPE_RANK[rule_type], location)
+            if node.best is None or candidate > node.best:
+                node.best = candidate
+        _finalize(self._ip_root)
+        _finalize(self._name_root)
+
+    def _match_ip(self, ip_int):
+        node = self._ip_root
+        best = node.best
+        shift = 31
+        while shift >= 0:
+            node = node.children.get((ip_int >> shift) & 1)
+            if node is None:
+                break
+            best = node.best
+            shift -= 1
+        return best
+
+    def _match_name(self, name):
+        node = self._name_root
+        best = node.best
+        for char in name:
+            node = node.children.get(char)
+            if node is None:
+                break
+            best = node.best
+        return best
+
+    def classify(self, ip, name):
+        """根据 IP 和名称识别地点"""
+        ip_int = ip_to_int(ip)
+        ip_best = self._match_ip(ip_int) if ip_int is not None else None
+        name_best = self._match_name(str(name or '').strip().upper()) if name else None
+        if ip_best is None and name_best is None:
+            return self.default
+        if name_best is None or (ip_best is not None and ip_best > name_best):
+            return ip_best[3]
+        return name_best[3]
+
+    def classify_rows(self, rows, requirement_type):
+        """批量识别同一需求类型的多行需求数据，返回与 rows 对应的地点列表"""
+        ip_column, name_column = _row_columns(requirement_type)
+        # 同一批数据中 IP、名称重复较多，相同输入只走一次前缀树
+        memo = {}
+        locations = []
+        for row in rows:
+            key = (row.get(ip_column), row.get(name_column))
+            location = memo.get(key)
+            if location is None:
+                location = memo[key] = self.classify(*key)
+            locations.append(location)
+        return locations
+
+
+_classifier_cache = None
+_classifier_lock = threading.Lock()
+
+
+def get_location_classifier():
+    """获取当前规则编译的分类器（优先读进程内缓存，命中时只读取表版本号）"""
+    global _classifier_cache
+    from .models import LocationRule
+
+    # 先读版本号再读规则，读取期间的修改只会导致下次多编译一次
+    versions = get_table_versions([LocationRule])
+    cached = _classifier_cache
+    if cached is not None:
+        if versions is not None:
+            if cached[2] == versions:
+                return cached[0]
+        elif time.monotonic() - cached[1] < getattr(settings, 'UCM_LOCATION_RULES_CACHE_SECONDS', DEFAULT_CACHE_SECONDS):
+            return cached[0]
+
+    with _classifier_lock:
+        rules = LocationRule.objects.filter(enabled=True).values_list('rule_type', 'pattern', 'location', 'priority')
+        classifier = LocationClassifier(list(rules))
+        _classifier_cache = (classifier, time.monotonic(), versions)
+    return classifier
+
+
+def clear_location_classifier_cache(**kwargs):
+    """post_save / post_delete 信号处理：规则变化时清除进程内缓存"""
+    global _classifier_cache
+    _classifier_cache = None
+
+
+def connect_signals():
+    """注册地点规则缓存失效信号"""
+    from django.db.models.signals import post_delete, post_save
+    from .models import LocationRule
+
+    post_save.connect(clear_location_classifier_cache, sender=LocationRule, dispatch_uid='ucm_location_rule_save')
+    post_delete.connect(clear_location_classifier_cache, sender=LocationRule, dispatch_uid='ucm_location_rule_delete')
+
+
+def get_location(row, requirement_type):
+    """根据IP和名称识别地点"""
+    ip_column, name_column = _row_columns(requirement_type)
+    return get_location_classifier().classify(row.get(ip_column), row.get(name_column))
+
+
+def classify_locations(rows, requirement_type):
+    """批量识别同一需求类型多行需求数据的地点"""
+    return get_location_classifier().classify_rows(rows, requirement_type)
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 接口分段重新计算：表标识 -> 模型名（按此顺序处理）
+RECOMPUTE_TABLES = {'requirement': 'UCMRequirement', 'archive': 'UCMRequirementArchive'}
+
+
+def _recompute_batch(model, rows):
+    """重新计算一批记录的地点，只更新有变化的记录"""
+    classifier = get_location_classifier()
+    changed = []
+    for row in rows:
+        ip_column, name_column = _row_columns(row.requirement_type)
+        data = row.get_requirement_data_dict()
+        location = classifier.classify(data.get(ip_column), data.get(name_column))
+        if location != row.location:
+            row.location = location
+            changed.append(row)
+    model.objects.bulk_update(changed, ['location'])
+    return len(changed)
+
+
+def _recompute_model(model, after_id=0, limit=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    重新计算一张表中 id > after_id 的记录，最多检查 limit 条（None 不限制）
+
+    Returns:
+        (检查的记录数, 更新的记录数, 最后检查的ID, 是否已处理到表尾)
+    """
+    from .write_queue import submit_write
+
+    processed = 0
+    updated = 0
+    last_id = after_id
+    while limit is None or processed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - processed)
+        rows = list(
+            model.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'requirement_type', 'requirement_data', 'location')[:size]
+        )
+        if rows:
+            last_id = rows[-1].id
+            processed += len(rows)
+            updated += submit_write(lambda: _recompute_batch(model, rows))
+        if len(rows) < size:
+            return processed, updated, last_id, True
+    # 恰好检查到 limit 条时确认后面是否还有记录
+    finished = not model.objects.filter(id__gt=last_id).exists()
+    return processed, updated, last_id, finished
+
+
+def recompute_locations(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    按当前规则重新计算需求表和归档表中所有记录的地点（回填历史数据或规则变化后执行）
+
+    每批在写队列中单独提交事务；日期统计汇总由触发器同步更新，有记录变化时清除趋势统计缓存。
+
+    Returns:
+        {模型名: 更新的记录数}
+    """
+    from django.apps import apps
+    from .analytics import clear_analytics_cache
+
+    result = {}
+    for model_name in RECOMPUTE_TABLES.values():
+        _, updated, _, _ = _recompute_model(apps.get_model('ucm_app', model_name), batch_size=batch_size)
+        result[model_name] = updated
+    if any(result.values()):
+        clear_analytics_cache()
+    return result
+
+
+def recompute_locations_chunk(table, after_id, limit, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    分段重新计算地点：处理 table 中 id > after_id 的至多 limit 条记录
+
+    Returns:
+        {
+            'table': 表标识, 'processed': 检查的记录数, 'updated': 更新的记录数,
+            'next': 下一段的 {'table', 'after_id'}，全部处理完时为 None
+        }
+    """
+    from django.apps import apps
+    from .analytics import clear_analytics_cache
+
+    model = apps.get_model('ucm_app', RECOMPUTE_TABLES[table])
+    processed, updated, last_id, finished = _recompute_model(model, after_id, limit, batch_size)
+    if updated:
+        clear_analytics_cache()
+
+    if not finished:
+        next_cursor = {'table': table, 'after_id': last_id}
+    else:
+        tables = list(RECOMPUTE_TABLES)
+        index = tables.index(table)
+        next_cursor = {'table': tables[index + 1], 'after_id': 0} if index + 1 < len(tables) else None
+    return {'table': table, 'processed': processed, 'updated': updated, 'next': next_cursor}
@@ -0,0 +1,32 @@
+"""
+归档已处理的历史需求
+
+建议通过计划任务（cron / Windows 任务计划程序）每天执行一次:
+    python manage.py archive_requirements
+"""
+from django.core.management.base import BaseCommand
+
+from ucm_app.archive import (
+    DEFAULT_BATCH_SIZE, archive_processed_requirements, get_archivable_requirements
+)
+
+
+class Command(BaseCommand):
+    help = '将超过保留期限的已处理需求分批迁移到归档表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='保留天数，默认取 settings.UCM_ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'每批归档的记录数（默认 {DEFAULT_BATCH_SIZE}）')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='只统计可归档的记录数，不实际归档')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = get_archivable_requirements(options['days']).count()
+            self.stdout.write(f'可归档的需求: {count} 条')
+            return
+
+        count = archive_processed_requirements(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'归档完成，共 {count} 条'))
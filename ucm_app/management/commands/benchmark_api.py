@@ -0,0 +1,108 @@
+"""
+JSON 渲染与响应压缩基准测试
+
+用与需求列表相同结构的模拟数据，对比标准库 JSON 与 orjson 的序列化/解析耗时，
+以及 gzip、brotli 压缩后的体积和耗时，不读写数据库:
+    python manage.py benchmark_api --rows 2000 --repeat 20
+"""
+import gzip
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ucm_app.middleware import DEFAULT_BROTLI_QUALITY, brotli
+from ucm_app.renderers import UCMJSONParser, UCMJSONRenderer, orjson
+
+
+def build_rows(count):
+    """生成与需求列表接口结构一致的模拟数据"""
+    rows = []
+    for i in range(count):
+        name = f'NF-JD-ROUTER-{i:05d}'
+        ip = f'84.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'
+        rows.append({
+            'id': i + 1,
+            'requirement_type': 'import',
+            'ucm_change_date': '2026-10-21',
+            'device_name': name,
+            'ip': ip,
+            'status': 'pending' if i % 3 else 'processed',
+            'submitter': 1,
+            'submitter_name': 'operator',
+            'submit_time': '2026-10-19T09:30:00.123456',
+            'processor': None,
+            'processor_name': None,
+            'process_time': None,
+            'note': None,
+            'revision': 0,
+            'requirement_data_dict': {
+                '名称': name,
+                'IP': ip,
+                '设备类型': '核心路由器',
+                '品牌(厂商)': '华为',
+                '版本': 'VRP V8R12',
+                '分组': '嘉定-核心',
+                '部署位置': '嘉定机房',
+                '老指标': 'CPU利用率,内存利用率,端口流量',
+                '新指标': 'CPU利用率,内存利用率,端口流量,光功率',
+            },
+        })
+    return {'count': count, 'next': None, 'previous': None, 'results': rows}
+
+
+def timed(func, repeat):
+    """返回 (最后一次结果, 平均耗时毫秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+class Command(BaseCommand):
+    help = '对比 JSON 渲染/解析实现及 gzip/brotli 压缩的耗时和体积'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='模拟数据行数（默认 2000）')
+        parser.add_argument('--repeat', type=int, default=20, help='每项重复次数（默认 20）')
+
+    def handle(self, *args, **options):
+        data = build_rows(options['rows'])
+        repeat = options['repeat']
+        parser_context = {'encoding': 'utf-8'}
+
+        self.stdout.write(f"数据行数: {options['rows']}，重复次数: {repeat}")
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('未安装 orjson，UCMJSONRenderer 与标准库实现相同'))
+
+        self.stdout.write('\n[序列化 / 解析]')
+        std_body, std_render_ms = timed(lambda: JSONRenderer().render(data), repeat)
+        fast_body, fast_render_ms = timed(lambda: UCMJSONRenderer().render(data), repeat)
+        _, std_parse_ms = timed(lambda: JSONParser().parse(io.BytesIO(std_body), None, parser_context), repeat)
+        _, fast_parse_ms = timed(lambda: UCMJSONParser().parse(io.BytesIO(fast_body), None, parser_context), repeat)
+        self.stdout.write(f'  标准库 JSON  渲染 {std_render_ms:8.2f} ms  解析 {std_parse_ms:8.2f} ms')
+        self.stdout.write(f'  UCMJSON      渲染 {fast_render_ms:8.2f} ms  解析 {fast_parse_ms:8.2f} ms')
+        self.stdout.write(
+            f'  渲染提速 {std_render_ms / fast_render_ms:.1f}x，解析提速 {std_parse_ms / fast_parse_ms:.1f}x'
+        )
+
+        self.stdout.write('\n[压缩]')
+        raw_size = len(fast_body)
+        self.stdout.write(f'  未压缩        {raw_size / 1024:10.1f} KB')
+        gzip_body, gzip_ms = timed(lambda: gzip.compress(fast_body, compresslevel=6), repeat)
+        self.stdout.write(
+            f'  gzip (6)      {len(gzip_body) / 1024:10.1f} KB  压缩率 {len(gzip_body) / raw_size:6.1%}  '
+            f'耗时 {gzip_ms:6.2f} ms'
+        )
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('  未安装 brotli，跳过 brotli 测试'))
+        else:
+            quality = getattr(settings, 'UCM_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+            br_body, br_ms = timed(lambda: brotli.compress(fast_body, quality=quality), repeat)
+            self.stdout.write(
+                f'  brotli ({quality})    {len(br_body) / 1024:10.1f} KB  '
+                f'压缩率 {len(br_body) / raw_size:6.1%}  耗时 {br_ms:6.2f} ms'
+            )
@@ -0,0 +1,26 @@
+"""
+重建需求日期统计汇总表
+
+    python manage.py rebuild_requirement_stats
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ucm_app.analytics import clear_analytics_cache
+from ucm_app.date_stats import install_date_stat_triggers, is_summary_supported, rebuild_date_stats
+
+
+class Command(BaseCommand):
+    help = '从需求表和归档表重建按日期统计的汇总表（仅SQLite）'
+
+    def handle(self, *args, **options):
+        if not is_summary_supported():
+            self.stdout.write('当前数据库直接对需求表分组统计，无需重建')
+            return
+
+        with transaction.atomic():
+            install_date_stat_triggers()
+            rebuild_date_stats()
+        # 已缓存的趋势统计基于旧汇总数据
+        clear_analytics_cache()
+        self.stdout.write(self.style.SUCCESS('需求日期统计重建完成'))
@@ -0,0 +1,21 @@
+"""
+重建全文检索索引
+
+    python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+
+from ucm_app.search import install_search_index, is_search_index_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = '重建需求和设备清单的全文检索索引（仅SQLite）'
+
+    def handle(self, *args, **options):
+        if not is_search_index_supported():
+            self.stdout.write('当前数据库不使用全文索引，无需重建')
+            return
+
+        install_search_index()
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('全文索引重建完成'))
@@ -0,0 +1,23 @@
+"""
+重新计算需求地点
+
+回填历史数据或调整地点识别规则后执行:
+    python manage.py recompute_requirement_locations
+"""
+from django.core.management.base import BaseCommand
+
+from ucm_app.locations import DEFAULT_BATCH_SIZE, recompute_locations
+
+
+class Command(BaseCommand):
+    help = '按当前地点识别规则重新计算需求表和归档表的地点列'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'每批处理的记录数（默认 {DEFAULT_BATCH_SIZE}）')
+
+    def handle(self, *args, **options):
+        result = recompute_locations(options['batch_size'])
+        for model_name, count in result.items():
+            self.stdout.write(f'{model_name}: 更新 {count} 条')
+        self.stdout.write(self.style.SUCCESS('地点重新计算完成'))
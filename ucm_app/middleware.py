@@ -0,0 +1,63 @@
+"""
+响应压缩中间件
+按客户端 Accept-Encoding 协商压缩方式：支持 br 且安装了 brotli 时使用 brotli，
+否则使用 gzip。小于 settings.UCM_COMPRESS_MIN_SIZE 的响应、已压缩格式（xlsx、图片等）
+和服务器推送事件流不压缩。
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+# 本身已压缩或不适合压缩的内容类型
+SKIP_CONTENT_TYPES = (
+    'application/vnd.openxmlformats',
+    'application/zip',
+    'application/gzip',
+    'image/',
+    'text/event-stream',
+)
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_BROTLI_QUALITY = 4
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """gzip / brotli 响应压缩"""
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').startswith(SKIP_CONTENT_TYPES):
+            return response
+        if not response.streaming:
+            min_size = getattr(settings, 'UCM_COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+            if len(response.content) < min_size:
+                return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or response.streaming or not re_accepts_brotli.search(accept_encoding):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        quality = getattr(settings, 'UCM_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+        compressed_content = brotli.compress(response.content, quality=quality)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+
+        # 与 GZipMiddleware 一致，强 ETag 改为弱 ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
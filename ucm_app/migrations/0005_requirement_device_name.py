@@ -0,0 +1,91 @@
+from django.db import migrations, models
+
+TABLE = 'ucm_app_ucmrequirement'
+OLD_INDEX = 'ucm_app_ucm_name_25d939_idx'
+NEW_INDEX = 'ucm_app_ucm_device__2b07a3_idx'
+
+
+def sync_device_name_column(apps, schema_editor):
+    """
+    名称列改名为 device_name
+
+    0001 建表时列名为 name，模型早已改为 device_name，已部署的数据库大多已手工改名，
+    迁移记录却一直停留在 name。这里按数据库实际情况处理：仍为 name 时改名，
+    已是 device_name 时只补齐索引，两种数据库迁移后结构一致。
+    """
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    with connection.cursor() as cursor:
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, TABLE)}
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+
+    if OLD_INDEX in constraints:
+        schema_editor.execute(schema_editor.sql_delete_index % {'table': quote(TABLE), 'name': quote(OLD_INDEX)})
+    if 'name' in columns and 'device_name' not in columns:
+        schema_editor.execute(f"ALTER TABLE {quote(TABLE)} RENAME COLUMN {quote('name')} TO {quote('device_name')}")
+    if NEW_INDEX not in constraints:
+        schema_editor.execute(f"CREATE INDEX {quote(NEW_INDEX)} ON {quote(TABLE)} ({quote('device_name')})")
+
+
+def restore_name_column(apps, schema_editor):
+    """回滚：device_name 列改回 name 并恢复原索引，与 0004 的迁移状态一致"""
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    with connection.cursor() as cursor:
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, TABLE)}
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+
+    if NEW_INDEX in constraints:
+        schema_editor.execute(schema_editor.sql_delete_index % {'table': quote(TABLE), 'name': quote(NEW_INDEX)})
+    if 'device_name' in columns and 'name' not in columns:
+        schema_editor.execute(f"ALTER TABLE {quote(TABLE)} RENAME COLUMN {quote('device_name')} TO {quote('name')}")
+    if OLD_INDEX not in constraints:
+        schema_editor.execute(f"CREATE INDEX {quote(OLD_INDEX)} ON {quote(TABLE)} ({quote('name')})")
+
+
+class Migration(migrations.Migration):
+    """使迁移记录与模型一致（模型修改时未生成迁移）"""
+
+    dependencies = [
+        ('ucm_app', '0004_add_note_field'),
+    ]
+
+    operations = [
+        # 列改名：迁移状态按模型调整，数据库按实际结构处理
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='ucmrequirement',
+                    name=OLD_INDEX,
+                ),
+                migrations.RenameField(
+                    model_name='ucmrequirement',
+                    old_name='name',
+                    new_name='device_name',
+                ),
+                migrations.AddIndex(
+                    model_name='ucmrequirement',
+                    index=models.Index(fields=['device_name'], name=NEW_INDEX),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(sync_device_name_column, restore_name_column),
+            ],
+        ),
+        # 以下只涉及显示名称和主键类型，新旧数据库都可直接执行
+        migrations.AlterField(
+            model_name='manufacturerversioninfo',
+            name='manufacturer',
+            field=models.CharField(max_length=100, verbose_name='品牌(厂商)'),
+        ),
+        migrations.AlterField(
+            model_name='ucmdateconfig',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='ucmdeviceinventory',
+            name='manufacturer',
+            field=models.CharField(max_length=100, verbose_name='品牌(厂商)'),
+        ),
+    ]
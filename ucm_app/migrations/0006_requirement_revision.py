@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0005_requirement_device_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, verbose_name='修订号'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0006_requirement_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='领取到期时间'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='lease_owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leased_requirements', to=settings.AUTH_USER_MODEL, verbose_name='领取人'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['ucm_change_date', 'status', 'lease_expires_at'], name='ucm_app_ucm_ucm_cha_3c7cd7_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0007_requirement_lease'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UCMRequirementArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='原需求ID')),
+                ('requirement_type', models.CharField(choices=[('import', '导入'), ('modify', '修改'), ('delete', '删除')], max_length=10, verbose_name='需求类型')),
+                ('ucm_change_date', models.DateField(verbose_name='UCM变更日期')),
+                ('submit_time', models.DateTimeField(verbose_name='登记时间')),
+                ('status', models.CharField(choices=[('pending', '待处理'), ('processed', '已处理')], max_length=10, verbose_name='状态')),
+                ('process_time', models.DateTimeField(blank=True, null=True, verbose_name='处理时间')),
+                ('requirement_data', models.TextField(verbose_name='需求数据(JSON)')),
+                ('note', models.TextField(blank=True, null=True, verbose_name='备注')),
+                ('device_name', models.CharField(max_length=200, verbose_name='名称')),
+                ('ip', models.CharField(max_length=50, verbose_name='IP')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('processor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_processed_requirements', to=settings.AUTH_USER_MODEL, verbose_name='处理人')),
+                ('submitter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_requirements', to=settings.AUTH_USER_MODEL, verbose_name='登记人')),
+            ],
+            options={
+                'verbose_name': 'UCM需求归档',
+                'verbose_name_plural': 'UCM需求归档',
+                'indexes': [models.Index(fields=['ucm_change_date', 'requirement_type'], name='ucm_app_ucm_ucm_cha_1551cf_idx'), models.Index(fields=['device_name'], name='ucm_app_ucm_device__28adb0_idx'), models.Index(fields=['ip'], name='ucm_app_ucm_ip_08f79d_idx')],
+            },
+        ),
+    ]
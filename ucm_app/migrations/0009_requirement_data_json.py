@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:41
+
+import json
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def normalize_requirement_data(apps, schema_editor):
+    """转换为JSON字段前，把无法解析或不是对象的需求数据置为空对象"""
+    for model_name in ['UCMRequirement', 'UCMRequirementArchive']:
+        model = apps.get_model('ucm_app', model_name)
+        invalid_ids = []
+        for pk, data in model.objects.values_list('pk', 'requirement_data').iterator():
+            try:
+                is_valid = isinstance(json.loads(data), dict)
+            except (TypeError, ValueError):
+                is_valid = False
+            if not is_valid:
+                invalid_ids.append(pk)
+        if invalid_ids:
+            model.objects.filter(pk__in=invalid_ids).update(requirement_data='{}')
+
+
+def reencode_requirement_data(apps, schema_editor):
+    """
+    转换为JSON字段后重新编码需求数据
+
+    TextField 中的旧数据以 ensure_ascii=False 存储中文键，而 JSONField 写入时中文键会被
+    转义；SQLite 的 json_extract 按原始文本匹配键名，两种存储方式混用会导致按键查询
+    漏掉旧数据，这里统一按 JSONField 的方式重新写入。
+    """
+    for model_name in ['UCMRequirement', 'UCMRequirementArchive']:
+        model = apps.get_model('ucm_app', model_name)
+        last_pk = 0
+        while True:
+            rows = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'requirement_data')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            for pk, data in rows:
+                model.objects.filter(pk=pk).update(requirement_data=data)
+            last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0008_requirement_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_requirement_data, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ucmrequirement',
+            name='requirement_data',
+            field=models.JSONField(default=dict, verbose_name='需求数据(JSON)'),
+        ),
+        migrations.AlterField(
+            model_name='ucmrequirementarchive',
+            name='requirement_data',
+            field=models.JSONField(default=dict, verbose_name='需求数据(JSON)'),
+        ),
+        migrations.RunPython(reencode_requirement_data, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0009_requirement_data_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['submit_time', 'id'], name='ucm_app_ucm_submit__0b0e4a_idx'),
+        ),
+    ]
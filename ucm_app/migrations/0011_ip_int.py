@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:45
+
+import ipaddress
+
+from django.db import migrations, models
+
+
+def backfill_ip_int(apps, schema_editor):
+    """根据IP文本列回填整数IP列"""
+    for model_name in ['UCMDeviceInventory', 'UCMRequirement', 'UCMRequirementArchive']:
+        model = apps.get_model('ucm_app', model_name)
+        for pk, ip in model.objects.values_list('pk', 'ip').iterator():
+            try:
+                ip_int = int(ipaddress.IPv4Address(str(ip).strip()))
+            except ValueError:
+                continue
+            model.objects.filter(pk=pk).update(ip_int=ip_int)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0010_requirement_submit_time_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ucmdeviceinventory',
+            name='ip_int',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='IP数值'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='ip_int',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='IP数值'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirementarchive',
+            name='ip_int',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='IP数值'),
+        ),
+        migrations.RunPython(backfill_ip_int, migrations.RunPython.noop),
+    ]
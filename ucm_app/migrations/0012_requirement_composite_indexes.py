@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0011_ip_int'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ucmrequirement',
+            name='ucm_app_ucm_ucm_cha_919438_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ucmrequirement',
+            name='ucm_app_ucm_status_a81df0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['ucm_change_date', 'status', 'requirement_type', 'device_name'], name='ucm_req_dup_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['ucm_change_date', 'status', 'requirement_type', 'ip'], name='ucm_req_dup_ip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['ucm_change_date', 'requirement_type', 'status'], name='ucm_req_date_stats_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['status', 'submit_time'], name='ucm_req_status_time_idx'),
+        ),
+    ]
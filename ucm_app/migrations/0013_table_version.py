@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0012_requirement_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=100, unique=True, verbose_name='表名')),
+                ('version', models.BigIntegerField(default=0, verbose_name='版本号')),
+                ('updated_at', models.DateTimeField(blank=True, null=True, verbose_name='最后修改时间')),
+            ],
+            options={
+                'verbose_name': '数据表版本',
+                'verbose_name_plural': '数据表版本',
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+import django.db.models.fields.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0013_table_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='data_deploy_location',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('部署位置', 'requirement_data'), output_field=models.CharField(max_length=200, null=True), verbose_name='部署位置'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='data_device_type',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('设备类型', 'requirement_data'), output_field=models.CharField(max_length=200, null=True), verbose_name='设备类型'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='data_group',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('分组', 'requirement_data'), output_field=models.CharField(max_length=200, null=True), verbose_name='分组'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='data_manufacturer',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('品牌(厂商)', 'requirement_data'), output_field=models.CharField(max_length=200, null=True), verbose_name='品牌(厂商)'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['data_device_type'], name='ucm_req_data_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['data_manufacturer'], name='ucm_req_data_mfr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['data_group'], name='ucm_req_data_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['data_deploy_location'], name='ucm_req_data_loc_idx'),
+        ),
+    ]
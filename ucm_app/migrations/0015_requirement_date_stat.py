@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+def _get_location(row, requirement_type):
+    """迁移时的地点识别规则（固定副本，不随 ucm_app.locations 变化）"""
+    ip_column = 'IP' if requirement_type in ['import', 'delete'] else '设备ip'
+    name_column = '名称' if requirement_type in ['import', 'delete'] else '老指标'
+    ip = str(row.get(ip_column, '') or '')
+    name = str(row.get(name_column, '') or '')
+
+    if ip.startswith('76.'):
+        return '嘉定'
+    elif ip.startswith('84.'):
+        return '外高桥'
+    elif ip.startswith('123.'):
+        return '境外机构'
+    if name:
+        prefix = name[:2].upper()
+        if prefix == 'NF':
+            return '外高桥'
+        elif prefix == 'JD':
+            return '嘉定'
+    return '分行'
+
+
+def backfill_location(apps, schema_editor):
+    """根据需求数据回填地点列"""
+    for model_name in ['UCMRequirement', 'UCMRequirementArchive']:
+        model = apps.get_model('ucm_app', model_name)
+        rows = model.objects.values_list('pk', 'requirement_type', 'requirement_data').iterator()
+        for pk, requirement_type, requirement_data in rows:
+            data = requirement_data if isinstance(requirement_data, dict) else {}
+            model.objects.filter(pk=pk).update(location=_get_location(data, requirement_type))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0014_requirement_data_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ucmrequirement',
+            name='location',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='地点'),
+        ),
+        migrations.AddField(
+            model_name='ucmrequirementarchive',
+            name='location',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='地点'),
+        ),
+        migrations.CreateModel(
+            name='RequirementDateStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ucm_change_date', models.DateField(verbose_name='UCM变更日期')),
+                ('requirement_type', models.CharField(choices=[('import', '导入'), ('modify', '修改'), ('delete', '删除')], max_length=10, verbose_name='需求类型')),
+                ('status', models.CharField(choices=[('pending', '待处理'), ('processed', '已处理')], max_length=10, verbose_name='状态')),
+                ('location', models.CharField(blank=True, default='', max_length=20, verbose_name='地点')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='需求数')),
+            ],
+            options={
+                'verbose_name': '需求日期统计',
+                'verbose_name_plural': '需求日期统计',
+                'constraints': [models.UniqueConstraint(fields=('ucm_change_date', 'requirement_type', 'status', 'location'), name='ucm_req_date_stat_key')],
+            },
+        ),
+        migrations.RunPython(backfill_location, migrations.RunPython.noop),
+    ]
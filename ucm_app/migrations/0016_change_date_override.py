@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0015_requirement_date_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeDateOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='日期')),
+                ('override_type', models.CharField(choices=[('blackout', '停止变更'), ('extra', '临时加开')], default='blackout', max_length=10, verbose_name='调整类型')),
+                ('deadline', models.DateTimeField(blank=True, help_text='为空时按周三/周六截止配置计算', null=True, verbose_name='登记截止时间')),
+                ('reason', models.CharField(blank=True, default='', max_length=200, verbose_name='原因')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'UCM变更日期调整',
+                'verbose_name_plural': 'UCM变更日期调整',
+                'ordering': ['date'],
+            },
+        ),
+    ]
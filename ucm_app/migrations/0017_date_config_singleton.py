@@ -0,0 +1,28 @@
+# UCMDateConfig 改为单例（固定 id=1）：保留最早的一条配置，删除重复记录
+
+from django.db import migrations
+
+SINGLETON_ID = 1
+
+
+def merge_date_configs(apps, schema_editor):
+    UCMDateConfig = apps.get_model('ucm_app', 'UCMDateConfig')
+    configs = list(UCMDateConfig.objects.order_by('id'))
+    if not configs:
+        return
+
+    keep = configs[0]
+    UCMDateConfig.objects.exclude(pk=keep.pk).delete()
+    if keep.pk != SINGLETON_ID:
+        UCMDateConfig.objects.filter(pk=keep.pk).update(id=SINGLETON_ID)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0016_change_date_override'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_date_configs, migrations.RunPython.noop),
+    ]
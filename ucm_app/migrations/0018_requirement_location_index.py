@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0017_date_config_singleton'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ucmrequirement',
+            index=models.Index(fields=['location', 'ucm_change_date'], name='ucm_req_location_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+# 原硬编码的识别规则：IP 前缀优先于名称前缀，其余名称归入默认地点（分行）
+DEFAULT_RULES = [
+    ('cidr', '76.0.0.0/8', '嘉定', 100),
+    ('cidr', '84.0.0.0/8', '外高桥', 100),
+    ('cidr', '123.0.0.0/8', '境外机构', 100),
+    ('name_prefix', 'NF', '外高桥', 50),
+    ('name_prefix', 'JD', '嘉定', 50),
+]
+
+
+def seed_rules(apps, schema_editor):
+    LocationRule = apps.get_model('ucm_app', 'LocationRule')
+    for rule_type, pattern, location, priority in DEFAULT_RULES:
+        LocationRule.objects.get_or_create(
+            rule_type=rule_type,
+            pattern=pattern,
+            defaults={'location': location, 'priority': priority}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ucm_app', '0018_requirement_location_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule_type', models.CharField(choices=[('cidr', 'IP网段'), ('name_prefix', '名称前缀')], max_length=20, verbose_name='规则类型')),
+                ('pattern', models.CharField(help_text='IP网段如 84.0.0.0/8；名称前缀如 NF，不区分大小写', max_length=100, verbose_name='规则内容')),
+                ('location', models.CharField(choices=[('外高桥', '外高桥'), ('嘉定', '嘉定'), ('境外机构', '境外机构'), ('分行', '分行')], max_length=20, verbose_name='地点')),
+                ('priority', models.IntegerField(default=0, help_text='同时命中多条规则时数值大的优先，相同时前缀更长的优先', verbose_name='优先级')),
+                ('enabled', models.BooleanField(default=True, verbose_name='启用')),
+                ('note', models.CharField(blank=True, default='', max_length=200, verbose_name='备注')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'UCM地点规则',
+                'verbose_name_plural': 'UCM地点规则',
+                'ordering': ['-priority', 'rule_type', 'pattern'],
+                'constraints': [models.UniqueConstraint(fields=('rule_type', 'pattern'), name='ucm_location_rule_pattern_key')],
+            },
+        ),
+        migrations.RunPython(seed_rules, migrations.RunPython.noop),
+    ]
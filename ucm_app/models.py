@@ -1,6 +1,15 @@
 from django.db import models
+from django.db.models.fields.json import KT
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 import json
+import threading
+import time
+
+from .ip_utils import ip_to_int
+from .locations import LOCATIONS, RULE_CIDR, RULE_NAME_PREFIX, get_location, normalize_rule_pattern
+from .versioning import get_table_versions
 
 
 class ManufacturerVersionInfo(models.Model):
@@ -50,6 +59,7 @@ class UCMDeviceInventory(models.Model):
     manufacturer = models.CharField(max_length=100, verbose_name='品牌(厂商)')
     version = models.CharField(max_length=100, verbose_name='版本')
     ip = models.CharField(max_length=50, verbose_name='IP')
+    ip_int = models.BigIntegerField(null=True, blank=True, db_index=True, verbose_name='IP数值')
     other_ips = models.TextField(blank=True, null=True, verbose_name='其他IP')
     location = models.CharField(max_length=200, blank=True, null=True, verbose_name='安装位置')
     group = models.CharField(max_length=100, blank=True, null=True, verbose_name='分组')
@@ -72,6 +82,32 @@ class UCMDeviceInventory(models.Model):
     def __str__(self):
         return f"{self.name}({self.ip})"
 
+    def save(self, *args, **kwargs):
+        self.ip_int = ip_to_int(self.ip)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'ip' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'ip_int'}
+        super().save(*args, **kwargs)
+
+
+# 常用筛选/排序的 requirement_data 键 -> 需求表中对应的生成列（由数据库从 JSON 中提取并建索引）
+REQUIREMENT_DATA_COLUMNS = {
+    '设备类型': 'data_device_type',
+    '品牌(厂商)': 'data_manufacturer',
+    '分组': 'data_group',
+    '部署位置': 'data_deploy_location',
+}
+
+
+def _requirement_data_column(key, verbose_name):
+    """从 requirement_data 提取指定键的生成列"""
+    return models.GeneratedField(
+        expression=KT(f'requirement_data__{key}'),
+        output_field=models.CharField(max_length=200, null=True),
+        db_persist=True,
+        verbose_name=verbose_name,
+    )
+
 
 class UCMRequirement(models.Model):
     """UCM需求登记表"""
@@ -93,38 +129,142 @@ class UCMRequirement(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
     processor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='processed_requirements', verbose_name='处理人')
     process_time = models.DateTimeField(null=True, blank=True, verbose_name='处理时间')
-    requirement_data = models.TextField(verbose_name='需求数据(JSON)')
+    requirement_data = models.JSONField(default=dict, verbose_name='需求数据(JSON)')
     note = models.TextField(blank=True, null=True, verbose_name='备注')
+    # 乐观锁修订号，每次修改（save 或批量 update）递增，用于批量操作的并发校验
+    revision = models.PositiveIntegerField(default=0, verbose_name='修订号')
+    # 处理租约：处理人领取待处理需求后在到期前独占处理，过期自动释放
+    lease_owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='leased_requirements', verbose_name='领取人')
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name='领取到期时间')
     
     # 用于快速查询的冗余字段（从requirement_data中提取）
     device_name = models.CharField(max_length=200, verbose_name='名称')
     ip = models.CharField(max_length=50, verbose_name='IP')
+    # IP的整数形式，用于网段/区间查询（保存时自动计算）
+    ip_int = models.BigIntegerField(null=True, blank=True, db_index=True, verbose_name='IP数值')
+    # 地点（保存时根据IP和名称识别，见 locations.get_location）
+    location = models.CharField(max_length=20, blank=True, default='', verbose_name='地点')
+    # requirement_data 常用键的生成列（见 REQUIREMENT_DATA_COLUMNS），支持按需求数据字段走索引筛选和排序
+    data_device_type = _requirement_data_column('设备类型', '设备类型')
+    data_manufacturer = _requirement_data_column('品牌(厂商)', '品牌(厂商)')
+    data_group = _requirement_data_column('分组', '分组')
+    data_deploy_location = _requirement_data_column('部署位置', '部署位置')
 
     class Meta:
         verbose_name = 'UCM需求登记'
         verbose_name_plural = 'UCM需求登记'
         indexes = [
-            models.Index(fields=['ucm_change_date']),
             models.Index(fields=['submitter']),
-            models.Index(fields=['status']),
             models.Index(fields=['device_name']),
             models.Index(fields=['ip']),
             models.Index(fields=['requirement_type']),
+            # 重复检查（check_duplicates / batch_submit）：日期+状态+类型+名称/IP
+            models.Index(fields=['ucm_change_date', 'status', 'requirement_type', 'device_name'], name='ucm_req_dup_name_idx'),
+            models.Index(fields=['ucm_change_date', 'status', 'requirement_type', 'ip'], name='ucm_req_dup_ip_idx'),
+            # 日期统计（date_statistics / list_dates）：日期+类型+状态
+            models.Index(fields=['ucm_change_date', 'requirement_type', 'status'], name='ucm_req_date_stats_idx'),
+            # 需求列表：状态筛选+登记时间排序
+            models.Index(fields=['status', 'submit_time'], name='ucm_req_status_time_idx'),
+            models.Index(fields=['ucm_change_date', 'status', 'lease_expires_at']),
+            models.Index(fields=['submit_time', 'id']),
+            # 按地点筛选（需求列表、批量操作、导出）
+            models.Index(fields=['location', 'ucm_change_date'], name='ucm_req_location_idx'),
+            models.Index(fields=['data_device_type'], name='ucm_req_data_type_idx'),
+            models.Index(fields=['data_manufacturer'], name='ucm_req_data_mfr_idx'),
+            models.Index(fields=['data_group'], name='ucm_req_data_group_idx'),
+            models.Index(fields=['data_deploy_location'], name='ucm_req_data_loc_idx'),
         ]
 
     def __str__(self):
         return f"{self.get_requirement_type_display()}-{self.device_name}({self.ip})-{self.ucm_change_date}"
 
+    def save(self, *args, **kwargs):
+        self.ip_int = ip_to_int(self.ip)
+        self.location = self.compute_location()
+        updating = not self._state.adding
+        if updating:
+            # 在数据库中原子递增修订号，保存后重新读取
+            self.revision = models.F('revision') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'ip' in update_fields:
+                update_fields.add('ip_int')
+            if update_fields & {'requirement_data', 'requirement_type'}:
+                update_fields.add('location')
+            if updating:
+                update_fields.add('revision')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        if updating:
+            self.refresh_from_db(fields=['revision'])
+
+    def compute_location(self):
+        """根据需求数据识别地点"""
+        return get_location(self.get_requirement_data_dict(), self.requirement_type)
+
     def get_requirement_data_dict(self):
-        """将JSON字符串转换为字典"""
-        try:
-            return json.loads(self.requirement_data)
-        except:
-            return {}
+        """返回需求数据字典（JSON字段已由数据库驱动解析）"""
+        return self.requirement_data if isinstance(self.requirement_data, dict) else {}
 
     def set_requirement_data(self, data_dict):
-        """将字典转换为JSON字符串"""
-        self.requirement_data = json.dumps(data_dict, ensure_ascii=False)
+        """设置需求数据字典"""
+        self.requirement_data = data_dict
+
+
+class UCMRequirementArchive(models.Model):
+    """UCM需求归档表（已处理的历史需求，由 archive_requirements 命令从需求登记表迁入）"""
+    original_id = models.BigIntegerField(unique=True, verbose_name='原需求ID')
+    requirement_type = models.CharField(max_length=10, choices=UCMRequirement.REQUIREMENT_TYPES, verbose_name='需求类型')
+    ucm_change_date = models.DateField(verbose_name='UCM变更日期')
+    submitter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_requirements', verbose_name='登记人')
+    submit_time = models.DateTimeField(verbose_name='登记时间')
+    status = models.CharField(max_length=10, choices=UCMRequirement.STATUS_CHOICES, verbose_name='状态')
+    processor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_processed_requirements', verbose_name='处理人')
+    process_time = models.DateTimeField(null=True, blank=True, verbose_name='处理时间')
+    requirement_data = models.JSONField(default=dict, verbose_name='需求数据(JSON)')
+    note = models.TextField(blank=True, null=True, verbose_name='备注')
+    device_name = models.CharField(max_length=200, verbose_name='名称')
+    ip = models.CharField(max_length=50, verbose_name='IP')
+    ip_int = models.BigIntegerField(null=True, blank=True, db_index=True, verbose_name='IP数值')
+    location = models.CharField(max_length=20, blank=True, default='', verbose_name='地点')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='归档时间')
+
+    class Meta:
+        verbose_name = 'UCM需求归档'
+        verbose_name_plural = 'UCM需求归档'
+        indexes = [
+            models.Index(fields=['ucm_change_date', 'requirement_type']),
+            models.Index(fields=['device_name']),
+            models.Index(fields=['ip']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_requirement_type_display()}-{self.device_name}({self.ip})-{self.ucm_change_date}"
+
+    def get_requirement_data_dict(self):
+        """返回需求数据字典"""
+        return self.requirement_data if isinstance(self.requirement_data, dict) else {}
+
+    @classmethod
+    def from_requirement(cls, requirement):
+        """根据需求记录创建归档记录"""
+        return cls(
+            original_id=requirement.id,
+            requirement_type=requirement.requirement_type,
+            ucm_change_date=requirement.ucm_change_date,
+            submitter_id=requirement.submitter_id,
+            submit_time=requirement.submit_time,
+            status=requirement.status,
+            processor_id=requirement.processor_id,
+            process_time=requirement.process_time,
+            requirement_data=requirement.requirement_data,
+            note=requirement.note,
+            device_name=requirement.device_name,
+            ip=requirement.ip,
+            ip_int=requirement.ip_int,
+            location=requirement.location,
+        )
 
 
 class TemplateConfig(models.Model):
@@ -164,7 +304,19 @@ class TemplateConfig(models.Model):
 
 
 class UCMDateConfig(models.Model):
-    """UCM日期限制配置表"""
+    """
+    UCM日期限制配置表（单例，固定 id=1）
+
+    通过 get_solo() 读取：进程内缓存，按表版本号校验（任一进程修改配置后立即失效）；
+    不支持表版本号的数据库缓存 settings.UCM_DATE_CONFIG_CACHE_SECONDS 秒，
+    本进程保存或删除配置时立即失效。
+    """
+    SINGLETON_ID = 1
+
+    # 进程内缓存：(配置, 缓存时间, 表版本号)
+    _solo_cache = None
+    _solo_lock = threading.Lock()
+
     wednesday_deadline_hours = models.IntegerField(
         default=7,
         verbose_name='周三截止提前小时数'
@@ -181,4 +333,165 @@ class UCMDateConfig(models.Model):
         verbose_name_plural = 'UCM日期配置'
 
     def __str__(self):
-        return f"UCM日期配置 (周三提前{self.wednesday_deadline_hours}小时, 周六提前{self.saturday_deadline_hours}小时)"
\ No newline at end of file
+        return f"UCM日期配置 (周三提前{self.wednesday_deadline_hours}小时, 周六提前{self.saturday_deadline_hours}小时)"
+
+    def save(self, *args, **kwargs):
+        # 只允许存在一条配置；新实例覆盖已有记录时按更新处理，需自行补齐创建时间
+        self.pk = self.SINGLETON_ID
+        if self.created_at is None:
+            self.created_at = timezone.now()
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def get_solo(cls, table_versions=None):
+        """
+        获取配置（不存在时按默认值创建；命中缓存时只读取表版本号）
+
+        Args:
+            table_versions: 调用方已读取的表版本号（get_table_versions 的结果，可包含其他表），
+                传入时不再重复读取
+        """
+        from django.conf import settings
+
+        # 先读版本号再读配置，读取期间的修改只会导致下次多读一次
+        if table_versions is None:
+            versions = get_table_versions([cls])
+        else:
+            versions = [row for row in table_versions if row[0] == cls._meta.db_table]
+        cached = cls._solo_cache
+        if cached is not None:
+            if versions is not None:
+                if cached[2] == versions:
+                    return cached[0]
+            elif time.monotonic() - cached[1] < getattr(settings, 'UCM_DATE_CONFIG_CACHE_SECONDS', 60):
+                return cached[0]
+
+        with cls._solo_lock:
+            # get_or_create 在并发插入主键冲突时会重新读取，固定主键保证只有一条记录
+            config, _ = cls.objects.get_or_create(pk=cls.SINGLETON_ID)
+            cls._solo_cache = (config, time.monotonic(), versions)
+        return config
+
+    @classmethod
+    def clear_solo_cache(cls, **kwargs):
+        """post_save / post_delete 信号处理：清除进程内缓存"""
+        cls._solo_cache = None
+
+
+class ChangeDateOverride(models.Model):
+    """UCM变更日期调整表（节假日停止变更、临时加开变更日、单独指定截止时间）"""
+    OVERRIDE_TYPES = [
+        ('blackout', '停止变更'),
+        ('extra', '临时加开'),
+    ]
+
+    date = models.DateField(unique=True, verbose_name='日期')
+    override_type = models.CharField(max_length=10, choices=OVERRIDE_TYPES, default='blackout', verbose_name='调整类型')
+    deadline = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='登记截止时间',
+        help_text='为空时按周三/周六截止配置计算'
+    )
+    reason = models.CharField(max_length=200, blank=True, default='', verbose_name='原因')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = 'UCM变更日期调整'
+        verbose_name_plural = 'UCM变更日期调整'
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.get_override_type_display()}"
+
+
+class LocationRule(models.Model):
+    """需求地点识别规则（见 locations.py）"""
+    RULE_TYPES = [
+        (RULE_CIDR, 'IP网段'),
+        (RULE_NAME_PREFIX, '名称前缀'),
+    ]
+
+    rule_type = models.CharField(max_length=20, choices=RULE_TYPES, verbose_name='规则类型')
+    pattern = models.CharField(
+        max_length=100,
+        verbose_name='规则内容',
+        help_text='IP网段如 84.0.0.0/8；名称前缀如 NF，不区分大小写'
+    )
+    location = models.CharField(
+        max_length=20,
+        choices=[(location, location) for location in LOCATIONS],
+        verbose_name='地点'
+    )
+    priority = models.IntegerField(
+        default=0,
+        verbose_name='优先级',
+        help_text='同时命中多条规则时数值大的优先，相同时前缀更长的优先'
+    )
+    enabled = models.BooleanField(default=True, verbose_name='启用')
+    note = models.CharField(max_length=200, blank=True, default='', verbose_name='备注')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = 'UCM地点规则'
+        verbose_name_plural = 'UCM地点规则'
+        ordering = ['-priority', 'rule_type', 'pattern']
+        constraints = [
+            models.UniqueConstraint(fields=['rule_type', 'pattern'], name='ucm_location_rule_pattern_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_rule_type_display()} {self.pattern} -> {self.location}"
+
+    def clean(self):
+        try:
+            self.pattern = normalize_rule_pattern(self.rule_type, self.pattern)
+        except ValueError as e:
+            raise ValidationError({'pattern': str(e)})
+
+    def save(self, *args, **kwargs):
+        # 保存前规范化，保证唯一约束和前缀树使用同一写法
+        self.pattern = normalize_rule_pattern(self.rule_type, self.pattern)
+        super().save(*args, **kwargs)
+
+
+class RequirementDateStat(models.Model):
+    """
+    需求按日期统计汇总表（含已归档需求）
+
+    由数据库触发器在需求表、归档表增删改时增量维护，可用 rebuild_requirement_stats 命令重建。
+    """
+    ucm_change_date = models.DateField(verbose_name='UCM变更日期')
+    requirement_type = models.CharField(max_length=10, choices=UCMRequirement.REQUIREMENT_TYPES, verbose_name='需求类型')
+    status = models.CharField(max_length=10, choices=UCMRequirement.STATUS_CHOICES, verbose_name='状态')
+    location = models.CharField(max_length=20, blank=True, default='', verbose_name='地点')
+    count = models.PositiveIntegerField(default=0, verbose_name='需求数')
+
+    class Meta:
+        verbose_name = '需求日期统计'
+        verbose_name_plural = '需求日期统计'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ucm_change_date', 'requirement_type', 'status', 'location'],
+                name='ucm_req_date_stat_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ucm_change_date} {self.requirement_type}/{self.status}/{self.location}: {self.count}"
+
+
+class TableVersion(models.Model):
+    """数据表版本号，由数据库触发器在增删改时递增，用于生成条件请求的 ETag"""
+    table_name = models.CharField(max_length=100, unique=True, verbose_name='表名')
+    version = models.BigIntegerField(default=0, verbose_name='版本号')
+    updated_at = models.DateTimeField(null=True, blank=True, verbose_name='最后修改时间')
+
+    class Meta:
+        verbose_name = '数据表版本'
+        verbose_name_plural = '数据表版本'
+
+    def __str__(self):
+        return f"{self.table_name} v{self.version}"
@@ -0,0 +1,45 @@
+"""
+分页
+需求列表默认使用页码分页；数据量大时可用 ?pagination=cursor 切换为基于
+(submit_time, id) 的游标分页，翻页代价不随页数增长，也不再每页执行 COUNT(*)。
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.pagination import CursorPagination
+
+
+class RequirementCursorPagination(CursorPagination):
+    """需求列表游标分页（按登记时间倒序，ID 保证顺序稳定）"""
+    ordering = ('-submit_time', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # 可选返回总数：?with_count=true，结果按筛选条件短时间缓存
+        self.total_count = None
+        if request.query_params.get('with_count') in ('1', 'true'):
+            self.total_count = self.get_cached_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_cached_count(self, queryset):
+        """获取查询结果总数，按SQL缓存 UCM_LIST_COUNT_CACHE_SECONDS 秒"""
+        sql_hash = hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+        cache_key = f'ucm:list_count:{queryset.model._meta.label_lower}:{sql_hash}'
+        count = cache.get(cache_key)
+        if count is None:
+            count = queryset.count()
+            cache.set(cache_key, count, getattr(settings, 'UCM_LIST_COUNT_CACHE_SECONDS', 30))
+        return count
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.total_count is not None:
+            response.data['count'] = self.total_count
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
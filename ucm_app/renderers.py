@@ -0,0 +1,57 @@
+"""
+JSON 渲染与解析
+优先使用 orjson（序列化和解析速度是标准库 json 的数倍），未安装时回退为 DRF 默认实现；
+两种实现都直接输出中文，不转义为 \\uXXXX。
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+# orjson 不支持的类型（懒翻译字符串、Decimal、QuerySet 等）交给 DRF 的编码器处理
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _fallback_encoder.default(obj)
+
+
+class UCMJSONRenderer(JSONRenderer):
+    """使用 orjson 的 JSON 渲染器，需要缩进输出时回退为标准库实现"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+        )
+        # 与 DRF 一致，转义 U+2028/U+2029，输出可直接嵌入 JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class UCMJSONParser(JSONParser):
+    """使用 orjson 的 JSON 解析器，请求体不是 UTF-8 编码时回退为标准库实现"""
+    renderer_class = UCMJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8').lower().replace('_', '-')
+        if orjson is None or encoding not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
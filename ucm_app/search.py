@@ -0,0 +1,205 @@
+"""
+全文检索
+SQLite 下为需求表和设备清单表各维护一张 FTS5（trigram 分词）影子表，由触发器在
+插入、更新、删除时同步，搜索走全文索引并按相关度排序，不再对整表做 LIKE '%x%' 扫描。
+
+影子表和触发器在每次 migrate 后检查并自动补建（表结构变更重建数据表时 SQLite
+会丢弃原表上的触发器），也可以手动执行 rebuild_search_index 命令重建。
+非 SQLite 数据库或搜索词过短（trigram 至少需要3个字符）时回退为 icontains 查询。
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# trigram 分词要求每个搜索词至少3个字符
+MIN_TERM_LENGTH = 3
+
+# 参与全文检索的 requirement_data 字段（JSON 路径中的键按 Django JSONField 的存储方式转义）
+REQUIREMENT_DATA_KEYS = ['设备类型', '品牌(厂商)', '版本', '分组', '部署位置', '老指标', '新指标', '设备ip']
+
+# 全文索引定义：影子表名 -> 源表、触发更新的源列、索引列（列名: 取值表达式，row 为触发器中的 new/old）
+SEARCH_INDEXES = {
+    'ucm_app_requirement_fts': {
+        'source_table': 'ucm_app_ucmrequirement',
+        'watch_columns': ['device_name', 'ip', 'requirement_data'],
+        'columns': {
+            'device_name': "{row}.device_name",
+            'ip': "{row}.ip",
+            'detail': " || ' ' || ".join(
+                f"COALESCE(json_extract({{row}}.requirement_data, '$.{json.dumps(key)}'), '')"
+                for key in REQUIREMENT_DATA_KEYS
+            ),
+        },
+    },
+    'ucm_app_device_fts': {
+        'source_table': 'ucm_app_ucmdeviceinventory',
+        'watch_columns': ['name', 'ip', 'other_ips', 'device_type', 'manufacturer', 'version', 'location', '"group"'],
+        'columns': {
+            'name': "{row}.name",
+            'ip': "{row}.ip",
+            'other_ips': "COALESCE({row}.other_ips, '')",
+            'detail': "{row}.device_type || ' ' || {row}.manufacturer || ' ' || {row}.version"
+                      " || ' ' || COALESCE({row}.location, '') || ' ' || COALESCE({row}.\"group\", '')",
+        },
+    },
+}
+
+
+def is_search_index_supported(conn=None):
+    """当前数据库是否支持全文索引（SQLite 且开启）"""
+    conn = conn or connection
+    return conn.vendor == 'sqlite' and getattr(settings, 'UCM_FULLTEXT_SEARCH', True)
+
+
+def _value_expressions(columns, row):
+    return ', '.join(expression.format(row=row) for expression in columns.values())
+
+
+def _trigger_statements(fts_table, definition):
+    """生成同步触发器的建表语句"""
+    source = definition['source_table']
+    columns = definition['columns']
+    column_list = ', '.join(columns)
+    insert_new = (
+        f"INSERT INTO {fts_table}(rowid, {column_list}) "
+        f"VALUES (new.id, {_value_expressions(columns, 'new')});"
+    )
+    return {
+        f'{fts_table}_ai': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} "
+            f"BEGIN {insert_new} END"
+        ),
+        f'{fts_table}_ad': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} "
+            f"BEGIN DELETE FROM {fts_table} WHERE rowid = old.id; END"
+        ),
+        f'{fts_table}_au': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au "
+            f"AFTER UPDATE OF {', '.join(definition['watch_columns'])} ON {source} "
+            f"BEGIN DELETE FROM {fts_table} WHERE rowid = old.id; {insert_new} END"
+        ),
+    }
+
+
+def rebuild_search_index(conn=None, fts_tables=None):
+    """清空并从源表重新填充全文索引"""
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        for fts_table, definition in SEARCH_INDEXES.items():
+            if fts_tables is not None and fts_table not in fts_tables:
+                continue
+            columns = definition['columns']
+            cursor.execute(f"DELETE FROM {fts_table}")
+            cursor.execute(
+                f"INSERT INTO {fts_table}(rowid, {', '.join(columns)}) "
+                f"SELECT id, {_value_expressions(columns, definition['source_table'])} "
+                f"FROM {definition['source_table']}"
+            )
+
+
+def install_search_index(conn=None):
+    """
+    创建缺失的全文索引影子表和触发器，新建或补建过的索引会从源表重建内容
+
+    Returns:
+        重建过的影子表列表
+    """
+    conn = conn or connection
+    if not is_search_index_supported(conn):
+        return []
+
+    existing_tables = set(conn.introspection.table_names())
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+
+    rebuilt = []
+    with conn.cursor() as cursor:
+        for fts_table, definition in SEARCH_INDEXES.items():
+            if definition['source_table'] not in existing_tables:
+                continue
+
+            triggers = _trigger_statements(fts_table, definition)
+            if fts_table in existing_tables and existing_triggers.issuperset(triggers):
+                continue
+
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} "
+                    f"USING fts5({', '.join(definition['columns'])}, tokenize='trigram')"
+                )
+            except OperationalError as e:
+                # SQLite 未编译 FTS5 或版本过低（trigram 需要 3.34+），搜索回退为 icontains
+                logger.warning(f"无法创建全文索引 {fts_table}: {e}")
+                continue
+            for statement in triggers.values():
+                cursor.execute(statement)
+            rebuilt.append(fts_table)
+
+    if rebuilt:
+        rebuild_search_index(conn, rebuilt)
+        logger.info(f"全文索引已重建: {', '.join(rebuilt)}")
+    return rebuilt
+
+
+def install_search_index_after_migrate(sender, using='default', **kwargs):
+    """post_migrate 信号处理：迁移后补建全文索引"""
+    from django.db import connections
+    install_search_index(connections[using])
+
+
+# 已确认存在的影子表（进程内缓存，避免每次搜索都查询表结构）
+_available_indexes = set()
+
+
+def _is_index_available(fts_table):
+    """影子表是否已创建"""
+    if fts_table not in _available_indexes:
+        if fts_table not in connection.introspection.table_names():
+            return False
+        _available_indexes.add(fts_table)
+    return True
+
+
+def _build_match_query(term):
+    """把用户输入转换为 FTS5 MATCH 表达式（各词以 AND 组合），词过短时返回 None"""
+    words = term.split()
+    if not words or any(len(word) < MIN_TERM_LENGTH for word in words):
+        return None
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def apply_search(queryset, term, fts_table, fallback_fields):
+    """
+    对查询集应用全文检索
+
+    支持全文索引时按相关度注解 search_rank（越小越相关），否则回退为 icontains 查询。
+
+    Returns:
+        (queryset, ranked): ranked 表示是否已注解 search_rank
+    """
+    match_query = None
+    if is_search_index_supported() and _is_index_available(fts_table):
+        match_query = _build_match_query(term)
+    if match_query is None:
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition), False
+
+    source_table = queryset.model._meta.db_table
+    queryset = queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s", [match_query])
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT rank FROM {fts_table} WHERE {fts_table} MATCH %s AND rowid = {source_table}.id",
+            [match_query]
+        )
+    )
+    return queryset, True
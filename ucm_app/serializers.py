@@ -1,9 +1,39 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .models import (
     ManufacturerVersionInfo, ColumnOptions, UCMDeviceInventory,
-    UCMRequirement, TemplateConfig
+    UCMRequirement, UCMRequirementArchive, TemplateConfig, ChangeDateOverride,
+    LocationRule
 )
+from .change_calendar import get_change_calendar
+from .locations import normalize_rule_pattern
+
+
+def parse_field_list(value):
+    """解析逗号分隔的字段列表参数"""
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    按查询参数裁剪输出字段（仅对 GET 请求生效）
+
+    ?fields=id,status 只返回指定字段，?exclude=note 去掉指定字段；
+    被裁掉的字段直接从 fields 中移除，不会再取值或转换（如解析 JSON）。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        only = parse_field_list(request.query_params.get('fields'))
+        exclude = parse_field_list(request.query_params.get('exclude'))
+        for name in list(self.fields):
+            if (only and name not in only) or name in exclude:
+                self.fields.pop(name)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -12,7 +42,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'is_staff']
 
 
-class ManufacturerVersionInfoSerializer(serializers.ModelSerializer):
+class ManufacturerVersionInfoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ManufacturerVersionInfo
         fields = '__all__'
@@ -24,13 +54,13 @@ class ColumnOptionsSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UCMDeviceInventorySerializer(serializers.ModelSerializer):
+class UCMDeviceInventorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = UCMDeviceInventory
         fields = '__all__'
 
 
-class UCMRequirementSerializer(serializers.ModelSerializer):
+class UCMRequirementSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     submitter_name = serializers.CharField(source='submitter.username', read_only=True)
     processor_name = serializers.CharField(source='processor.username', read_only=True, allow_null=True)
     requirement_data_dict = serializers.SerializerMethodField()
@@ -38,6 +68,46 @@ class UCMRequirementSerializer(serializers.ModelSerializer):
     class Meta:
         model = UCMRequirement
         fields = '__all__'
+        # 地点、IP数值在保存时根据需求数据计算；修订号保存时自动递增，用作乐观锁标识不允许客户端修改；
+        # 租约只能通过 claim / release 接口变更
+        read_only_fields = ['location', 'ip_int', 'revision', 'lease_owner', 'lease_expires_at']
+
+    def get_requirement_data_dict(self, obj):
+        """返回解析后的 requirement_data 字典"""
+        return obj.get_requirement_data_dict()
+
+    def validate_ucm_change_date(self, value):
+        # 新建需求或修改变更日期时校验登记截止时间
+        if self.instance is not None and self.instance.ucm_change_date == value:
+            return value
+        now = timezone.now()
+        error = get_change_calendar(now.date()).check_deadline(value, now)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
+
+class UCMRequirementListSerializer(UCMRequirementSerializer):
+    """需求列表精简序列化器：不返回原始 requirement_data（前端只用解析后的 requirement_data_dict）及内部字段"""
+
+    class Meta:
+        model = UCMRequirement
+        fields = [
+            'id', 'requirement_type', 'ucm_change_date', 'device_name', 'ip', 'location', 'status',
+            'submitter', 'submitter_name', 'submit_time',
+            'processor', 'processor_name', 'process_time',
+            'note', 'revision', 'requirement_data_dict',
+        ]
+
+
+class UCMRequirementArchiveSerializer(serializers.ModelSerializer):
+    submitter_name = serializers.CharField(source='submitter.username', read_only=True)
+    processor_name = serializers.CharField(source='processor.username', read_only=True, allow_null=True)
+    requirement_data_dict = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UCMRequirementArchive
+        fields = '__all__'
 
     def get_requirement_data_dict(self, obj):
         """返回解析后的 requirement_data 字典"""
@@ -54,3 +124,36 @@ class TemplateConfigSerializer(serializers.ModelSerializer):
         # 添加解析后的列定义
         data['get_column_definitions'] = instance.get_column_definitions()
         return data
+
+
+class ChangeDateOverrideSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChangeDateOverride
+        fields = '__all__'
+
+    def validate(self, attrs):
+        override_type = attrs.get('override_type', getattr(self.instance, 'override_type', 'blackout'))
+        deadline = attrs.get('deadline', getattr(self.instance, 'deadline', None))
+        if override_type == 'blackout' and deadline is not None:
+            raise serializers.ValidationError({'deadline': '停止变更的日期不能设置登记截止时间'})
+        return attrs
+
+
+class LocationRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LocationRule
+        fields = '__all__'
+
+    def validate(self, attrs):
+        rule_type = attrs.get('rule_type', getattr(self.instance, 'rule_type', None))
+        pattern = attrs.get('pattern', getattr(self.instance, 'pattern', None))
+        try:
+            attrs['pattern'] = normalize_rule_pattern(rule_type, pattern)
+        except ValueError as e:
+            raise serializers.ValidationError({'pattern': str(e)})
+        duplicates = LocationRule.objects.filter(rule_type=rule_type, pattern=attrs['pattern'])
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError({'pattern': '相同的规则已存在'})
+        return attrs
@@ -1,3 +1,1489 @@
-from django.test import TestCase
+import gzip
+import json
+import re
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import archive, middleware
+from .analytics import clear_analytics_cache
+from .archive import archive_processed_requirements
+from .change_calendar import ChangeCalendar, get_change_calendar, invalidate_change_calendar
+from .date_stats import rebuild_date_stats
+from .events import RequirementEventBroker, diff_date_stats
+from .ip_utils import ip_to_int
+from .locations import (
+    LocationClassifier, clear_location_classifier_cache, get_location_classifier, recompute_locations
+)
+from .models import (
+    ChangeDateOverride, ColumnOptions, LocationRule, ManufacturerVersionInfo, RequirementDateStat,
+    TemplateConfig, UCMDateConfig, UCMRequirement, UCMRequirementArchive
+)
+from .renderers import UCMJSONRenderer
+from .write_queue import WriteQueue
+
+
+def create_requirement(submitter, **kwargs):
+    """创建测试用需求记录"""
+    index = UCMRequirement.objects.count()
+    data = {
+        'requirement_type': 'import',
+        'ucm_change_date': date(2026, 1, 7),
+        'submitter': submitter,
+        'device_name': f'NF-TEST-{index:03d}',
+        'ip': f'84.1.1.{index % 250}',
+        'requirement_data': {'名称': f'NF-TEST-{index:03d}', 'IP': f'84.1.1.{index % 250}'},
+    }
+    data.update(kwargs)
+    return UCMRequirement.objects.create(**data)
+
+
+@override_settings(UCM_WRITE_QUEUE={
+    'ENABLED': True, 'MAX_BATCH_SIZE': 20, 'BATCH_WINDOW_MS': 200,
+    'MAX_RETRIES': 3, 'RETRY_BACKOFF_MS': 1, 'MAX_BACKOFF_MS': 10,
+})
+class WriteQueueTests(TransactionTestCase):
+    """写队列：合并事务、任务失败互不影响、锁冲突重试（需要真实事务，不能在 TestCase 中测试）"""
+
+    def setUp(self):
+        self.queue = WriteQueue()
+
+    def _create_option(self, value, fail=False):
+        def job():
+            ColumnOptions.objects.create(column_name='测试列', option_value=value)
+            if fail:
+                raise ValueError(value)
+            return value
+        return job
+
+    def _submit_from_threads(self, jobs):
+        """从多个线程同时提交，返回 [(是否成功, 结果或异常)]"""
+        results = [None] * len(jobs)
+        barrier = threading.Barrier(len(jobs))
+
+        def submit(index, job):
+            barrier.wait()
+            try:
+                results[index] = (True, self.queue.submit(job, timeout=10))
+            except Exception as e:
+                results[index] = (False, e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(index, job)) for index, job in enumerate(jobs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_batches_concurrent_jobs(self):
+        results = self._submit_from_threads([self._create_option(f'v{i}') for i in range(8)])
+        self.assertEqual(sorted(value for _, value in results), [f'v{i}' for i in range(8)])
+        self.assertEqual(ColumnOptions.objects.count(), 8)
+
+        stats = self.queue.stats()
+        self.assertEqual(stats['total_jobs'], 8)
+        self.assertLess(stats['batches'], 8)
+        self.assertGreater(stats['max_batch_size'], 1)
+        self.assertEqual(stats['failures'], 0)
+
+    def test_failed_job_rolls_back_only_itself(self):
+        results = self._submit_from_threads([
+            self._create_option('ok1'), self._create_option('bad', fail=True), self._create_option('ok2'),
+        ])
+        self.assertEqual(sorted(ok for ok, _ in results), [False, True, True])
+        failed = next(value for ok, value in results if not ok)
+        self.assertIsInstance(failed, ValueError)
+        self.assertEqual(
+            sorted(ColumnOptions.objects.values_list('option_value', flat=True)), ['ok1', 'ok2']
+        )
+        self.assertEqual(self.queue.stats()['failures'], 1)
+
+    def test_retries_lock_errors(self):
+        attempts = []
+
+        def job():
+            attempts.append(1)
+            ColumnOptions.objects.create(column_name='测试列', option_value=f'try{len(attempts)}')
+            if len(attempts) < 3:
+                raise OperationalError('database is locked')
+            return len(attempts)
+
+        self.assertEqual(self._submit_from_threads([job]), [(True, 3)])
+        # 失败的尝试整批回滚，只保留最后一次写入
+        self.assertEqual(list(ColumnOptions.objects.values_list('option_value', flat=True)), ['try3'])
+        self.assertEqual(self.queue.stats()['retries'], 2)
+
+    def test_gives_up_after_max_retries(self):
+        def job():
+            raise OperationalError('database is locked')
+
+        [(ok, error)] = self._submit_from_threads([job])
+        self.assertFalse(ok)
+        self.assertIsInstance(error, OperationalError)
+        self.assertEqual(self.queue.stats()['retries'], 3)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class BulkOperationTests(TestCase):
+    """按筛选条件批量操作：修订标识冲突、参数校验"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.requirements = [create_requirement(cls.user) for _ in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _bulk_complete(self, **data):
+        data.setdefault('filters', {'ucm_change_date': '2026-01-07'})
+        return self.client.post('/api/requirements/bulk_complete/', data, format='json')
+
+    def test_conflict_after_concurrent_edit(self):
+        token = self._bulk_complete(dry_run=True).json()['revision']
+
+        # 他人修改了备注（不涉及状态），修订标识随之变化
+        requirement = self.requirements[0]
+        response = self.client.patch(f'/api/requirements/{requirement.id}/', {'note': '改期'}, format='json')
+        self.assertEqual(response.json()['revision'], 1)
+
+        response = self._bulk_complete(expected_revision=token)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(UCMRequirement.objects.filter(status='processed').exists())
+
+        response = self._bulk_complete(expected_revision=response.json()['revision'])
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_revision_is_read_only(self):
+        requirement = self.requirements[0]
+        self.client.patch(f'/api/requirements/{requirement.id}/', {'revision': 99, 'ip_int': 1}, format='json')
+        requirement.refresh_from_db()
+        self.assertEqual(requirement.revision, 1)
+        self.assertEqual(requirement.ip_int, ip_to_int(requirement.ip))
+
+    def test_invalid_filters(self):
+        for filters in ({'ucm_change_date': 'notadate'}, {'status': 'done'}, {'end_date': ['2026-01-07']}):
+            response = self._bulk_complete(filters=filters)
+            self.assertEqual(response.status_code, 400, filters)
+            self.assertIn('error', response.json())
+        response = self.client.post('/api/requirements/batch_delete/', {'requirement_ids': ['x']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UCMRequirement.objects.count(), 3)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class ClaimLeaseTests(TestCase):
+    """处理租约：到期释放、他人领取的需求不能被批量完成"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.other = User.objects.create_user('other')
+        cls.requirements = [create_requirement(cls.owner) for _ in range(3)]
+
+    def setUp(self):
+        self.owner_client = APIClient()
+        self.owner_client.force_authenticate(self.owner)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.other)
+
+    def _claim(self, client, count):
+        response = client.post('/api/requirements/claim/', {'ucm_change_date': '2026-01-07', 'count': count},
+                               format='json')
+        return [row['id'] for row in response.json()['results']]
+
+    def test_lease_expiry(self):
+        claimed = self._claim(self.owner_client, 2)
+        self.assertEqual(claimed, [requirement.id for requirement in self.requirements[:2]])
+        self.assertEqual(self._claim(self.other_client, 5), [self.requirements[2].id])
+
+        # 租约到期后可被他人领取
+        UCMRequirement.objects.filter(id=claimed[0]).update(lease_expires_at=datetime.now() - timedelta(seconds=1))
+        self.assertEqual(self._claim(self.other_client, 5), [claimed[0]])
+        self.assertEqual(
+            [row['id'] for row in self.owner_client.get('/api/requirements/my_claims/').json()['results']],
+            [claimed[1]]
+        )
+
+    def test_leased_rows_not_completed_by_others(self):
+        claimed = self._claim(self.owner_client, 1)
+        requirement_ids = [requirement.id for requirement in self.requirements]
+
+        # 客户端不能直接修改租约
+        self.other_client.patch(f'/api/requirements/{claimed[0]}/', {'lease_owner': self.other.id}, format='json')
+        self.assertEqual(UCMRequirement.objects.get(id=claimed[0]).lease_owner, self.owner)
+
+        response = self.other_client.post(f'/api/requirements/{claimed[0]}/mark_as_processed/')
+        self.assertEqual(response.status_code, 409)
+        response = self.other_client.post('/api/requirements/batch_complete/', {'requirement_ids': requirement_ids[:2]},
+                                          format='json')
+        self.assertEqual(response.json(), {'success': True, 'count': 1, 'leased_count': 1})
+        response = self.other_client.post('/api/requirements/bulk_complete/', {
+            'filters': {'ucm_change_date': '2026-01-07'}
+        }, format='json')
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(UCMRequirement.objects.get(id=claimed[0]).status, 'pending')
+
+        # 领取人自己可以完成
+        response = self.owner_client.post('/api/requirements/bulk_complete/', {
+            'filters': {'ucm_change_date': '2026-01-07'}
+        }, format='json')
+        self.assertEqual(response.json()['count'], 1)
+
+
+class ClaimRaceTests(TransactionTestCase):
+    """多个处理人并发领取（经写队列串行化），每条需求只被领取一次"""
+
+    def test_concurrent_claims(self):
+        users = [User.objects.create_user(f'processor{i}') for i in range(5)]
+        submitter = User.objects.create_user('submitter')
+        for _ in range(12):
+            create_requirement(submitter)
+
+        results = {}
+
+        def claim(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                response = client.post('/api/requirements/claim/', {'ucm_change_date': '2026-01-07', 'count': 4},
+                                       format='json')
+                results[user.username] = [row['id'] for row in response.json()['results']]
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=claim, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        claimed = [requirement_id for ids in results.values() for requirement_id in ids]
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(claimed), 12)
+        self.assertEqual(len(set(claimed)), 12)
+        for user in users:
+            self.assertEqual(
+                set(UCMRequirement.objects.filter(lease_owner=user).values_list('id', flat=True)),
+                set(results[user.username])
+            )
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class BatchDuplicateTests(TestCase):
+    """上传数据的文件内重复检测"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        template = TemplateConfig(template_type='import')
+        template.set_column_definitions([
+            {'name': '名称', 'required': True, 'example': ''},
+            {'name': 'IP', 'required': True, 'example': ''},
+        ])
+        template.save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_rows_are_rejected(self):
+        rows = [
+            {'名称': 'NF-01', 'IP': '84.1.1.1'},
+            {'名称': 'NF-02', 'IP': '84.1.1.2'},
+            {'名称': 'NF-01', 'IP': '84.1.1.3'},
+            {'名称': 'NF-03', 'IP': '84.1.1.2'},
+            {'名称': 'NF-01', 'IP': '84.1.1.2'},
+        ]
+        response = self.client.post('/api/requirements/validate_data/', {
+            'requirement_type': 'import', 'excel_data': rows,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['batch_duplicates'], [
+            {'column': '名称', 'value': 'NF-01', 'row_indexes': [0, 2, 4]},
+            {'column': 'IP', 'value': '84.1.1.2', 'row_indexes': [1, 3, 4]},
+        ])
+
+        results = response.data['validation_results']
+        self.assertEqual([result['is_valid'] for result in results], [True, True, False, False, False])
+        self.assertEqual(results[2]['errors'], {'名称': '与第1行重复'})
+        self.assertEqual(results[3]['errors'], {'IP': '与第2行重复'})
+        # 同一行与多行重复时以最先出现的行为准
+        self.assertEqual(results[4]['errors'], {'名称': '与第1行重复'})
+
+    def test_blank_values_are_not_duplicates(self):
+        rows = [{'名称': '', 'IP': ''}, {'名称': ' ', 'IP': ''}]
+        response = self.client.post('/api/requirements/validate_data/', {
+            'requirement_type': 'import', 'excel_data': rows,
+        }, format='json')
+        self.assertEqual(response.data['batch_duplicates'], [])
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementQueryCountTests(TestCase):
+    """需求列表、详情、导出的查询次数不随行数增长"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        processors = [User.objects.create_user(f'processor{i}') for i in range(3)]
+        for i in range(30):
+            create_requirement(
+                User.objects.create_user(f'submitter{i}'),
+                status='processed' if i % 2 else 'pending',
+                processor=processors[i % 3] if i % 2 else None,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count(self):
+        # 表版本号（ETag） + COUNT + 一次带JOIN的分页查询
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/requirements/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_detail_query_count(self):
+        requirement = UCMRequirement.objects.filter(status='processed').first()
+        # 表版本号（ETag） + 一次带JOIN的查询
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/requirements/{requirement.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['processor_name'], requirement.processor.username)
+
+    def test_export_excel_query_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/requirements/export_excel/', {'status': 'processed'})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementCursorPaginationTests(TestCase):
+    """需求列表游标分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        for _ in range(25):
+            create_requirement(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_all_rows_once(self):
+        seen_ids = []
+        response = self.client.get('/api/requirements/', {'pagination': 'cursor', 'page_size': 10})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen_ids.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        expected_ids = list(UCMRequirement.objects.order_by('-submit_time', '-id').values_list('id', flat=True))
+        self.assertEqual(seen_ids, expected_ids)
+
+    def test_cursor_with_count(self):
+        response = self.client.get('/api/requirements/', {'pagination': 'cursor', 'with_count': 'true'})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementSearchTests(TestCase):
+    """需求全文检索"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.router = create_requirement(cls.user, requirement_data={'名称': 'NF-R-01', '设备类型': '核心路由器'})
+        cls.switch = create_requirement(cls.user, requirement_data={'名称': 'NF-S-01', '设备类型': '接入交换机'})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_requirement_data_field(self):
+        response = self.client.get('/api/requirements/', {'search': '路由器'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.router.id])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        UCMRequirement.objects.filter(id=self.switch.id).update(device_name='JD-CORE-99')
+        response = self.client.get('/api/requirements/', {'search': 'CORE-99'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.switch.id])
+
+        UCMRequirement.objects.filter(id=self.switch.id).delete()
+        response = self.client.get('/api/requirements/', {'search': 'CORE-99'})
+        self.assertEqual(response.data['results'], [])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN 仅适用于 SQLite')
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementQueryPlanTests(TestCase):
+    """热点查询的执行计划必须走索引，不允许全表扫描需求表"""
+
+    TABLE = UCMRequirement._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        ManufacturerVersionInfo.objects.create(
+            device_type='路由器', manufacturer='华为', version='V1', auth_method='ssh'
+        )
+        for i in range(30):
+            create_requirement(
+                cls.user,
+                requirement_type=['import', 'delete', 'modify'][i % 3],
+                status='processed' if i % 2 else 'pending',
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _table_selects(self, queries, table):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and f'"{table}"' in query['sql']
+        ]
+
+    def assertNoTableScan(self, queries, expected_index=None, table=TABLE):
+        """
+        对捕获的每条 table 表 SELECT 执行 EXPLAIN QUERY PLAN，出现不带索引的 SCAN 即失败；
+        指定 expected_index 时还要求至少一条查询使用该索引
+        """
+        selects = self._table_selects(queries, table)
+        self.assertTrue(selects, f'没有捕获到 {table} 查询')
+        bare_scan = re.compile(rf'\bSCAN {table}\b(?! USING)')
+        plans = []
+        for sql in selects:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            plans.extend(plan)
+            self.assertFalse(
+                any(bare_scan.search(step) for step in plan),
+                f'查询发生全表扫描:\n{sql}\n' + '\n'.join(plan)
+            )
+        if expected_index:
+            self.assertTrue(
+                any(expected_index in step for step in plans),
+                f'未使用索引 {expected_index}:\n' + '\n'.join(plans)
+            )
+
+    def test_check_duplicates_plan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/requirements/check_duplicates/', {
+                'ucm_change_date': '2026-01-07',
+                'requirement_type': 'import',
+                'requirements': [{'名称': 'NF-TEST-000', 'IP': '84.1.1.0'}, {'名称': 'NF-NEW', 'IP': ''}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScan(ctx.captured_queries, 'ucm_req_dup_name_idx')
+
+    def test_batch_submit_duplicate_plan(self):
+        rows = [
+            {'名称': f'NF-TEST-{i:03d}', 'IP': f'84.1.2.{i}', '设备类型': '路由器', '品牌(厂商)': '华为', '版本': 'V1'}
+            for i in range(3)
+        ]
+        # 在 2026-01-07 的登记截止前提交
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2026, 1, 5, 9, 0)), \
+                CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/requirements/batch_submit/', {
+                'ucm_change_date': '2026-01-07',
+                'requirement_type': 'import',
+                'requirements': rows,
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScan(ctx.captured_queries, 'ucm_req_dup_ip_idx')
+
+    def test_date_statistics_plan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/requirements/date_statistics/', {'date': '2026-01-07'})
+        self.assertEqual(response.status_code, 200)
+        # 统计读取汇总表，不再查询需求表
+        self.assertFalse(self._table_selects(ctx.captured_queries, self.TABLE))
+        self.assertNoTableScan(ctx.captured_queries, table=RequirementDateStat._meta.db_table)
+
+    def test_list_by_status_plan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/requirements/', {'status': 'pending'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScan(ctx.captured_queries, 'ucm_req_status_time_idx')
+
+    def test_list_by_requirement_data_plan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/requirements/', {'data__设备类型': '路由器'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScan(ctx.captured_queries, 'ucm_req_data_type_idx')
+
+    def test_list_by_date_and_type_plan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/requirements/', {
+                'ucm_change_date': '2026-01-07', 'requirement_type': 'import',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertNoTableScan(ctx.captured_queries)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class IpRangeFilterTests(TestCase):
+    """网段/IP区间过滤"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        for ip in ['84.12.1.1', '84.12.200.5', '84.13.0.1', '10.0.0.1', '', 'not-an-ip']:
+            create_requirement(cls.user, ip=ip, status='processed')
+        archive_processed_requirements(older_than_days=0)
+        for ip in ['84.12.1.1', '84.12.200.5', '84.13.0.1', '10.0.0.1', '', 'not-an-ip']:
+            create_requirement(cls.user, ip=ip)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _ips(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['ip'] for row in response.data['results'])
+
+    def test_ip_int_is_maintained(self):
+        self.assertEqual(UCMRequirement.objects.get(ip='84.12.1.1').ip_int, ip_to_int('84.12.1.1'))
+        self.assertIsNone(UCMRequirement.objects.get(ip='not-an-ip').ip_int)
+        requirement = UCMRequirement.objects.get(ip='10.0.0.1')
+        requirement.ip = '10.0.0.2'
+        requirement.save(update_fields=['ip'])
+        requirement.refresh_from_db()
+        self.assertEqual(requirement.ip_int, ip_to_int('10.0.0.2'))
+
+    def test_filters(self):
+        for url in ['/api/requirements/', '/api/requirement-archive/']:
+            with self.subTest(url=url):
+                self.assertEqual(self._ips(url, {'cidr': '84.12.0.0/16'}), ['84.12.1.1', '84.12.200.5'])
+                # 非严格网段按所在网络处理
+                self.assertEqual(self._ips(url, {'cidr': '84.12.1.9/24'}), ['84.12.1.1'])
+                self.assertEqual(
+                    self._ips(url, {'ip_from': '84.12.100.0', 'ip_to': '84.13.255.255'}),
+                    ['84.12.200.5', '84.13.0.1']
+                )
+                self.assertEqual(self._ips(url, {'ip_from': '84.13.0.0'}), ['84.13.0.1'])
+                self.assertEqual(self._ips(url, {'ip_to': '10.255.255.255'}), ['10.0.0.1'])
+
+    def test_invalid_input_returns_400(self):
+        for params in [
+            {'cidr': 'bad'},
+            {'cidr': '84.12.0.0/33'},
+            {'ip_from': 'x'},
+            {'ip_to': '84.12.0.256'},
+            {'ip_from': '84.13.0.0', 'ip_to': '84.12.0.0'},
+        ]:
+            for url in ['/api/requirements/', '/api/requirement-archive/']:
+                with self.subTest(url=url, params=params):
+                    response = self.client.get(url, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('error', response.data)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementSparseFieldsetTests(TestCase):
+    """需求列表精简表示与 ?fields= / ?exclude= 字段裁剪"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.requirement = create_requirement(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_omits_raw_requirement_data(self):
+        row = self.client.get('/api/requirements/').data['results'][0]
+        self.assertNotIn('requirement_data', row)
+        self.assertEqual(row['requirement_data_dict'], self.requirement.requirement_data)
+
+        detail = self.client.get(f'/api/requirements/{self.requirement.id}/').data
+        self.assertIn('requirement_data', detail)
+
+    def test_fields_and_exclude(self):
+        row = self.client.get('/api/requirements/', {'fields': 'id,status'}).data['results'][0]
+        self.assertEqual(set(row), {'id', 'status'})
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/requirements/', {'exclude': 'requirement_data_dict,note'})
+        row = response.data['results'][0]
+        self.assertNotIn('requirement_data_dict', row)
+        self.assertNotIn('note', row)
+        self.assertNotIn('requirement_data', ctx.captured_queries[-1]['sql'])
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False}, UCM_COMPRESS_MIN_SIZE=1024)
+class ResponseEncodingTests(TestCase):
+    """JSON 渲染与响应压缩"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        for _ in range(20):
+            create_requirement(cls.user, requirement_data={'设备类型': '核心路由器'})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_chinese_is_not_escaped(self):
+        response = self.client.get('/api/requirements/')
+        self.assertIn('核心路由器'.encode('utf-8'), response.content)
+
+    def test_large_response_is_gzipped(self):
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.get('/api/requirements/', {'fields': 'id', 'page_size': 1},
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_compressed_without_accept_encoding(self):
+        response = self.client.get('/api/requirements/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_body_matches_uncompressed(self):
+        plain = self.client.get('/api/requirements/')
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    @unittest.skipIf(middleware.brotli is not None, '已安装 brotli')
+    def test_brotli_falls_back_to_gzip(self):
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    @unittest.skipIf(middleware.brotli is None, '未安装 brotli')
+    def test_brotli_preferred(self):
+        plain = self.client.get('/api/requirements/')
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(middleware.brotli.decompress(response.content), plain.content)
+
+    @override_settings(UCM_COMPRESS_MIN_SIZE=10 ** 7)
+    def test_min_size_setting(self):
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weak_etag_after_compression(self):
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_indent_uses_standard_renderer(self):
+        response = self.client.get('/api/requirements/', HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  ', response.content)
+        self.assertEqual(json.loads(response.content), json.loads(self.client.get('/api/requirements/').content))
+
+    def test_renderer_output(self):
+        # orjson 不支持的类型交给 DRF 编码器，输出与 DRF 默认渲染器一致
+        data = {'名称': '核心\u2028路由器', 'date': date(2026, 1, 7), 1: Decimal('1.5')}
+        renderer = UCMJSONRenderer()
+        content = renderer.render(data)
+        self.assertEqual(json.loads(content), json.loads(JSONRenderer().render(data)))
+        self.assertNotIn('\u2028'.encode('utf-8'), content)
+        self.assertEqual(renderer.render(None), b'')
+
+    def test_json_parser(self):
+        requirement = UCMRequirement.objects.first()
+        response = self.client.post('/api/requirements/batch_complete/',
+                                    json.dumps({'requirement_ids': [requirement.id]}, ensure_ascii=False),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+        response = self.client.post('/api/requirements/batch_complete/', '{"requirement_ids": [',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.data['detail'])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', '表版本号触发器仅适用于 SQLite')
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class ConditionalGetTests(TestCase):
+    """读接口的 ETag / 304"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.requirement = create_requirement(cls.user)
+        UCMDateConfig.objects.create()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified_until_table_changes(self):
+        response = self.client.get('/api/requirements/')
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+
+        # 数据未变化时返回 304，只查询一次版本号
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/requirements/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 批量更新不经过模型信号，同样使 ETag 失效
+        UCMRequirement.objects.filter(id=self.requirement.id).update(status='processed')
+        response = self.client.get('/api/requirements/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_query_string(self):
+        first = self.client.get('/api/requirements/', {'status': 'pending'})
+        second = self.client.get('/api/requirements/', {'status': 'processed'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+    def test_deadline_config(self):
+        self.client.get('/api/deadline_config/')
+        response = self.client.get('/api/deadline_config/')
+        self.assertEqual(
+            self.client.get('/api/deadline_config/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+        self.client.put('/api/deadline_config/', {'wednesday_deadline_hours': 8}, format='json')
+        self.assertEqual(
+            self.client.get('/api/deadline_config/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200
+        )
+
+    def test_list_dates_depends_on_date_and_overrides(self):
+        etag = self.client.get('/api/requirements/list_dates/')['ETag']
+        self.assertEqual(self.client.get('/api/requirements/list_dates/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # 日期窗口随当前日期移动
+        later = datetime.now() + timedelta(days=30)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get('/api/requirements/list_dates/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+        ChangeDateOverride.objects.create(date=date.today() + timedelta(days=1), override_type='extra')
+        self.assertEqual(self.client.get('/api/requirements/list_dates/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementDataFilterTests(TestCase):
+    """按 requirement_data 字段过滤和排序"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.router = create_requirement(cls.user, requirement_data={'设备类型': '路由器', '分组': '核心组', '老指标': 'cpu'})
+        cls.switch = create_requirement(cls.user, requirement_data={'设备类型': '交换机', '分组': '接入组'})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _ids(self, params):
+        response = self.client.get('/api/requirements/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_filter_generated_and_plain_keys(self):
+        self.assertEqual(self._ids({'data__设备类型': '路由器'}), [self.router.id])
+        self.assertEqual(self._ids({'data__分组__icontains': '接入'}), [self.switch.id])
+        self.assertEqual(self._ids({'data__老指标': 'cpu'}), [self.router.id])
+
+    def test_legacy_encoded_rows(self):
+        # 由 TextField 转换来的旧数据中文键未转义，按键查询和生成列都取不到
+        legacy = create_requirement(self.user)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {UCMRequirement._meta.db_table} SET requirement_data = %s WHERE id = %s',
+                [json.dumps({'设备类型': '防火墙', '老指标': 'mem'}, ensure_ascii=False), legacy.id]
+            )
+        self.assertEqual(self._ids({'data__设备类型': '防火墙'}), [])
+
+        import_module('ucm_app.migrations.0009_requirement_data_json').reencode_requirement_data(django_apps, None)
+        self.assertEqual(self._ids({'data__设备类型': '防火墙'}), [legacy.id])
+        self.assertEqual(self._ids({'data__老指标': 'mem'}), [legacy.id])
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.data_device_type, '防火墙')
+
+    def test_ordering(self):
+        self.assertEqual(self._ids({'ordering': 'data__设备类型'}), [self.switch.id, self.router.id])
+        self.assertEqual(self._ids({'ordering': '-data__设备类型'}), [self.router.id, self.switch.id])
+        self.assertEqual(self.client.get('/api/requirements/', {'ordering': 'password'}).status_code, 400)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementArchiveTests(TestCase):
+    """已处理历史需求分批归档"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.old_processed = [
+            create_requirement(cls.user, status='processed', ucm_change_date=date(2026, 1, 7))
+            for _ in range(5)
+        ]
+        cls.old_pending = create_requirement(cls.user, ucm_change_date=date(2026, 1, 7))
+        cls.recent_processed = create_requirement(cls.user, status='processed', ucm_change_date=date(2026, 10, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch('django.utils.timezone.now', return_value=datetime(2026, 10, 19, 9, 0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_archives_in_batches(self):
+        with mock.patch('ucm_app.archive._archive_batch', wraps=archive._archive_batch) as archive_batch:
+            self.assertEqual(archive_processed_requirements(older_than_days=180, batch_size=2), 5)
+        self.assertEqual([len(call.args[0]) for call in archive_batch.call_args_list], [2, 2, 1])
+
+        self.assertEqual(
+            sorted(UCMRequirementArchive.objects.values_list('original_id', flat=True)),
+            [requirement.id for requirement in self.old_processed]
+        )
+        self.assertEqual(
+            set(UCMRequirement.objects.values_list('id', flat=True)),
+            {self.old_pending.id, self.recent_processed.id}
+        )
+        archived = UCMRequirementArchive.objects.get(original_id=self.old_processed[0].id)
+        self.assertEqual(archived.device_name, self.old_processed[0].device_name)
+        self.assertEqual(archived.ip_int, self.old_processed[0].ip_int)
+        self.assertEqual(archived.requirement_data, self.old_processed[0].requirement_data)
+
+        # 再次执行无可归档记录
+        self.assertEqual(archive_processed_requirements(older_than_days=180, batch_size=2), 0)
+
+    def test_skips_rows_changed_after_selection(self):
+        # 选出待归档ID后需求被改回待处理，不应被归档
+        ids = [requirement.id for requirement in self.old_processed[:2]]
+        UCMRequirement.objects.filter(id=ids[0]).update(status='pending')
+        self.assertEqual(archive._archive_batch(ids), 1)
+        self.assertTrue(UCMRequirement.objects.filter(id=ids[0]).exists())
+        self.assertFalse(UCMRequirementArchive.objects.filter(original_id=ids[0]).exists())
+
+    def test_archive_api(self):
+        archive_processed_requirements(older_than_days=180)
+        response = self.client.get('/api/requirement-archive/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(self.client.get('/api/requirements/').data['count'], 2)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class DateStatisticsTests(TestCase):
+    """按日期统计需求类型和状态"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        create_requirement(cls.user, ucm_change_date=date(2026, 1, 7))
+        create_requirement(cls.user, ucm_change_date=date(2026, 1, 7), status='processed')
+        create_requirement(cls.user, ucm_change_date=date(2026, 1, 10), requirement_type='delete')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_single_date_uses_one_aggregate_query(self):
+        # 表版本号（ETag） + 一次分组统计
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/requirements/date_statistics/', {'date': '2026-01-07'})
+        self.assertEqual(response.data['statistics']['import'], {'count': 2, 'pending': 1, 'processed': 1})
+        self.assertEqual(response.data['statistics']['delete'], {'count': 0, 'pending': 0, 'processed': 0})
+
+    def test_range(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/requirements/date_statistics_range/', {
+                'start_date': '2026-01-01', 'end_date': '2026-01-31',
+            })
+        statistics = response.data['statistics']
+        self.assertEqual(list(statistics), ['2026-01-07', '2026-01-10'])
+        self.assertEqual(statistics['2026-01-10']['delete'], {'count': 1, 'pending': 1, 'processed': 0})
+
+        response = self.client.get('/api/requirements/date_statistics_range/', {'dates': '2026-01-10,2026-01-14'})
+        self.assertEqual(list(response.data['statistics']), ['2026-01-10'])
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementDateStatTests(TestCase):
+    """日期统计汇总表随需求增删改同步维护"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _summary(self):
+        return {
+            (stat.ucm_change_date, stat.requirement_type, stat.status, stat.location): stat.count
+            for stat in RequirementDateStat.objects.all()
+        }
+
+    def _live_counts(self):
+        counts = {}
+        for model in (UCMRequirement, UCMRequirementArchive):
+            for row in model.objects.values('ucm_change_date', 'requirement_type', 'status', 'location'):
+                key = tuple(row.values())
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def test_summary_follows_all_write_paths(self):
+        first = create_requirement(self.user, requirement_data={'名称': 'NF-01', 'IP': '84.1.1.1'})
+        second = create_requirement(self.user, requirement_data={'名称': 'JD-01', 'IP': '76.1.1.1'})
+        third = create_requirement(self.user, requirement_data={'名称': 'NF-02'}, ucm_change_date=date(2020, 1, 1))
+        self.assertEqual(self._summary()[(date(2026, 1, 7), 'import', 'pending', '外高桥')], 1)
+
+        self.client.post('/api/requirements/batch_complete/', {'requirement_ids': [first.id, third.id]}, format='json')
+        self.assertEqual(self._summary(), self._live_counts())
+
+        archive_processed_requirements(older_than_days=180)
+        self.assertEqual(UCMRequirementArchive.objects.count(), 2)
+        self.assertEqual(self._summary(), self._live_counts())
+
+        self.client.post('/api/requirements/batch_delete/', {'requirement_ids': [second.id]}, format='json')
+        self.assertEqual(self._summary(), self._live_counts())
+        self.assertNotIn((date(2026, 1, 7), 'import', 'pending', '嘉定'), self._summary())
+
+        response = self.client.get('/api/requirements/date_statistics/', {'date': '2026-01-07'})
+        self.assertEqual(response.data['statistics']['import'], {'count': 1, 'pending': 0, 'processed': 1})
+
+    def test_rebuild(self):
+        create_requirement(self.user)
+        RequirementDateStat.objects.all().delete()
+        rebuild_date_stats()
+        self.assertEqual(self._summary(), self._live_counts())
+
+
+class ChangeCalendarTests(TestCase):
+    """变更日历：截止时间、停止变更/临时加开日期、缓存失效"""
+
+    def setUp(self):
+        cache.clear()
+        invalidate_change_calendar()
+        UCMDateConfig.clear_solo_cache()
+        UCMDateConfig.get_solo()
+
+    def test_schedule_with_overrides(self):
+        # 2026-10-19 为周一
+        calendar = ChangeCalendar(date(2026, 10, 19), 7, 31, {
+            date(2026, 10, 21): ('blackout', None),
+            date(2026, 10, 23): ('extra', datetime(2026, 10, 22, 12, 0)),
+        })
+        dates, deadlines = calendar.available_dates(datetime(2026, 10, 19, 9, 0))
+        self.assertEqual(dates[:3], ['2026-10-23', '2026-10-24', '2026-10-28'])
+        self.assertEqual(len(dates), 8)
+        self.assertIn('周五临时UCM变更', deadlines['2026-10-23'])
+        self.assertIn('2026-10-22周四 12:00', deadlines['2026-10-23'])
+        # 周六提前31小时截止：周四 17:00
+        self.assertIn('2026-10-22周四 17:00', deadlines['2026-10-24'])
+
+        # 截止后不再可选
+        dates, _ = calendar.available_dates(datetime(2026, 10, 22, 17, 0))
+        self.assertEqual(dates[0], '2026-10-28')
+
+        # 需求列表范围保留停止变更的日期，周视图标记停止变更
+        self.assertIn(date(2026, 10, 21), calendar.list_window_dates())
+        self.assertTrue(calendar.week_dates(0)[0]['blackout'])
+        self.assertEqual(calendar.week_dates(1)[1]['label'], '2026年10月31日（下周六）')
+
+    def test_cached_until_config_changes(self):
+        # 未缓存时：表版本号（只读一次，配置复用）、配置、调整日期
+        UCMDateConfig.clear_solo_cache()
+        with self.assertNumQueries(3):
+            get_change_calendar()
+        with self.assertNumQueries(0):
+            calendar = get_change_calendar()
+        self.assertEqual(calendar.deadline_hours[2], 7)
+
+        config = UCMDateConfig.objects.get()
+        config.wednesday_deadline_hours = 10
+        config.save()
+        self.assertEqual(get_change_calendar().deadline_hours[2], 10)
+
+        blackout = calendar.this_wednesday
+        ChangeDateOverride.objects.create(date=blackout)
+        self.assertTrue(get_change_calendar().is_blackout(blackout))
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', '表版本号触发器仅适用于 SQLite')
+    def test_cache_follows_table_versions(self):
+        # bulk_create 不发送信号，模拟其他进程修改：重新校验间隔内沿用进程内日程，之后按表版本号重新计算
+        calendar = get_change_calendar()
+        ChangeDateOverride.objects.bulk_create([ChangeDateOverride(date=calendar.this_wednesday)])
+        self.assertFalse(get_change_calendar().is_blackout(calendar.this_wednesday))
+
+        with override_settings(UCM_CHANGE_CALENDAR_RECHECK_SECONDS=0):
+            self.assertTrue(get_change_calendar().is_blackout(calendar.this_wednesday))
+            # 版本号未变时只读取表版本号
+            with self.assertNumQueries(1):
+                get_change_calendar()
+
+    def test_check_deadline(self):
+        calendar = ChangeCalendar(date(2026, 10, 19), 7, 31, {date(2026, 10, 28): ('blackout', None)})
+        now = datetime(2026, 10, 20, 16, 59)
+        self.assertIsNone(calendar.check_deadline(date(2026, 10, 21), now))
+        self.assertIn('2026-10-20周二 17:00', calendar.check_deadline(date(2026, 10, 21), datetime(2026, 10, 20, 17, 0)))
+        self.assertIn('不是UCM变更日', calendar.check_deadline(date(2026, 10, 22), now))
+        self.assertIn('停止变更', calendar.check_deadline(date(2026, 10, 28), now))
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class SubmissionDeadlineTests(TestCase):
+    """提交需求时在服务端校验登记截止时间"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+
+    def setUp(self):
+        cache.clear()
+        invalidate_change_calendar()
+        UCMDateConfig.clear_solo_cache()
+        UCMDateConfig.get_solo()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # 可选范围内最后一个变更日，截止时间一定未到
+        self.open_date = get_change_calendar().upcoming[-1][0]
+
+    def _batch_submit(self, day):
+        return self.client.post('/api/requirements/batch_submit/', {
+            'ucm_change_date': day.strftime('%Y-%m-%d'),
+            'requirement_type': 'import',
+            'requirements': [{'名称': 'NF-NEW', 'IP': '84.9.9.9'}],
+        }, format='json')
+
+    def test_late_submission_rejected_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self._batch_submit(date(2026, 1, 7))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('截止登记', response.json()['error'])
+
+        response = self._batch_submit(self.open_date)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['submitted_count'], 1)
+
+    def test_blackout_and_non_change_dates(self):
+        ChangeDateOverride.objects.create(date=self.open_date)
+        self.assertIn('停止变更', self._batch_submit(self.open_date).json()['error'])
+
+        monday = self.open_date - timedelta(days=self.open_date.weekday())
+        response = self.client.post('/api/requirements/submit_requirement/', {
+            'ucm_change_date': monday.strftime('%Y-%m-%d'),
+            'requirement_type': 'import',
+            'excel_data': [{'名称': 'NF-NEW', 'IP': '84.9.9.9'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('不是UCM变更日', response.json()['error'])
+
+    def test_create_checks_deadline(self):
+        response = self.client.post('/api/requirements/', {
+            'requirement_type': 'import',
+            'ucm_change_date': '2026-01-07',
+            'submitter': self.user.pk,
+            'requirement_data': {'名称': 'NF-NEW', 'IP': '84.9.9.9'},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ucm_change_date', response.json())
+
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class DashboardSummaryTests(TestCase):
+    """首页汇总接口固定查询次数并短时间缓存"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.week = ChangeCalendar(date.today(), 7, 31).week_dates(0)
+        wednesday = date.fromisoformat(cls.week[0]['date'])
+        for i in range(3):
+            create_requirement(cls.user, ucm_change_date=wednesday)
+        create_requirement(cls.user, requirement_type='delete', status='processed', ucm_change_date=wednesday)
+        UCMDateConfig.objects.create()
+
+    def setUp(self):
+        cache.clear()
+        invalidate_change_calendar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_summary(self):
+        get_change_calendar()
+        # 条件请求版本号（同时用作缓存键）、汇总表、设备计数、最近需求
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/requirements/dashboard_summary/')
+        data = response.json()
+        statistics = data['dates'][0]['statistics']
+        self.assertEqual(statistics['import'], {'count': 3, 'pending': 3, 'processed': 0})
+        self.assertEqual(statistics['delete']['processed'], 1)
+        self.assertEqual(data['totals']['count'], 4)
+        self.assertEqual(data['list_dates'], [self.week[0]['date']])
+        self.assertEqual(len(data['recent_requirements']), 4)
+
+        # 缓存命中：只读取一次表版本号
+        with self.assertNumQueries(1):
+            self.client.get('/api/requirements/dashboard_summary/')
+
+        # 数据变化后不再使用缓存
+        create_requirement(self.user, ucm_change_date=date.fromisoformat(self.week[1]['date']))
+        data = self.client.get('/api/requirements/dashboard_summary/').json()
+        self.assertEqual(data['dates'][1]['statistics']['import']['count'], 1)
+
+        self.assertEqual(self.client.get('/api/requirements/dashboard_summary/?week_offset=x').status_code, 400)
+
+    def test_etag_depends_on_calendar_and_date(self):
+        etag = self.client.get('/api/requirements/dashboard_summary/')['ETag']
+        self.assertEqual(
+            self.client.get('/api/requirements/dashboard_summary/', HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        # 本周的变更日改为停止变更
+        ChangeDateOverride.objects.create(date=date.fromisoformat(self.week[0]['date']))
+        response = self.client.get('/api/requirements/dashboard_summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['dates'][0]['blackout'])
+
+        etag = response['ETag']
+        with mock.patch('django.utils.timezone.now', return_value=datetime.now() + timedelta(days=1)):
+            response = self.client.get('/api/requirements/dashboard_summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementAnalyticsTests(TestCase):
+    """趋势统计按周期分组，已结束周期缓存"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+
+    def setUp(self):
+        cache.clear()
+        invalidate_change_calendar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_monthly_volume(self):
+        today = date.today()
+        month_start = today.replace(day=1)
+        create_requirement(self.user, ucm_change_date=date(2026, 1, 7))
+        create_requirement(self.user, ucm_change_date=date(2026, 1, 10), requirement_type='delete')
+        create_requirement(self.user, ucm_change_date=month_start)
+        url = f'/api/requirements/analytics/?period=month&group_by=requirement_type&start_date=2026-01-01&end_date={today}'
+
+        series = self.client.get(url).json()['series']
+        self.assertEqual(series[0]['period'], '2026-01-01')
+        self.assertTrue(series[0]['finished'])
+        self.assertEqual(series[0]['rows'], [
+            {'requirement_type': 'delete', 'total': 1},
+            {'requirement_type': 'import', 'total': 1},
+        ])
+        self.assertFalse(series[-1]['finished'])
+        self.assertEqual(series[-1]['total'], 1)
+
+        # 已结束的周期读缓存，只重新统计未结束的周期
+        create_requirement(self.user, ucm_change_date=month_start)
+        with CaptureQueriesContext(connection) as queries:
+            series = self.client.get(url).json()['series']
+        stat_queries = [query['sql'] for query in queries if 'requirementdatestat' in query['sql']]
+        self.assertEqual(len(stat_queries), 1)
+        self.assertIn(f"BETWEEN '{month_start}'", stat_queries[0])
+        self.assertEqual(series[-1]['total'], 2)
+
+        self.assertEqual(self.client.get(url + '&group_by=foo').status_code, 400)
+
+    def test_delete_and_date_change_refresh(self):
+        old = create_requirement(self.user, ucm_change_date=date(2026, 1, 7))
+        url = (
+            '/api/requirements/analytics/?period=month&group_by=requirement_type'
+            '&start_date=2026-01-01&end_date=2026-01-31'
+        )
+        self.assertEqual(self.client.get(url).json()['series'][0]['total'], 1)
+
+        # 删除已结束周期的需求后清除缓存
+        self.client.post('/api/requirements/batch_delete/', {'requirement_ids': [old.id]}, format='json')
+        self.assertEqual(self.client.get(url).json()['series'][0]['total'], 0)
+
+        # 已结束周期的缓存不过期，只在清除缓存（递增缓存代数）后重新统计
+        create_requirement(self.user, ucm_change_date=date(2026, 1, 8))
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 30 * 86400):
+            self.assertEqual(self.client.get(url).json()['series'][0]['total'], 0)
+            clear_analytics_cache()
+            self.assertEqual(self.client.get(url).json()['series'][0]['total'], 1)
+
+        # 默认范围截止到今天，跨天后 ETag 失效
+        default_url = '/api/requirements/analytics/?period=month&group_by=requirement_type'
+        etag = self.client.get(default_url)['ETag']
+        self.assertEqual(self.client.get(default_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with mock.patch('django.utils.timezone.now', return_value=datetime.now() + timedelta(days=1)):
+            self.assertEqual(self.client.get(default_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class DateConfigSingletonTests(TestCase):
+    """UCMDateConfig 单例：只有一条记录，进程内缓存，按表版本号失效"""
+
+    def setUp(self):
+        UCMDateConfig.clear_solo_cache()
+
+    def test_get_solo(self):
+        UCMDateConfig.get_solo()
+        # 创建记录后表版本号变化，重新读取一次，之后命中缓存只读取表版本号
+        config = UCMDateConfig.get_solo()
+        self.assertEqual(config.pk, UCMDateConfig.SINGLETON_ID)
+        self.assertEqual(config.wednesday_deadline_hours, 7)
+        with self.assertNumQueries(1):
+            self.assertIs(UCMDateConfig.get_solo(), config)
+
+        # 新建实例保存时覆盖同一条记录
+        UCMDateConfig(wednesday_deadline_hours=9, saturday_deadline_hours=30).save()
+        self.assertEqual(UCMDateConfig.objects.count(), 1)
+        self.assertEqual(UCMDateConfig.get_solo().wednesday_deadline_hours, 9)
+
+    def test_put_invalidates_cache(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('operator'))
+        self.assertEqual(client.get('/api/ucm-date-config/').json()['saturday_deadline_hours'], 31)
+        client.put('/api/deadline_config/', {'saturday_deadline_hours': 20}, format='json')
+        self.assertEqual(client.get('/api/ucm-date-config/').json()['saturday_deadline_hours'], 20)
+        self.assertEqual(UCMDateConfig.objects.count(), 1)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', '表版本号触发器仅适用于 SQLite')
+    def test_cache_follows_table_version(self):
+        # update() 不发送信号，模拟其他进程修改配置
+        UCMDateConfig.get_solo()
+        UCMDateConfig.objects.update(wednesday_deadline_hours=12)
+        self.assertEqual(UCMDateConfig.get_solo().wednesday_deadline_hours, 12)
+
+    def test_ttl_without_table_versions(self):
+        with mock.patch('ucm_app.models.get_table_versions', return_value=None):
+            config = UCMDateConfig.get_solo()
+            UCMDateConfig.objects.update(wednesday_deadline_hours=12)
+            with self.assertNumQueries(0):
+                self.assertIs(UCMDateConfig.get_solo(), config)
+            with override_settings(UCM_DATE_CONFIG_CACHE_SECONDS=0):
+                self.assertEqual(UCMDateConfig.get_solo().wednesday_deadline_hours, 12)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementEventTests(TestCase):
+    """需求变更推送：由汇总表前后对比生成事件"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+
+    def test_diff_date_stats(self):
+        day = date(2026, 10, 21)
+        events = diff_date_stats(
+            {(day, 'import'): {'pending': 5, 'processed': 0}},
+            {(day, 'import'): {'pending': 1, 'processed': 3}, (day, 'delete'): {'pending': 2, 'processed': 0}}
+        )
+        self.assertEqual(events, [
+            {'type': 'requirements_changed', 'date': '2026-10-21', 'requirement_type': 'delete',
+             'created': 2, 'processed': 0, 'deleted': 0},
+            {'type': 'requirements_changed', 'date': '2026-10-21', 'requirement_type': 'import',
+             'created': 0, 'processed': 3, 'deleted': 1},
+        ])
+
+    def test_broker_check(self):
+        change_date = date.today()
+        broker = RequirementEventBroker()
+        first = create_requirement(self.user, ucm_change_date=change_date)
+        self.assertEqual(broker._check(), [])
+        # 版本号未变化时只读取版本号
+        with self.assertNumQueries(1):
+            self.assertEqual(broker._check(), [])
+
+        create_requirement(self.user, ucm_change_date=change_date)
+        create_requirement(self.user, ucm_change_date=change_date)
+        self.assertEqual(broker._check()[0]['created'], 2)
+
+        UCMRequirement.objects.filter(pk=first.pk).update(status='processed')
+        self.assertEqual(broker._check(), [{
+            'type': 'requirements_changed', 'date': change_date.strftime('%Y-%m-%d'),
+            'requirement_type': 'import', 'created': 0, 'processed': 1, 'deleted': 0,
+        }])
+
+        UCMRequirement.objects.filter(pk=first.pk).update(note='备注')
+        self.assertEqual(broker._check(), [{'type': 'requirements_updated'}])
+
+    def test_requires_asgi_and_login(self):
+        self.assertEqual(self.client.get('/api/events/requirements/').status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/events/requirements/').status_code, 503)
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class RequirementLocationTests(TestCase):
+    """地点列：登记时计算、按地点筛选、重新计算"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+        cls.nf = create_requirement(cls.user)
+        cls.jd = create_requirement(cls.user, requirement_data={'名称': 'JD-01', 'IP': '76.1.1.1'})
+        cls.branch = create_requirement(cls.user, requirement_data={'名称': 'SH-01', 'IP': '10.1.1.1'})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_filter_by_location(self):
+        self.assertEqual(
+            [self.nf.location, self.jd.location, self.branch.location], ['外高桥', '嘉定', '分行']
+        )
+        results = self.client.get('/api/requirements/?location=嘉定,分行&ordering=location').json()['results']
+        self.assertEqual([row['location'] for row in results], ['分行', '嘉定'])
+
+        response = self.client.post('/api/requirements/bulk_complete/', {
+            'filters': {'ucm_change_date': '2026-01-07', 'location': '外高桥'}
+        }, format='json')
+        self.assertEqual(response.json()['count'], 1)
+        self.nf.refresh_from_db()
+        self.assertEqual(self.nf.status, 'processed')
+
+    def test_recompute_locations(self):
+        UCMRequirement.objects.filter(pk__in=[self.nf.pk, self.jd.pk]).update(location='')
+        self.assertEqual(recompute_locations(batch_size=2), {'UCMRequirement': 2, 'UCMRequirementArchive': 0})
+        self.jd.refresh_from_db()
+        self.assertEqual(self.jd.location, '嘉定')
+        self.assertFalse(RequirementDateStat.objects.filter(location='').exists())
+
+
+class LocationClassifierTests(unittest.TestCase):
+    """地点规则前缀树：优先级、最长前缀"""
+
+    def setUp(self):
+        self.classifier = LocationClassifier([
+            ('cidr', '84.0.0.0/8', '外高桥', 100),
+            ('cidr', '84.12.0.0/16', '嘉定', 100),
+            ('cidr', '10.0.0.0/8', '境外机构', 10),
+            ('name_prefix', 'NF', '外高桥', 50),
+            ('name_prefix', 'NFJ', '嘉定', 50),
+        ])
+
+    def test_classify(self):
+        self.assertEqual(self.classifier.classify('84.1.1.1', 'JD-01'), '外高桥')
+        # 同优先级时网段更小的优先
+        self.assertEqual(self.classifier.classify('84.12.1.1', ''), '嘉定')
+        # 名称规则优先级更高时覆盖 IP 规则
+        self.assertEqual(self.classifier.classify('10.1.1.1', 'nf-01'), '外高桥')
+        self.assertEqual(self.classifier.classify('', 'nfj-01'), '嘉定')
+        self.assertEqual(self.classifier.classify('not-an-ip', 'SH-01'), '分行')
+
+    def test_classify_rows(self):
+        rows = [{'设备ip': '84.12.0.1', '老指标': ''}, {'设备ip': '', '老指标': 'NF-01'}, {}]
+        self.assertEqual(self.classifier.classify_rows(rows, 'modify'), ['嘉定', '外高桥', '分行'])
+
+
+@override_settings(UCM_WRITE_QUEUE={'ENABLED': False})
+class LocationRuleTests(TestCase):
+    """地点规则接口：修改后立即生效，重新计算已有记录"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator')
+
+    def setUp(self):
+        # 测试事务回滚不触发信号，前后都清除编译缓存
+        clear_location_classifier_cache()
+        self.addCleanup(clear_location_classifier_cache)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rule_change_and_recompute(self):
+        requirement = create_requirement(self.user, requirement_data={'名称': 'WG-01', 'IP': '85.1.1.1'})
+        self.assertEqual(requirement.location, '分行')
+
+        response = self.client.post('/api/location-rules/', {
+            'rule_type': 'name_prefix', 'pattern': ' wg ', 'location': '外高桥'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['pattern'], 'WG')
+        response = self.client.post('/api/location-rules/', {
+            'rule_type': 'name_prefix', 'pattern': 'Wg', 'location': '嘉定'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/location-rules/', {
+            'rule_type': 'cidr', 'pattern': '85.1.1.0/33', 'location': '嘉定'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/location-rules/recompute/')
+        self.assertEqual(response.json(), {
+            'table': 'requirement', 'processed': 1, 'updated': 1, 'next': {'table': 'archive', 'after_id': 0}
+        })
+        requirement.refresh_from_db()
+        self.assertEqual(requirement.location, '外高桥')
+
+    def test_recompute_in_chunks(self):
+        LocationRule.objects.create(rule_type='name_prefix', pattern='WG', location='外高桥')
+        requirements = [create_requirement(self.user, requirement_data={'名称': f'WG-{i}'}) for i in range(5)]
+        UCMRequirement.objects.update(location='分行')
+
+        cursor = {'table': 'requirement', 'after_id': 0}
+        responses = []
+        while cursor:
+            response = self.client.post('/api/location-rules/recompute/', {**cursor, 'limit': 2}, format='json')
+            self.assertEqual(response.status_code, 200)
+            responses.append(response.json())
+            cursor = response.json()['next']
+        self.assertEqual([r['processed'] for r in responses], [2, 2, 1, 0])
+        self.assertEqual(responses[1]['next'], {'table': 'requirement', 'after_id': requirements[3].id})
+        self.assertEqual(sum(r['updated'] for r in responses), 5)
+        self.assertFalse(UCMRequirement.objects.exclude(location='外高桥').exists())
+
+        for data in [{'table': 'x'}, {'after_id': 'x'}, {'limit': 0}, {'limit': 10 ** 6}, {'after_id': -1}]:
+            with self.subTest(data=data):
+                response = self.client.post('/api/location-rules/recompute/', data, format='json')
+                self.assertEqual(response.status_code, 400)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', '表版本号触发器仅适用于 SQLite')
+    def test_rules_follow_table_version(self):
+        # bulk_create 不发送信号，模拟其他进程修改规则：表版本号变化后重新编译
+        self.assertEqual(create_requirement(self.user, requirement_data={'名称': 'WG-01'}).location, '分行')
+        LocationRule.objects.bulk_create([LocationRule(rule_type='name_prefix', pattern='WG', location='外高桥')])
+        self.assertEqual(create_requirement(self.user, requirement_data={'名称': 'WG-02'}).location, '外高桥')
+
+        # 规则未变时只读取表版本号
+        classifier = get_location_classifier()
+        with self.assertNumQueries(1):
+            self.assertIs(get_location_classifier(), classifier)
+
+    def test_ttl_without_table_versions(self):
+        with mock.patch('ucm_app.locations.get_table_versions', return_value=None):
+            classifier = get_location_classifier()
+            LocationRule.objects.bulk_create([LocationRule(rule_type='name_prefix', pattern='WG', location='外高桥')])
+            with self.assertNumQueries(0):
+                self.assertIs(get_location_classifier(), classifier)
+            with override_settings(UCM_LOCATION_RULES_CACHE_SECONDS=0):
+                self.assertEqual(get_location_classifier().classify(None, 'WG-01'), '外高桥')
 
-# Create your tests here.
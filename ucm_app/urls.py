@@ -7,7 +7,10 @@ router.register(r'manufacturers', views.ManufacturerVersionInfoViewSet)
 router.register(r'column-options', views.ColumnOptionsViewSet)
 router.register(r'devices', views.UCMDeviceInventoryViewSet)
 router.register(r'requirements', views.UCMRequirementViewSet)
+router.register(r'requirement-archive', views.UCMRequirementArchiveViewSet)
 router.register(r'templates', views.TemplateConfigViewSet)
+router.register(r'change-date-overrides', views.ChangeDateOverrideViewSet)
+router.register(r'location-rules', views.LocationRuleViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -17,6 +20,8 @@ urlpatterns = [
     path('auth/current-user/', views.get_current_user, name='get_current_user'),
     path('ucm-date-config/', views.get_ucm_date_config, name='get_ucm_date_config'),
     path('deadline_config/', views.deadline_config, name='deadline_config'),
+    path('write-queue-stats/', views.write_queue_stats, name='write_queue_stats'),
+    path('events/requirements/', views.requirement_events, name='requirement_events'),
     
     # SSO 单点登录路由
     path('auth/sso/login/', views.sso_login, name='sso_login'),
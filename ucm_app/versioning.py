@@ -0,0 +1,243 @@
+"""
+条件请求（ETag / Last-Modified）
+
+SQLite 下为常用数据表安装触发器，每次插入、更新、删除时递增 ucm_app_tableversion
+中对应表的版本号（批量 update / bulk_create / 原生 SQL 同样生效）。读接口用响应所依赖
+各表的版本号和请求地址生成 ETag，客户端带 If-None-Match / If-Modified-Since 且数据
+未变化时直接返回 304，不再查询和序列化数据。
+
+响应还依赖当前日期等表版本号之外的条件时，通过 extra_key 把这些条件并入 ETag（见
+today_key），此时不返回 Last-Modified，只按 ETag 判断。
+
+触发器与全文索引一样在每次 migrate 后检查并自动补建；非 SQLite 数据库不生成 ETag。
+"""
+import hashlib
+import logging
+from datetime import datetime
+from functools import wraps
+
+from django.db import connection
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = 'ucm_app_tableversion'
+
+# 需要维护版本号的模型（app_label.ModelName）
+VERSIONED_MODELS = [
+    'ucm_app.ManufacturerVersionInfo',
+    'ucm_app.ColumnOptions',
+    'ucm_app.UCMDeviceInventory',
+    'ucm_app.UCMRequirement',
+    'ucm_app.UCMRequirementArchive',
+    'ucm_app.TemplateConfig',
+    'ucm_app.UCMDateConfig',
+    'ucm_app.ChangeDateOverride',
+    'ucm_app.LocationRule',
+]
+
+# 触发器中记录修改时间（USE_TZ=False，按本地时间存储）
+_NOW = "datetime('now', 'localtime')"
+
+
+def is_versioning_supported(conn=None):
+    """当前数据库是否支持表版本号"""
+    return (conn or connection).vendor == 'sqlite'
+
+
+def _versioned_tables():
+    from django.apps import apps
+    return [apps.get_model(label)._meta.db_table for label in VERSIONED_MODELS]
+
+
+def _trigger_statements(table):
+    """生成递增版本号的触发器建表语句"""
+    bump = (
+        f"UPDATE {VERSION_TABLE} SET version = version + 1, updated_at = {_NOW} "
+        f"WHERE table_name = '{table}';"
+    )
+    return {
+        f'{table}_version_{suffix}': (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} "
+            f"BEGIN {bump} END"
+        )
+        for suffix, event in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE'))
+    }
+
+
+def install_version_triggers(conn=None):
+    """
+    补建缺失的版本号记录和触发器
+
+    Returns:
+        补建过触发器的表列表
+    """
+    conn = conn or connection
+    if not is_versioning_supported(conn):
+        return []
+
+    existing_tables = set(conn.introspection.table_names())
+    if VERSION_TABLE not in existing_tables:
+        return []
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+
+    installed = []
+    with conn.cursor() as cursor:
+        for table in _versioned_tables():
+            if table not in existing_tables:
+                continue
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {VERSION_TABLE}(table_name, version, updated_at) "
+                f"VALUES (%s, 0, {_NOW})",
+                [table]
+            )
+            triggers = _trigger_statements(table)
+            if existing_triggers.issuperset(triggers):
+                continue
+            for statement in triggers.values():
+                cursor.execute(statement)
+            # 补建期间的修改无法追踪，递增一次版本号使已有 ETag 失效
+            cursor.execute(
+                f"UPDATE {VERSION_TABLE} SET version = version + 1, updated_at = {_NOW} "
+                f"WHERE table_name = %s",
+                [table]
+            )
+            installed.append(table)
+
+    if installed:
+        logger.info(f"表版本号触发器已安装: {', '.join(installed)}")
+    return installed
+
+
+def install_version_triggers_after_migrate(sender, using='default', **kwargs):
+    """post_migrate 信号处理：迁移后补建版本号触发器"""
+    from django.db import connections
+    install_version_triggers(connections[using])
+
+
+def get_table_versions(models):
+    """
+    读取模型对应表的版本号
+
+    Returns:
+        [(表名, 版本号, 修改时间)]（按表名排序），不支持或未初始化时返回 None
+    """
+    if not is_versioning_supported():
+        return None
+
+    tables = sorted({model._meta.db_table for model in models})
+    placeholders = ', '.join(['%s'] * len(tables))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT table_name, version, updated_at FROM {VERSION_TABLE} "
+            f"WHERE table_name IN ({placeholders}) ORDER BY table_name",
+            tables
+        )
+        rows = cursor.fetchall()
+    if len(rows) != len(tables):
+        # 版本号尚未初始化（未执行 migrate）
+        return None
+    return rows
+
+
+def today_key(request):
+    """extra_key：响应随当前日期变化（如按今天计算的日期范围），跨天后 ETag 失效"""
+    return timezone.now().date().isoformat()
+
+
+def get_validators(request, models, extra_key=None):
+    """
+    根据模型对应表的版本号生成 (etag, last_modified)，不支持时返回 None
+
+    ETag 包含请求路径和查询参数，同一数据的不同筛选、分页、字段裁剪各自独立。
+    extra_key(request) 返回的字符串一并计入 ETag，此时 last_modified 为 None。
+    """
+    rows = get_table_versions(models)
+    if rows is None:
+        return None
+
+    digest = hashlib.md5(usedforsecurity=False)
+    for table_name, version, _ in rows:
+        digest.update(f'{table_name}:{version};'.encode())
+    digest.update(request.get_full_path().encode())
+    if extra_key is not None:
+        digest.update(f';{extra_key(request)}'.encode())
+    etag = quote_etag(digest.hexdigest())
+
+    last_modified = None
+    updated = [row[2] for row in rows if row[2]]
+    if updated and extra_key is None:
+        # 修改时间无法反映额外条件的变化，有 extra_key 时只用 ETag
+        last_modified = int(max(datetime.fromisoformat(str(value)) for value in updated).timestamp())
+    return etag, last_modified
+
+
+def conditional_response(request, models, get_response, extra_key=None):
+    """
+    执行条件请求：数据未变化时返回 304，否则调用 get_response 并附加 ETag / Last-Modified
+
+    计算出的 ETag 同时保存在 request.conditional_etag，视图可直接用作结果缓存键，
+    不必再次读取表版本号（不支持表版本号时不设置）。
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return get_response()
+
+    validators = get_validators(request, models, extra_key)
+    if validators is None:
+        return get_response()
+
+    etag, last_modified = validators
+    request.conditional_etag = etag
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified.headers['ETag'] = etag
+        return not_modified
+
+    response = get_response()
+    if response.status_code == 200:
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        # 允许浏览器缓存，但每次使用前都要向服务器验证
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_get(*models, extra_key=None):
+    """
+    视图函数 / ViewSet action 装饰器：GET 请求按 models 的表版本号支持条件请求
+
+        @action(detail=False, methods=['get'])
+        @conditional_get(UCMRequirement, ChangeDateOverride, UCMDateConfig, extra_key=today_key)
+        def list_dates(self, request): ...
+
+    extra_key(request) 返回响应依赖的其他条件（如当前日期），计入 ETag。
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            # 视图函数第一个参数是 request，ViewSet 方法第一个参数是 self
+            request = args[0] if hasattr(args[0], 'META') else args[1]
+            return conditional_response(request, models, lambda: view_func(*args, **kwargs), extra_key)
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """ViewSet 的 list / retrieve 支持条件请求，etag_models 为响应内容依赖的模型"""
+    etag_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.etag_models, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.etag_models, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -2,11 +2,14 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models import Q, F, Count, Max, Sum
+from django.db.models.fields.json import KT
 from django.utils import timezone
 from django.http import HttpResponse
+import copy
 import json
 import xlrd
 import zipfile
@@ -17,19 +20,35 @@ from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 from .models import (
     ManufacturerVersionInfo, ColumnOptions, UCMDeviceInventory,
-    UCMRequirement, TemplateConfig, UCMDateConfig
+    UCMRequirement, UCMRequirementArchive, TemplateConfig, UCMDateConfig,
+    ChangeDateOverride, LocationRule, REQUIREMENT_DATA_COLUMNS
 )
 from .serializers import (
     UserSerializer, ManufacturerVersionInfoSerializer, ColumnOptionsSerializer,
-    UCMDeviceInventorySerializer, UCMRequirementSerializer, TemplateConfigSerializer
+    UCMDeviceInventorySerializer, UCMRequirementSerializer, UCMRequirementListSerializer,
+    UCMRequirementArchiveSerializer, TemplateConfigSerializer, ChangeDateOverrideSerializer,
+    LocationRuleSerializer, parse_field_list
 )
+from .ip_utils import filter_by_ip_range, ip_to_int
+from .analytics import (
+    DIMENSIONS as ANALYTICS_DIMENSIONS, PERIODS as ANALYTICS_PERIODS, clear_analytics_cache,
+    requirement_volume
+)
+from .change_calendar import get_change_calendar
+from .date_stats import aggregate_date_stats, earliest_change_date
+from .locations import LOCATIONS, RECOMPUTE_TABLES, classify_locations, get_location, recompute_locations_chunk
+from .pagination import RequirementCursorPagination
+from .search import apply_search
+from .versioning import ConditionalGetMixin, conditional_get, today_key
+from .write_queue import submit_write, write_queue
 
 
-class ManufacturerVersionInfoViewSet(viewsets.ModelViewSet):
+class ManufacturerVersionInfoViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """厂商版本信息管理API"""
     queryset = ManufacturerVersionInfo.objects.all()
     serializer_class = ManufacturerVersionInfoSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (ManufacturerVersionInfo,)
     
     def get_queryset(self):
         queryset = ManufacturerVersionInfo.objects.all()
@@ -39,6 +58,7 @@ class ManufacturerVersionInfoViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @conditional_get(ManufacturerVersionInfo)
     def get_manufacturers(self, request):
         """根据设备类型获取品牌(厂商)列表"""
         device_type = request.query_params.get('device_type')
@@ -51,6 +71,7 @@ class ManufacturerVersionInfoViewSet(viewsets.ModelViewSet):
         return Response(list(manufacturers))
     
     @action(detail=False, methods=['get'])
+    @conditional_get(ManufacturerVersionInfo)
     def get_versions(self, request):
         """根据设备类型和品牌(厂商)获取版本列表"""
         device_type = request.query_params.get('device_type')
@@ -66,6 +87,7 @@ class ManufacturerVersionInfoViewSet(viewsets.ModelViewSet):
         return Response(list(versions))
     
     @action(detail=False, methods=['get'])
+    @conditional_get(ManufacturerVersionInfo)
     def get_login_methods(self, request):
         """根据设备类型、品牌(厂商)和版本获取认证方式"""
         device_type = request.query_params.get('device_type')
@@ -83,13 +105,15 @@ class ManufacturerVersionInfoViewSet(viewsets.ModelViewSet):
         return Response(list(login_methods))
 
 
-class ColumnOptionsViewSet(viewsets.ModelViewSet):
+class ColumnOptionsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """列可选值管理API"""
     queryset = ColumnOptions.objects.all()
     serializer_class = ColumnOptionsSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (ColumnOptions,)
     
     @action(detail=False, methods=['get'])
+    @conditional_get(ColumnOptions)
     def get_options_by_column(self, request):
         """根据列名获取可选值"""
         column_name = request.query_params.get('column_name')
@@ -103,11 +127,32 @@ class ColumnOptionsViewSet(viewsets.ModelViewSet):
         return Response(list(options))
 
 
-class UCMDeviceInventoryViewSet(viewsets.ModelViewSet):
+class UCMDeviceInventoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """UCM设备清单管理API"""
     queryset = UCMDeviceInventory.objects.all()
     serializer_class = UCMDeviceInventorySerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (UCMDeviceInventory,)
+
+    def get_queryset(self):
+        queryset = UCMDeviceInventory.objects.all()
+
+        # 网段/IP区间过滤
+        try:
+            queryset = filter_by_ip_range(queryset, self.request.query_params)
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+
+        search = self.request.query_params.get('search')
+        if search:
+            # 全文索引检索（名称、IP、其他IP、类型、厂商、位置等），按相关度排序
+            queryset, ranked = apply_search(
+                queryset, search, 'ucm_app_device_fts',
+                ['name', 'ip', 'other_ips', 'device_type', 'manufacturer', 'location', 'group']
+            )
+            if ranked:
+                return queryset.order_by('search_rank', 'id')
+        return queryset.order_by('id')
     
     @action(detail=False, methods=['post'])
     def upload_inventory(self, request):
@@ -124,12 +169,10 @@ class UCMDeviceInventoryViewSet(viewsets.ModelViewSet):
             # 获取列名（第一行）
             headers = [str(cell.value).strip() for cell in sheet.row(0)]
             
-            # 清空现有数据
-            UCMDeviceInventory.objects.all().delete()
-            
-            # 导入数据
+            # 先在内存中解析全部数据，写库只在写队列中进行
             import_time = timezone.now()
-            success_count = 0
+            devices = []
+            seen_keys = set()
             error_rows = []
             
             for row_idx in range(1, sheet.nrows):
@@ -138,28 +181,40 @@ class UCMDeviceInventoryViewSet(viewsets.ModelViewSet):
                     for col_idx, header in enumerate(headers):
                         if col_idx < sheet.ncols:
                             row_data[header] = str(sheet.cell(row_idx, col_idx).value).strip()
+
+                    # 名称+IP唯一，重复行单独报错，避免整批插入失败
+                    key = (row_data.get('名称', ''), row_data.get('IP', ''))
+                    if key in seen_keys:
+                        raise ValueError(f'名称+IP重复: {key[0]}({key[1]})')
+                    seen_keys.add(key)
                     
                     # 创建设备记录
-                    device = UCMDeviceInventory(
+                    devices.append(UCMDeviceInventory(
                         name=row_data.get('名称', ''),
                         device_type=row_data.get('设备类型', ''),
                         manufacturer=row_data.get('品牌(厂商)', ''),
                         version=row_data.get('版本', ''),
                         ip=row_data.get('IP', ''),
+                        ip_int=ip_to_int(row_data.get('IP', '')),
                         other_ips=row_data.get('其他IP', ''),
                         location=row_data.get('安装位置', ''),
                         group=row_data.get('分组', ''),
                         auth_method=row_data.get('认证方式', ''),
                         import_time=import_time
-                    )
-                    device.save()
-                    success_count += 1
+                    ))
                     
                 except Exception as e:
                     error_rows.append({
                         'row': row_idx + 1,
                         'error': str(e)
                     })
+
+            def write():
+                # 清空现有数据并批量导入（同一事务）
+                UCMDeviceInventory.objects.all().delete()
+                return len(UCMDeviceInventory.objects.bulk_create(devices, batch_size=500))
+
+            success_count = submit_write(write)
             
             return Response({
                 'success': True,
@@ -172,11 +227,33 @@ class UCMDeviceInventoryViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_400_BAD_REQUEST)
 
 
-class UCMRequirementViewSet(viewsets.ModelViewSet):
+class UCMRequirementViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """UCM需求登记管理API"""
     queryset = UCMRequirement.objects.all()
     serializer_class = UCMRequirementSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (UCMRequirement,)
+
+    # 列表支持的排序字段（?ordering=-ucm_change_date,data__设备类型），需求数据字段写作 data__<键>
+    ORDERING_FIELDS = ['submit_time', 'ucm_change_date', 'requirement_type', 'status', 'device_name', 'ip_int', 'location']
+
+    def get_serializer_class(self):
+        # 列表默认使用精简表示
+        if self.action == 'list':
+            return UCMRequirementListSerializer
+        return UCMRequirementSerializer
+
+    @property
+    def paginator(self):
+        """?pagination=cursor 时使用游标分页，否则使用默认页码分页"""
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = RequirementCursorPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
     
     def get_queryset(self):
         # 获取筛选参数
@@ -186,8 +263,8 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
         search = self.request.query_params.get('search')
         submitter = self.request.query_params.get('submitter')
 
-        # 构建查询条件
-        queryset = UCMRequirement.objects.all()
+        # 构建查询条件（一次JOIN取出登记人和处理人，避免逐行查询用户）
+        queryset = UCMRequirement.objects.select_related('submitter', 'processor')
 
         if status_filter:
             queryset = queryset.filter(status=status_filter)
@@ -197,13 +274,77 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(requirement_type=requirement_type)
         if submitter:
             queryset = queryset.filter(submitter__username=submitter)
+        # 地点过滤（?location=外高桥,嘉定）
+        locations = parse_field_list(self.request.query_params.get('location'))
+        if locations:
+            queryset = queryset.filter(location__in=locations)
+        # 网段/IP区间过滤（?cidr=84.12.0.0/16 或 ?ip_from=...&ip_to=...）
+        try:
+            queryset = filter_by_ip_range(queryset, self.request.query_params)
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+        # 需求数据字段过滤（?data__设备类型=路由器 或 ?data__分组__icontains=核心）
+        queryset = self._filter_requirement_data(queryset, self.request.query_params)
+
+        # 输出不包含需求数据时不从数据库读取该 JSON 列
+        if self.action == 'list':
+            output_fields = self.get_serializer().fields
+            if 'requirement_data' not in output_fields and 'requirement_data_dict' not in output_fields:
+                queryset = queryset.defer('requirement_data')
+
+        ranked = False
         if search:
-            queryset = queryset.filter(
-                Q(device_name__icontains=search) | Q(ip__icontains=search)
+            # 全文索引检索（名称、IP及部分需求数据字段），按相关度排序
+            queryset, ranked = apply_search(
+                queryset, search, 'ucm_app_requirement_fts', ['device_name', 'ip']
             )
         
-        # 排序
-        return queryset.order_by('-submit_time')
+        # 排序（默认与游标分页的排序键一致；全文检索时相关度优先；游标分页始终使用自身的排序键）
+        ordering = self._get_list_ordering()
+        if ranked:
+            return queryset.order_by('search_rank', *ordering, '-submit_time', '-id')
+        return queryset.order_by(*ordering, '-submit_time', '-id')
+
+    @staticmethod
+    def _requirement_data_field(param, key):
+        """需求数据键对应的查询字段：常用键使用生成列（有索引），其他键直接查询 JSON"""
+        if not key or '__' in key:
+            raise ValidationError({'error': f'无效的需求数据字段参数: {param}'})
+        return REQUIREMENT_DATA_COLUMNS.get(key, f'requirement_data__{key}')
+
+    def _filter_requirement_data(self, queryset, query_params):
+        """按 data__<键>[__icontains] 参数过滤需求数据字段"""
+        for param, value in query_params.items():
+            if not param.startswith('data__') or value == '':
+                continue
+            key, lookup = param[len('data__'):], 'exact'
+            if key.endswith('__icontains'):
+                key, lookup = key[:-len('__icontains')], 'icontains'
+            field = self._requirement_data_field(param, key)
+            queryset = queryset.filter(**{f'{field}__{lookup}': value})
+        return queryset
+
+    def _get_list_ordering(self):
+        """解析 ?ordering= 参数"""
+        ordering = self.request.query_params.get('ordering')
+        if not ordering:
+            return []
+
+        expressions = []
+        for item in ordering.split(','):
+            name = item.strip().lstrip('-')
+            if name.startswith('data__'):
+                field = self._requirement_data_field(item, name[len('data__'):])
+                expression = KT(field) if field.startswith('requirement_data__') else F(field)
+            elif name in self.ORDERING_FIELDS:
+                expression = F(name)
+            else:
+                raise ValidationError({'error': f'不支持的排序字段: {name}'})
+            if item.strip().startswith('-'):
+                expressions.append(expression.desc(nulls_last=True))
+            else:
+                expressions.append(expression.asc(nulls_last=True))
+        return expressions
     
     @action(detail=False, methods=['post'])
     def upload_excel(self, request):
@@ -231,75 +372,73 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                     if col_idx < sheet.ncols:
                         row_data[header] = str(sheet.cell(row_idx, col_idx).value).strip()
                 data.append(row_data)
+
+            # 解析时一次遍历完成文件内重复检测
+            batch_duplicates, _ = self._find_batch_duplicates(data)
             
             return Response({
                 'headers': headers,
                 'data': data,
-                'total_rows': len(data)
+                'total_rows': len(data),
+                'batch_duplicates': batch_duplicates
             })
             
         except Exception as e:
             return Response({'error': f'文件解析失败: {str(e)}'}, 
                           status=status.HTTP_400_BAD_REQUEST)
     
+    def _check_submission_deadline(self, ucm_change_date):
+        """
+        按变更日历校验登记截止时间（日历有进程内缓存，命中时不查询数据库）
+
+        Returns:
+            不能登记时返回原因，可以登记时返回 None
+        """
+        try:
+            day = datetime.strptime(str(ucm_change_date), '%Y-%m-%d').date()
+        except ValueError:
+            return '日期格式不正确，应为 YYYY-MM-DD'
+        now = timezone.now()
+        return get_change_calendar(now.date()).check_deadline(day, now)
+
+    def _find_batch_duplicates(self, rows):
+        """
+        检测同一批数据内重复的名称/IP（哈希表一次遍历，O(n)）
+
+        Returns:
+            (batch_duplicates, duplicate_rows)
+            batch_duplicates: 按键分组的重复列表，每项包含列名、值和出现的行号（从0开始）
+            duplicate_rows: {行号: 首次出现的行号}，同一键第二次及之后出现的行，应被拒绝
+        """
+        key_columns = ['名称', 'IP']
+        seen = {column: {} for column in key_columns}
+
+        for row_idx, row_data in enumerate(rows):
+            for column in key_columns:
+                value = str(row_data.get(column, '') or '').strip()
+                if value:
+                    seen[column].setdefault(value, []).append(row_idx)
+
+        batch_duplicates = []
+        duplicate_rows = {}
+        for column in key_columns:
+            for value, row_indexes in seen[column].items():
+                if len(row_indexes) > 1:
+                    batch_duplicates.append({
+                        'column': column,
+                        'value': value,
+                        'row_indexes': row_indexes
+                    })
+                    for row_idx in row_indexes[1:]:
+                        duplicate_rows.setdefault(row_idx, row_indexes[0])
+
+        return batch_duplicates, duplicate_rows
+
     @action(detail=False, methods=['get'])
     def available_dates(self, request):
         """获取可用的UCM变更日期"""
         try:
-            from datetime import timedelta
-
-            config = UCMDateConfig.objects.first()
-            if not config:
-                config = UCMDateConfig.objects.create(
-                    wednesday_deadline_hours=7,
-                    saturday_deadline_hours=31
-                )
-
-            now = timezone.now()
-            available_dates = []
-            deadlines = {}
-
-            # 计算本周三
-            this_wednesday = now + timedelta(days=(2 - now.weekday()) % 7)
-            this_wednesday = this_wednesday.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            # 计算本周六
-            this_saturday = now + timedelta(days=(5 - now.weekday()) % 7)
-            this_saturday = this_saturday.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            # 生成本周及未来3周的周三和周六
-            candidates = []
-            for week in range(4):  # 0=本周, 1=下周, 2=3周后, 3=4周后
-                # 添加周三
-                wednesday = this_wednesday + timedelta(weeks=week)
-                wednesday_dl = wednesday - timedelta(hours=config.wednesday_deadline_hours)
-                candidates.append((wednesday, wednesday_dl, '周三'))
-
-                # 添加周六
-                saturday = this_saturday + timedelta(weeks=week)
-                saturday_dl = saturday - timedelta(hours=config.saturday_deadline_hours)
-                candidates.append((saturday, saturday_dl, '周六'))
-
-            # 星期映射
-            weekday_map = {
-                0: '周一',
-                1: '周二',
-                2: '周三',
-                3: '周四',
-                4: '周五',
-                5: '周六',
-                6: '周日'
-            }
-
-            for date, deadline, day_type in candidates:
-                if now < deadline:
-                    date_str = date.strftime('%Y-%m-%d')
-                    # 获取截止日期的星期几
-                    deadline_weekday = weekday_map[deadline.weekday()]
-                    deadline_str = f"{deadline.strftime('%Y-%m-%d')}{deadline_weekday} {deadline.strftime('%H:%M')}"
-                    available_dates.append(date_str)
-                    deadlines[date_str] = f"{day_type}UCM变更，最晚登记时间在{deadline_str}前"
-
+            available_dates, deadlines = get_change_calendar().available_dates(timezone.now())
             return Response({
                 'dates': available_dates,
                 'deadlines': deadlines
@@ -308,43 +447,16 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['get'])
+    @conditional_get(UCMRequirement, ChangeDateOverride, UCMDateConfig, extra_key=today_key)
     def list_dates(self, request):
         """获取需求列表页的可选日期（返回所有有数据的日期，不考虑截止时间）"""
         try:
-            from django.db.models import Count
-            from datetime import timedelta
-
-            now = timezone.now()
-
-            # 计算本周三和本周六
-            this_wednesday = now + timedelta(days=(2 - now.weekday()) % 7)
-            this_wednesday = this_wednesday.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            this_saturday = now + timedelta(days=(5 - now.weekday()) % 7)
-            this_saturday = this_saturday.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            # 计算下周三和下周六
-            next_wednesday = this_wednesday + timedelta(days=7)
-            next_saturday = this_saturday + timedelta(days=7)
-
-            # 生成所有可能的周三和周六日期（过去8周到未来8周）
-            all_possible_dates = []
-            for week in range(-8, 9):
-                week_start = this_wednesday + timedelta(days=7 * week)
-                wednesday = week_start
-                saturday = week_start + timedelta(days=3)
-                all_possible_dates.append(wednesday.strftime('%Y-%m-%d'))
-                all_possible_dates.append(saturday.strftime('%Y-%m-%d'))
-
-            # 查询数据库，获取有数据的日期
-            requirements = UCMRequirement.objects.filter(
-                ucm_change_date__in=all_possible_dates
-            ).values('ucm_change_date').annotate(
-                count=Count('id')
-            ).order_by('ucm_change_date')
+            # 本周三前后8周的变更日中，从日期统计汇总表获取有数据的日期
+            all_possible_dates = get_change_calendar().list_window_dates()
+            rows = aggregate_date_stats(['ucm_change_date'], ucm_change_date__in=all_possible_dates)
 
             # 提取有数据的日期
-            list_dates = [req['ucm_change_date'] for req in requirements]
+            list_dates = sorted(row['ucm_change_date'] for row in rows)
 
             return Response({
                 'dates': list_dates
@@ -404,6 +516,9 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             if options:
                 column_options[col] = options
         
+        # 文件内重复检测（重复行直接判定失败，不再做数据库校验）
+        batch_duplicates, duplicate_rows = self._find_batch_duplicates(excel_data)
+
         for row_idx, row_data in enumerate(excel_data):
             row_validation = {
                 'row_index': row_idx,
@@ -411,6 +526,16 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                 'errors': {},
                 'warnings': {}
             }
+
+            if row_idx in duplicate_rows:
+                first_row = duplicate_rows[row_idx]
+                for column in ['名称', 'IP']:
+                    value = str(row_data.get(column, '') or '').strip()
+                    if value and value == str(excel_data[first_row].get(column, '') or '').strip():
+                        row_validation['errors'][column] = f'与第{first_row + 1}行重复'
+                row_validation['is_valid'] = False
+                validation_results.append(row_validation)
+                continue
             
             # 校验每列数据
             for col_def in template_columns:
@@ -496,7 +621,8 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             validation_results.append(row_validation)        
         return Response({
             'valid': True,
-            'validation_results': validation_results
+            'validation_results': validation_results,
+            'batch_duplicates': batch_duplicates
         })
     
     @action(detail=False, methods=['post'])
@@ -510,11 +636,22 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             return Response({'error': '参数不完整'}, status=status.HTTP_400_BAD_REQUEST)
         
         duplicates = []
+
+        # 先检测文件内重复，重复行无需再查询数据库
+        batch_duplicates, duplicate_rows = self._find_batch_duplicates(requirements)
         
-        for req_data in requirements:
+        for row_idx, req_data in enumerate(requirements):
             name = req_data.get('名称', '')
             ip = req_data.get('IP', '')
 
+            if row_idx in duplicate_rows:
+                duplicates.append({
+                    'name': name,
+                    'ip': ip,
+                    'reason': f'与第{duplicate_rows[row_idx] + 1}行重复'
+                })
+                continue
+
             # 检查同一UCM变更日期、同一需求类型下的名称或IP重复
             if name or ip:
                 query = Q(ucm_change_date=ucm_change_date, status='pending', requirement_type=requirement_type)
@@ -534,111 +671,138 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
         
         return Response({
             'has_duplicates': len(duplicates) > 0,
-            'duplicates': duplicates
+            'duplicates': duplicates,
+            'batch_duplicates': batch_duplicates
         })
     
     @action(detail=False, methods=['post'])
     def batch_submit(self, request):
-        """批量提交需求（带事务）"""
+        """批量提交需求（通过写队列串行化，单事务写入）"""
         requirement_type = request.data.get('requirement_type')
         ucm_change_date = request.data.get('ucm_change_date')
         requirements = request.data.get('requirements', [])
         
         if not all([requirement_type, ucm_change_date, requirements]):
             return Response({'error': '参数不完整'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 使用事务确保数据一致性
-        from django.db import transaction
+
+        # 先校验截止时间，超时的提交不做逐行校验
+        deadline_error = self._check_submission_deadline(ucm_change_date)
+        if deadline_error:
+            return Response({'error': deadline_error}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            with transaction.atomic():
-                submitted_count = 0
-                skipped_count = 0
-                skipped_records = []
-                submitted_ids = []
-                
-                # 获取所有有效的可选值
-                valid_device_types = ManufacturerVersionInfo.objects.values_list(
-                    'device_type', flat=True
-                ).distinct()
+            skipped_records = []
+            candidates = []
 
-                valid_manufacturers = ManufacturerVersionInfo.objects.values_list(
-                    'manufacturer', flat=True
-                ).distinct()
+            # 获取所有有效的可选值
+            valid_device_types = set(ManufacturerVersionInfo.objects.values_list(
+                'device_type', flat=True
+            ).distinct())
 
-                valid_versions = ManufacturerVersionInfo.objects.values_list(
-                    'version', flat=True
-                ).distinct()
+            valid_manufacturers = set(ManufacturerVersionInfo.objects.values_list(
+                'manufacturer', flat=True
+            ).distinct())
 
-                for req_data in requirements:
-                    name = req_data.get('名称', '')
-                    ip = req_data.get('IP', '')
-                    device_type = req_data.get('设备类型', '')
-                    manufacturer = req_data.get('品牌(厂商)', '')
-                    version = req_data.get('版本', '')
+            valid_versions = set(ManufacturerVersionInfo.objects.values_list(
+                'version', flat=True
+            ).distinct())
 
-                    # 独立校验设备类型
-                    if device_type and device_type not in valid_device_types:
-                        skipped_count += 1
-                        skipped_records.append({
-                            'name': name,
-                            'ip': ip,
-                            'reason': f'设备类型 "{device_type}" 不在可选范围内'
-                        })
-                        continue
+            valid_combinations = set(ManufacturerVersionInfo.objects.values_list(
+                'device_type', 'manufacturer', 'version'
+            ).distinct())
 
-                    # 独立校验品牌(厂商)
-                    if manufacturer and manufacturer not in valid_manufacturers:
-                        skipped_count += 1
-                        skipped_records.append({
-                            'name': name,
-                            'ip': ip,
-                            'reason': f'品牌(厂商) "{manufacturer}" 不在可选范围内'
-                        })
-                        continue
+            # 文件内重复检测：同一批次中重复的行直接跳过，不做任何数据库校验
+            batch_duplicates, duplicate_rows = self._find_batch_duplicates(requirements)
+
+            # 校验只读取数据，在写队列之外完成，缩短写事务持有锁的时间
+            for row_idx, req_data in enumerate(requirements):
+                name = req_data.get('名称', '')
+                ip = req_data.get('IP', '')
+                device_type = req_data.get('设备类型', '')
+                manufacturer = req_data.get('品牌(厂商)', '')
+                version = req_data.get('版本', '')
+
+                if row_idx in duplicate_rows:
+                    skipped_records.append({
+                        'name': name,
+                        'ip': ip,
+                        'reason': f'文件内重复记录（与第{duplicate_rows[row_idx] + 1}行重复）'
+                    })
+                    continue
+
+                # 独立校验设备类型
+                if device_type and device_type not in valid_device_types:
+                    skipped_records.append({
+                        'name': name,
+                        'ip': ip,
+                        'reason': f'设备类型 "{device_type}" 不在可选范围内'
+                    })
+                    continue
+
+                # 独立校验品牌(厂商)
+                if manufacturer and manufacturer not in valid_manufacturers:
+                    skipped_records.append({
+                        'name': name,
+                        'ip': ip,
+                        'reason': f'品牌(厂商) "{manufacturer}" 不在可选范围内'
+                    })
+                    continue
+
+                # 独立校验版本
+                if version and version not in valid_versions:
+                    skipped_records.append({
+                        'name': name,
+                        'ip': ip,
+                        'reason': f'版本 "{version}" 不在可选范围内'
+                    })
+                    continue
 
-                    # 独立校验版本
-                    if version and version not in valid_versions:
-                        skipped_count += 1
+                # 级联关系校验
+                if device_type and manufacturer and version:
+                    if (device_type, manufacturer, version) not in valid_combinations:
                         skipped_records.append({
                             'name': name,
                             'ip': ip,
-                            'reason': f'版本 "{version}" 不在可选范围内'
+                            'reason': f'设备类型、品牌(厂商)、版本组合不匹配'
                         })
                         continue
 
-                    # 级联关系校验
-                    if device_type and manufacturer and version:
-                        is_valid_combination = ManufacturerVersionInfo.objects.filter(
-                            device_type=device_type,
-                            manufacturer=manufacturer,
-                            version=version
-                        ).exists()
-
-                        if not is_valid_combination:
-                            skipped_count += 1
-                            skipped_records.append({
-                                'name': name,
-                                'ip': ip,
-                                'reason': f'设备类型、品牌(厂商)、版本组合不匹配'
-                            })
-                            continue
-
-                    # 检查重复（同一UCM变更日期、同一需求类型下的名称或IP重复）
-                    if name or ip:
-                        query = Q(ucm_change_date=ucm_change_date, status='pending', requirement_type=requirement_type)
-                        if name:
-                            query &= Q(device_name=name)
-                        if ip:
-                            query &= Q(ip=ip)
-
-                        existing = UCMRequirement.objects.filter(query).first()
+                candidates.append(req_data)
+
+            def write():
+                # 检查重复（同一UCM变更日期、同一需求类型下的名称或IP重复），一次查询取出所有可能冲突的记录
+                names = {req_data.get('名称', '') for req_data in candidates} - {''}
+                ips = {req_data.get('IP', '') for req_data in candidates} - {''}
+                # 名称、IP 分别查询后 UNION，各自命中 (日期, 状态, 类型, 名称/IP) 复合索引；OR 条件会退化为只用前缀列
+                pending = UCMRequirement.objects.filter(
+                    ucm_change_date=ucm_change_date,
+                    status='pending',
+                    requirement_type=requirement_type
+                )
+                existing = pending.filter(device_name__in=names).values_list('device_name', 'ip').union(
+                    pending.filter(ip__in=ips).values_list('device_name', 'ip')
+                )
+                existing_pairs = set(existing)
+                existing_names = {pair[0] for pair in existing_pairs}
+                existing_ips = {pair[1] for pair in existing_pairs}
+
+                duplicate_records = []
+                new_requirements = []
+                for req_data in candidates:
+                    name = req_data.get('名称', '')
+                    ip = req_data.get('IP', '')
+
+                    if name and ip:
+                        is_duplicate = (name, ip) in existing_pairs
+                    elif name:
+                        is_duplicate = name in existing_names
+                    elif ip:
+                        is_duplicate = ip in existing_ips
                     else:
-                        existing = None
+                        is_duplicate = False
 
-                    if existing:
-                        skipped_count += 1
-                        skipped_records.append({
+                    if is_duplicate:
+                        duplicate_records.append({
                             'name': name,
                             'ip': ip,
                             'reason': '重复记录'
@@ -646,27 +810,38 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                         continue
 
                     # 创建需求记录
-                    requirement = UCMRequirement(
+                    new_requirements.append(UCMRequirement(
                         requirement_type=requirement_type,
                         ucm_change_date=ucm_change_date,
                         submitter=request.user,
-                        requirement_data=json.dumps(req_data, ensure_ascii=False),
+                        requirement_data=req_data,
                         device_name=name,
-                        ip=ip
-                    )
-                    requirement.save()
-                    submitted_count += 1
-                    submitted_ids.append(requirement.id)
-                
-                return Response({
-                    'success': True,
-                    'submitted_count': submitted_count,
-                    'skipped_count': skipped_count,
-                    'skipped_records': skipped_records,
-                    'submitted_ids': submitted_ids
-                })
+                        ip=ip,
+                        ip_int=ip_to_int(ip)
+                    ))
+
+                # 整批一次识别地点
+                locations = classify_locations(
+                    [requirement.requirement_data for requirement in new_requirements], requirement_type
+                )
+                for requirement, location in zip(new_requirements, locations):
+                    requirement.location = location
+
+                created = UCMRequirement.objects.bulk_create(new_requirements)
+                return [requirement.id for requirement in created], duplicate_records
+
+            submitted_ids, duplicate_records = submit_write(write)
+            skipped_records.extend(duplicate_records)
+
+            return Response({
+                'success': True,
+                'submitted_count': len(submitted_ids),
+                'skipped_count': len(skipped_records),
+                'skipped_records': skipped_records,
+                'submitted_ids': submitted_ids,
+                'batch_duplicates': batch_duplicates
+            })
         except Exception as e:
-            transaction.set_rollback(True)
             return Response({'error': f'提交失败: {str(e)}'}, 
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -680,6 +855,10 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
         
         if not all([requirement_type, ucm_change_date, excel_data]):
             return Response({'error': '参数不完整'}, status=status.HTTP_400_BAD_REQUEST)
+
+        deadline_error = self._check_submission_deadline(ucm_change_date)
+        if deadline_error:
+            return Response({'error': deadline_error}, status=status.HTTP_400_BAD_REQUEST)
         
         # 检查是否有校验失败的记录
         has_errors = any(
@@ -690,6 +869,14 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             return Response({'error': '存在校验失败的记录，无法提交'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
+        # 检查文件内重复记录
+        batch_duplicates, _ = self._find_batch_duplicates(excel_data)
+        if batch_duplicates:
+            return Response({
+                'error': '文件内存在重复记录',
+                'batch_duplicates': batch_duplicates
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         # 检查重复记录
         duplicate_records = []
         for row_data in excel_data:
@@ -723,7 +910,7 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                     requirement_type=requirement_type,
                     ucm_change_date=ucm_change_date,
                     submitter=request.user,
-                    requirement_data=json.dumps(row_data, ensure_ascii=False),
+                    requirement_data=row_data,
                     device_name=row_data.get('名称', ''),
                     ip=row_data.get('IP', '')
                 )
@@ -741,104 +928,307 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
     def mark_as_processed(self, request, pk=None):
         """标记需求为已处理"""
         requirement = self.get_object()
+        leased_by_other = (
+            requirement.lease_owner_id not in (None, request.user.id)
+            and requirement.lease_expires_at is not None
+            and requirement.lease_expires_at >= timezone.now()
+        )
+        if leased_by_other:
+            return Response({'error': '该需求已被其他处理人领取'}, status=status.HTTP_409_CONFLICT)
         requirement.status = 'processed'
         requirement.processor = request.user
         requirement.process_time = timezone.now()
+        requirement.lease_owner = None
+        requirement.lease_expires_at = None
         requirement.save()
         return Response({'success': True})
     
     @action(detail=False, methods=['post'])
     def batch_complete(self, request):
         """批量完成需求"""
-        requirement_ids = request.data.get('requirement_ids', [])
+        requirement_ids = self._parse_requirement_ids(request.data.get('requirement_ids', []))
         if not requirement_ids:
             return Response({'error': '请选择要完成的记录'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        count = UCMRequirement.objects.filter(
-            id__in=requirement_ids,
-            status='pending'
-        ).update(
-            status='processed',
-            processor=request.user,
-            process_time=timezone.now()
-        )
-        
-        return Response({'success': True, 'count': count})
+        def write():
+            pending = UCMRequirement.objects.filter(id__in=requirement_ids, status='pending')
+            available = self._exclude_leased_by_others(pending, request.user)
+            count = available.update(
+                status='processed',
+                processor=request.user,
+                process_time=timezone.now(),
+                revision=F('revision') + 1,
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            # 更新后剩下的待处理记录即被他人领取而跳过的记录
+            return count, pending.count()
+
+        count, leased_count = submit_write(write)
+        return Response({'success': True, 'count': count, 'leased_count': leased_count})
     
     @action(detail=False, methods=['post'])
     def batch_delete(self, request):
-        """批量删除需求"""
-        requirement_ids = request.data.get('requirement_ids', [])
+        """批量删除需求（通过写队列串行化）"""
+        requirement_ids = self._parse_requirement_ids(request.data.get('requirement_ids', []))
         if not requirement_ids:
             return Response({'error': '请选择要删除的记录'},
                           status=status.HTTP_400_BAD_REQUEST)
 
-        count, _ = UCMRequirement.objects.filter(
+        count, _ = submit_write(lambda: UCMRequirement.objects.filter(
             id__in=requirement_ids
-        ).delete()
+        ).delete())
+        if count:
+            # 删除的可能是已结束周期的需求
+            clear_analytics_cache()
+
+        return Response({'success': True, 'count': count})
+
+    # 批量操作支持的筛选条件
+    BULK_FILTER_FIELDS = {
+        'ucm_change_date': 'ucm_change_date',
+        'start_date': 'ucm_change_date__gte',
+        'end_date': 'ucm_change_date__lte',
+        'requirement_type': 'requirement_type',
+        'status': 'status',
+        'submitter': 'submitter__username',
+        'location': 'location',
+    }
+
+    # 批量操作中按日期解析的筛选条件
+    BULK_DATE_FILTERS = ('ucm_change_date', 'start_date', 'end_date')
+
+    def _filter_requirements(self, filters):
+        """
+        根据筛选条件构建查询集，未提供任何有效条件时返回None
+
+        Raises:
+            ValidationError: 筛选条件格式错误（返回400）
+        """
+        if not isinstance(filters, dict):
+            return None
+
+        conditions = {}
+        for key, lookup in self.BULK_FILTER_FIELDS.items():
+            value = filters.get(key)
+            if not value:
+                continue
+            if not isinstance(value, str):
+                raise ValidationError({'error': f'筛选条件 {key} 必须是字符串'})
+            if key in self.BULK_DATE_FILTERS:
+                try:
+                    value = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    raise ValidationError({'error': f'筛选条件 {key} 日期格式错误，请使用 YYYY-MM-DD 格式'})
+            elif key == 'status' and value not in dict(UCMRequirement.STATUS_CHOICES):
+                raise ValidationError({'error': f'不支持的状态: {value}'})
+            elif key == 'requirement_type' and value not in dict(UCMRequirement.REQUIREMENT_TYPES):
+                raise ValidationError({'error': f'不支持的需求类型: {value}'})
+            conditions[lookup] = value
+        if not conditions:
+            return None
+        return UCMRequirement.objects.filter(**conditions)
+
+    def _parse_requirement_ids(self, value):
+        """
+        解析需求ID列表
+
+        Raises:
+            ValidationError: 不是整数列表（返回400）
+        """
+        if not isinstance(value, list):
+            raise ValidationError({'error': 'requirement_ids 必须是ID列表'})
+        try:
+            return [int(requirement_id) for requirement_id in value]
+        except (TypeError, ValueError):
+            raise ValidationError({'error': 'requirement_ids 必须是整数ID列表'})
+
+    def _get_revision_token(self, queryset):
+        """计算结果集的修订标识（记录数、最大ID、修订号之和），用于乐观锁校验"""
+        result = queryset.aggregate(
+            count=Count('id'),
+            max_id=Max('id'),
+            revision_sum=Sum('revision')
+        )
+        token = f"{result['count']}-{result['max_id'] or 0}-{result['revision_sum'] or 0}"
+        return result['count'], token
+
+    def _bulk_transition(self, request, queryset, apply):
+        """
+        按筛选条件执行批量操作（单条UPDATE/DELETE语句）
+
+        dry_run=true 时只返回匹配数量和修订标识；
+        提供 expected_revision 时，若结果集已被他人修改则返回409。
+        """
+        dry_run = request.data.get('dry_run', False)
+        expected_revision = request.data.get('expected_revision')
+
+        if dry_run:
+            count, token = self._get_revision_token(queryset)
+            return Response({'dry_run': True, 'count': count, 'revision': token})
+
+        def write():
+            if expected_revision:
+                _, token = self._get_revision_token(queryset)
+                if token != expected_revision:
+                    return None, token
+            return apply(queryset), None
+
+        count, current_revision = submit_write(write)
+        if count is None:
+            return Response({
+                'error': '数据已被修改，请重新确认后再提交',
+                'revision': current_revision
+            }, status=status.HTTP_409_CONFLICT)
+
+        return Response({'success': True, 'count': count})
+
+    @action(detail=False, methods=['post'])
+    def bulk_complete(self, request):
+        """按筛选条件批量完成需求（跳过被其他处理人领取的需求）"""
+        queryset = self._filter_requirements(request.data.get('filters'))
+        if queryset is None:
+            return Response({'error': '请至少提供一个筛选条件'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return self._bulk_transition(
+            request,
+            self._exclude_leased_by_others(queryset.filter(status='pending'), request.user),
+            lambda qs: qs.update(
+                status='processed',
+                processor=request.user,
+                process_time=timezone.now(),
+                revision=F('revision') + 1,
+                lease_owner=None,
+                lease_expires_at=None
+            )
+        )
+
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        """按筛选条件批量删除需求"""
+        queryset = self._filter_requirements(request.data.get('filters'))
+        if queryset is None:
+            return Response({'error': '请至少提供一个筛选条件'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        response = self._bulk_transition(
+            request,
+            queryset,
+            lambda qs: qs.delete()[0]
+        )
+        if response.data.get('count') and not response.data.get('dry_run'):
+            clear_analytics_cache()
+        return response
+
+    def _exclude_leased_by_others(self, queryset, user):
+        """排除被其他处理人领取且租约未到期的需求"""
+        return queryset.filter(
+            Q(lease_owner__isnull=True) | Q(lease_owner=user) | Q(lease_expires_at__lt=timezone.now())
+        )
+
+    def _release_expired_leases(self):
+        """释放所有已过期的处理租约"""
+        return UCMRequirement.objects.filter(
+            lease_expires_at__lt=timezone.now()
+        ).update(lease_owner=None, lease_expires_at=None, revision=F('revision') + 1)
 
+    @action(detail=False, methods=['post'])
+    def claim(self, request):
+        """领取待处理需求（原子地为当前用户租用接下来的N条）"""
+        from datetime import timedelta
+        from django.conf import settings
+
+        ucm_change_date = request.data.get('ucm_change_date')
+        requirement_type = request.data.get('requirement_type')
+        if not ucm_change_date:
+            return Response({'error': '请提供UCM变更日期'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            count = int(request.data.get('count', 10))
+            lease_seconds = int(request.data.get(
+                'lease_seconds', getattr(settings, 'UCM_CLAIM_LEASE_SECONDS', 900)
+            ))
+        except (ValueError, TypeError):
+            return Response({'error': 'count和lease_seconds必须是整数'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= count <= 100) or not (60 <= lease_seconds <= 24 * 3600):
+            return Response({'error': 'count须在1到100之间，lease_seconds须在60到86400之间'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        def write():
+            self._release_expired_leases()
+
+            queryset = UCMRequirement.objects.filter(
+                ucm_change_date=ucm_change_date,
+                status='pending',
+                lease_owner__isnull=True
+            )
+            if requirement_type:
+                queryset = queryset.filter(requirement_type=requirement_type)
+
+            ids = list(queryset.order_by('submit_time', 'id').values_list('id', flat=True)[:count])
+            lease_expires_at = timezone.now() + timedelta(seconds=lease_seconds)
+            # 条件更新保证同一条需求只会被一个处理人领取
+            UCMRequirement.objects.filter(
+                id__in=ids,
+                lease_owner__isnull=True
+            ).update(lease_owner=request.user, lease_expires_at=lease_expires_at, revision=F('revision') + 1)
+            return ids
+
+        ids = submit_write(write)
+        claimed = UCMRequirement.objects.select_related('submitter', 'processor').filter(
+            id__in=ids, lease_owner=request.user
+        ).order_by('submit_time', 'id')
+        serializer = self.get_serializer(claimed, many=True)
+        return Response({'count': len(serializer.data), 'results': serializer.data})
+
+    @action(detail=False, methods=['get'])
+    def my_claims(self, request):
+        """获取当前用户领取中的需求"""
+        queryset = UCMRequirement.objects.select_related('submitter', 'processor').filter(
+            lease_owner=request.user,
+            lease_expires_at__gte=timezone.now(),
+            status='pending'
+        )
+        ucm_change_date = request.query_params.get('ucm_change_date')
+        if ucm_change_date:
+            queryset = queryset.filter(ucm_change_date=ucm_change_date)
+
+        serializer = self.get_serializer(queryset.order_by('submit_time', 'id'), many=True)
+        return Response({'count': len(serializer.data), 'results': serializer.data})
+
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """释放当前用户领取的需求（不指定ID时释放全部）"""
+        requirement_ids = self._parse_requirement_ids(request.data.get('requirement_ids', []))
+
+        def write():
+            queryset = UCMRequirement.objects.filter(lease_owner=request.user)
+            if requirement_ids:
+                queryset = queryset.filter(id__in=requirement_ids)
+            return queryset.update(lease_owner=None, lease_expires_at=None, revision=F('revision') + 1)
+
+        count = submit_write(write)
         return Response({'success': True, 'count': count})
 
     @action(detail=False, methods=['get'])
     def weekly_dates(self, request):
         """获取指定周的周三、周六日期列表"""
         try:
-            import math
-            from datetime import timedelta
-            from django.db.models import Min
-
             week_offset = int(request.query_params.get('week_offset', 0))
             now = timezone.now()
+            calendar = get_change_calendar()
 
-            # 计算目标周的周三和周六
-            # 本周三是相对于当前日期的第几天 (周一=0, 周三=2, 周六=5)
-            days_to_wednesday = (2 - now.weekday()) % 7
-            days_to_saturday = (5 - now.weekday()) % 7
-
-            # 加上周偏移
-            target_wednesday = now + timedelta(days=days_to_wednesday + week_offset * 7)
-            target_saturday = now + timedelta(days=days_to_saturday + week_offset * 7)
-
-            # 获取周标签
-            def get_week_label(offset):
-                if offset == 0:
-                    return '本周'
-                elif offset == 1:
-                    return '下周'
-                elif offset == -1:
-                    return '上周'
-                else:
-                    return f'{abs(offset)}周前' if offset < 0 else f'{offset}周后'
-
-            week_label = get_week_label(week_offset)
-
-            dates = [
-                {
-                    'date': target_wednesday.strftime('%Y-%m-%d'),
-                    'day_type': '周三',
-                    'label': f'{target_wednesday.strftime("%Y年%m月%d日")}（{week_label}三）'
-                },
-                {
-                    'date': target_saturday.strftime('%Y-%m-%d'),
-                    'day_type': '周六',
-                    'label': f'{target_saturday.strftime("%Y年%m月%d日")}（{week_label}六）'
-                }
-            ]
+            dates = calendar.week_dates(week_offset)
 
             # 计算边界信息
-            # 查找最早有数据的日期
-            earliest_date_result = UCMRequirement.objects.aggregate(Min('ucm_change_date'))
-            earliest_date = earliest_date_result['ucm_change_date__min']
-
+            # 最早有数据的日期相对于当前日期的周偏移
+            earliest_date = earliest_change_date()
             if earliest_date:
-                # 将date对象转换为datetime对象，以便与now相减
-                if not hasattr(earliest_date, 'hour'):
-                    # earliest_date是date对象，需要转换为datetime
-                    earliest_date = datetime.combine(earliest_date, time(0, 0, 0))
-                # 计算最早日期相对于当前日期的周偏移
-                days_diff = (earliest_date - now).days
-                min_week_offset = math.floor(days_diff / 7)
+                min_week_offset = calendar.week_offset_of(earliest_date, now)
             else:
                 min_week_offset = 0
 
@@ -857,7 +1247,32 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def _empty_date_statistics():
+        """单个日期各需求类型的空统计"""
+        return {req_type: {'count': 0, 'pending': 0, 'processed': 0} for req_type in ['import', 'delete', 'modify']}
+
+    def _aggregate_date_statistics(self, **filters):
+        """
+        从日期统计汇总表读取各日期、需求类型、状态的数量（含已归档需求）
+
+        Returns:
+            {ucm_change_date: {需求类型: {'count', 'pending', 'processed'}}}，没有需求的日期不返回
+        """
+        result = {}
+        rows = aggregate_date_stats(['ucm_change_date', 'requirement_type', 'status'], **filters)
+        for row in rows:
+            statistics = result.setdefault(row['ucm_change_date'], self._empty_date_statistics())
+            type_statistics = statistics.get(row['requirement_type'])
+            if type_statistics is None:
+                continue
+            type_statistics['count'] += row['total']
+            if row['status'] in type_statistics:
+                type_statistics[row['status']] += row['total']
+        return result
+
     @action(detail=False, methods=['get'])
+    @conditional_get(UCMRequirement)
     def date_statistics(self, request):
         """获取指定日期的需求类型统计"""
         try:
@@ -870,39 +1285,10 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             from datetime import datetime
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
 
-            # 统计各类型数量
-            statistics = {
-                'import': {'count': 0, 'pending': 0, 'processed': 0},
-                'delete': {'count': 0, 'pending': 0, 'processed': 0},
-                'modify': {'count': 0, 'pending': 0, 'processed': 0}
-            }
-
-            for req_type in ['import', 'delete', 'modify']:
-                # 总数
-                total_count = UCMRequirement.objects.filter(
-                    ucm_change_date=target_date,
-                    requirement_type=req_type
-                ).count()
-
-                # 待处理数
-                pending_count = UCMRequirement.objects.filter(
-                    ucm_change_date=target_date,
-                    requirement_type=req_type,
-                    status='pending'
-                ).count()
-
-                # 已处理数
-                processed_count = UCMRequirement.objects.filter(
-                    ucm_change_date=target_date,
-                    requirement_type=req_type,
-                    status='processed'
-                ).count()
-
-                statistics[req_type] = {
-                    'count': total_count,
-                    'pending': pending_count,
-                    'processed': processed_count
-                }
+            # 从汇总表读取各类型、各状态数量
+            statistics = self._aggregate_date_statistics(
+                ucm_change_date=target_date
+            ).get(target_date, self._empty_date_statistics())
 
             return Response({
                 'date': date_str,
@@ -913,7 +1299,212 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # date_statistics_range 单次查询允许的最大天数
+    MAX_STATISTICS_RANGE_DAYS = 366
+
+    @action(detail=False, methods=['get'])
+    @conditional_get(UCMRequirement)
+    def date_statistics_range(self, request):
+        """
+        批量获取多个日期的需求类型统计（一次查询）
+
+        参数: start_date + end_date（闭区间），或 dates=2026-10-21,2026-10-24
+        返回: {'statistics': {日期: {需求类型: {'count', 'pending', 'processed'}}}}，没有需求的日期不返回
+        """
+        try:
+            from datetime import datetime
+            dates_param = request.query_params.get('dates')
+            start_str = request.query_params.get('start_date')
+            end_str = request.query_params.get('end_date')
+
+            if dates_param:
+                dates = sorted({
+                    datetime.strptime(value.strip(), '%Y-%m-%d').date()
+                    for value in dates_param.split(',') if value.strip()
+                })
+                if not dates:
+                    return Response({'error': '请指定日期'}, status=status.HTTP_400_BAD_REQUEST)
+                if len(dates) > self.MAX_STATISTICS_RANGE_DAYS:
+                    return Response({'error': f'一次最多查询{self.MAX_STATISTICS_RANGE_DAYS}个日期'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+                date_filter = {'ucm_change_date__in': dates}
+                start_date, end_date = dates[0], dates[-1]
+            elif start_str and end_str:
+                start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
+                if start_date > end_date:
+                    return Response({'error': '开始日期不能晚于结束日期'}, status=status.HTTP_400_BAD_REQUEST)
+                if (end_date - start_date).days >= self.MAX_STATISTICS_RANGE_DAYS:
+                    return Response({'error': f'日期范围不能超过{self.MAX_STATISTICS_RANGE_DAYS}天'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+                date_filter = {'ucm_change_date__range': (start_date, end_date)}
+            else:
+                return Response({'error': '请指定 start_date 和 end_date，或 dates'},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            statistics = self._aggregate_date_statistics(**date_filter)
+            return Response({
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d'),
+                'statistics': {
+                    change_date.strftime('%Y-%m-%d'): statistics[change_date]
+                    for change_date in sorted(statistics)
+                }
+            })
+        except ValueError:
+            return Response({'error': '日期格式错误，请使用 YYYY-MM-DD 格式'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # 首页最近登记需求条数
+    DASHBOARD_RECENT_LIMIT = 10
+
+    def _build_dashboard_summary(self, week_offset):
+        """
+        汇总首页所需数据：周视图日期及统计、需求列表可选日期、需求总数、设备总数、最近登记需求
+
+        日期相关统计全部来自一次汇总表查询，另加设备计数和最近需求各一次查询。
+        """
+        now = timezone.now()
+        calendar = get_change_calendar()
+
+        # 所有日期的各类型、状态统计（汇总表按日期分组，行数只与日期数有关）
+        statistics = self._aggregate_date_statistics()
+
+        week_dates = calendar.week_dates(week_offset)
+        for item in week_dates:
+            change_date = datetime.strptime(item['date'], '%Y-%m-%d').date()
+            item['statistics'] = statistics.get(change_date, self._empty_date_statistics())
+
+        earliest_date = min(statistics) if statistics else None
+        boundaries = {
+            'min_week_offset': calendar.week_offset_of(earliest_date, now) if earliest_date else 0,
+            'max_week_offset': 1
+        }
+
+        window_dates = set(calendar.list_window_dates())
+        list_dates = sorted(change_date for change_date in statistics if change_date in window_dates)
+
+        totals = {'count': 0, 'pending': 0, 'processed': 0, 'month_count': 0}
+        for change_date, date_statistics in statistics.items():
+            this_month = (change_date.year, change_date.month) == (now.year, now.month)
+            for type_statistics in date_statistics.values():
+                totals['count'] += type_statistics['count']
+                totals['pending'] += type_statistics['pending']
+                totals['processed'] += type_statistics['processed']
+                if this_month:
+                    totals['month_count'] += type_statistics['count']
+
+        recent = UCMRequirement.objects.select_related('submitter', 'processor').order_by(
+            '-submit_time', '-id'
+        )[:self.DASHBOARD_RECENT_LIMIT]
+
+        return {
+            'week_offset': week_offset,
+            'dates': week_dates,
+            'boundaries': boundaries,
+            'list_dates': [change_date.strftime('%Y-%m-%d') for change_date in list_dates],
+            'totals': totals,
+            'device_count': UCMDeviceInventory.objects.count(),
+            'recent_requirements': UCMRequirementListSerializer(recent, many=True).data,
+            'generated_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    @action(detail=False, methods=['get'])
+    @conditional_get(
+        UCMRequirement, UCMRequirementArchive, UCMDeviceInventory, ChangeDateOverride, UCMDateConfig,
+        extra_key=today_key
+    )
+    def dashboard_summary(self, request):
+        """
+        首页汇总数据（一次请求）
+
+        参数: week_offset（默认 0，本周）
+        结果按条件请求的 ETag（已包含日期、周偏移和数据表版本号）缓存 UCM_DASHBOARD_CACHE_SECONDS 秒，
+        数据和日期均未变化时支持 304。
+        """
+        try:
+            week_offset = int(request.query_params.get('week_offset', 0))
+        except (TypeError, ValueError):
+            return Response({'error': 'week_offset 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            from django.conf import settings
+            from django.core.cache import cache
+
+            # 复用装饰器按表版本号算出的 ETag 作为缓存键，数据变化（如收到推送后刷新）时不会读到旧结果；
+            # 不支持表版本号时按日期和周偏移缓存
+            etag = getattr(request, 'conditional_etag', None)
+            if etag is not None:
+                cache_key = f'ucm:dashboard_summary:{etag}'
+            else:
+                cache_key = f'ucm:dashboard_summary:{timezone.now().date().isoformat()}:{week_offset}'
+            summary = cache.get(cache_key)
+            if summary is None:
+                summary = self._build_dashboard_summary(week_offset)
+                cache.set(cache_key, summary, getattr(settings, 'UCM_DASHBOARD_CACHE_SECONDS', 15))
+            return Response(summary)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    # analytics 单次查询允许的最大天数
+    MAX_ANALYTICS_RANGE_DAYS = 3 * 366
+
+    @action(detail=False, methods=['get'])
+    @conditional_get(UCMRequirement, UCMRequirementArchive, extra_key=today_key)
+    def analytics(self, request):
+        """
+        需求量趋势统计（含已归档需求）
+
+        参数:
+            period: week（默认）/ month，按变更日期所在周期分组
+            group_by: 逗号分隔的分组维度，取自 requirement_type、status、location（默认 requirement_type,location）
+            start_date / end_date: 统计范围（默认最近一年），按周期边界向外扩展
+        返回: {'series': [{'period', 'period_end', 'total', 'finished', 'rows': [{分组维度..., 'total'}]}]}
+        """
+        try:
+            from datetime import datetime, timedelta
+
+            period = request.query_params.get('period', 'week')
+            if period not in ANALYTICS_PERIODS:
+                return Response({'error': f"period 只支持 {', '.join(ANALYTICS_PERIODS)}"},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            group_by = parse_field_list(request.query_params.get('group_by', 'requirement_type,location'))
+            invalid = group_by - set(ANALYTICS_DIMENSIONS)
+            if invalid:
+                return Response({'error': f"不支持的分组维度: {', '.join(sorted(invalid))}"},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            today = timezone.now().date()
+            start_str = request.query_params.get('start_date')
+            end_str = request.query_params.get('end_date')
+            end_date = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else today
+            start_date = (
+                datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else end_date - timedelta(days=364)
+            )
+            if start_date > end_date:
+                return Response({'error': '开始日期不能晚于结束日期'}, status=status.HTTP_400_BAD_REQUEST)
+            if (end_date - start_date).days >= self.MAX_ANALYTICS_RANGE_DAYS:
+                return Response({'error': f'日期范围不能超过{self.MAX_ANALYTICS_RANGE_DAYS}天'},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            series = requirement_volume(period, group_by, start_date, end_date, today)
+            return Response({
+                'period': period,
+                'group_by': [dimension for dimension in ANALYTICS_DIMENSIONS if dimension in group_by],
+                'start_date': series[0]['period'],
+                'end_date': series[-1]['period_end'],
+                'series': series
+            })
+        except ValueError:
+            return Response({'error': '日期格式错误，请使用 YYYY-MM-DD 格式'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=False, methods=['get'])
     def export_excel(self, request):
         """导出需求列表为Excel文件"""
@@ -923,9 +1514,10 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             start_date = request.query_params.get('start_date')
             end_date = request.query_params.get('end_date')
             requirement_type = request.query_params.get('requirement_type')
+            locations = parse_field_list(request.query_params.get('location'))
             
             # 构建查询条件
-            queryset = UCMRequirement.objects.all()
+            queryset = UCMRequirement.objects.select_related('submitter', 'processor')
             
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
@@ -935,6 +1527,8 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(ucm_change_date__lte=end_date)
             if requirement_type:
                 queryset = queryset.filter(requirement_type=requirement_type)
+            if locations:
+                queryset = queryset.filter(location__in=locations)
             
             # 排序
             queryset = queryset.order_by('-submit_time')
@@ -981,11 +1575,8 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
             # 写入数据
             row_idx = 2
             for requirement in queryset:
-                # 解析需求数据
-                try:
-                    requirement_data = json.loads(requirement.requirement_data) if requirement.requirement_data else {}
-                except:
-                    requirement_data = {}
+                # 需求数据（JSON字段，已是字典）
+                requirement_data = requirement.get_requirement_data_dict()
                 
                 # 写入行数据
                 ws.cell(row=row_idx, column=1, value=requirement.id).border = border
@@ -1100,19 +1691,18 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def _group_by_type_and_location(self, requirements):
-        """按类型和地点分组"""
+        """按类型和地点分组（地点取登记时保存的 location 列）"""
         grouped = {
-            'import': {'外高桥': [], '嘉定': [], '境外机构': [], '分行': []},
-            'modify': {'外高桥': [], '嘉定': [], '境外机构': [], '分行': []},
-            'delete': {'外高桥': [], '嘉定': [], '境外机构': [], '分行': []},
+            req_type: {location: [] for location in LOCATIONS}
+            for req_type in ['import', 'modify', 'delete']
         }
 
         for req in requirements:
             req_type = req.requirement_type
-            req_data = json.loads(req.requirement_data) if req.requirement_data else {}
+            req_data = req.get_requirement_data_dict()
 
-            # 获取地点
-            location = self._get_location(req_data, req_type)
+            # 历史数据未回填地点时按需求数据识别
+            location = req.location or get_location(req_data, req_type)
 
             # 添加到对应分组
             if location in grouped[req_type]:
@@ -1120,41 +1710,12 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
 
         return grouped
 
-    def _get_location(self, row, requirement_type):
-        """根据IP和名称识别地点"""
-        ip_column = 'IP' if requirement_type in ['import', 'delete'] else '设备ip'
-        name_column = '名称' if requirement_type in ['import', 'delete'] else '老指标'
-
-        ip = row.get(ip_column, '')
-        name = row.get(name_column, '')
-
-        # 优先根据IP前缀判断
-        if ip.startswith('76.'):
-            return '嘉定'
-        elif ip.startswith('84.'):
-            return '外高桥'
-        elif ip.startswith('123.'):
-            return '境外机构'
-
-        # 根据名称前2位判断
-        if name:
-            prefix = name[:2].upper()
-            if prefix == 'NF':
-                return '外高桥'
-            elif prefix == 'JD':
-                return '嘉定'
-            elif prefix.isalpha():
-                return '分行'
-
-        # 默认返回分行
-        return '分行'
-
     def _generate_change_plans(self, grouped_data, ucm_change_date):
         """生成变更方案文件"""
         files = []
 
         for req_type in ['import', 'modify', 'delete']:
-            for location in ['外高桥', '嘉定', '境外机构', '分行']:
+            for location in LOCATIONS:
                 data = grouped_data.get(req_type, {}).get(location, [])
 
                 if not data:
@@ -1183,7 +1744,7 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
         files = []
 
         for req_type in ['import', 'modify', 'delete']:
-            for location in ['外高桥', '嘉定', '境外机构', '分行']:
+            for location in LOCATIONS:
                 data = grouped_data.get(req_type, {}).get(location, [])
 
                 if not data:
@@ -1485,11 +2046,55 @@ class UCMRequirementViewSet(viewsets.ModelViewSet):
         return buffer.getvalue()
 
 
-class TemplateConfigViewSet(viewsets.ModelViewSet):
+class UCMRequirementArchiveViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """UCM需求归档查询API（历史需求）"""
+    queryset = UCMRequirementArchive.objects.all()
+    serializer_class = UCMRequirementArchiveSerializer
+    permission_classes = [IsAuthenticated]
+    etag_models = (UCMRequirementArchive,)
+
+    def get_queryset(self):
+        # 获取筛选参数
+        ucm_change_date = self.request.query_params.get('ucm_change_date')
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        requirement_type = self.request.query_params.get('requirement_type')
+        search = self.request.query_params.get('search')
+        submitter = self.request.query_params.get('submitter')
+
+        queryset = UCMRequirementArchive.objects.select_related('submitter', 'processor')
+
+        if ucm_change_date:
+            queryset = queryset.filter(ucm_change_date=ucm_change_date)
+        if start_date:
+            queryset = queryset.filter(ucm_change_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(ucm_change_date__lte=end_date)
+        if requirement_type:
+            queryset = queryset.filter(requirement_type=requirement_type)
+        if submitter:
+            queryset = queryset.filter(submitter__username=submitter)
+        locations = parse_field_list(self.request.query_params.get('location'))
+        if locations:
+            queryset = queryset.filter(location__in=locations)
+        if search:
+            queryset = queryset.filter(
+                Q(device_name__icontains=search) | Q(ip__icontains=search)
+            )
+        try:
+            queryset = filter_by_ip_range(queryset, self.request.query_params)
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+
+        return queryset.order_by('-ucm_change_date', '-id')
+
+
+class TemplateConfigViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """模板配置管理API"""
     queryset = TemplateConfig.objects.all()
     serializer_class = TemplateConfigSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (TemplateConfig,)
     
     def update(self, request, *args, **kwargs):
         """更新模板配置，验证列定义格式"""
@@ -1642,6 +2247,49 @@ class TemplateConfigViewSet(viewsets.ModelViewSet):
         return response
 
 
+class ChangeDateOverrideViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """UCM变更日期调整API（停止变更日期、临时加开日期）"""
+    queryset = ChangeDateOverride.objects.all()
+    serializer_class = ChangeDateOverrideSerializer
+    permission_classes = [IsAuthenticated]
+    etag_models = (ChangeDateOverride,)
+
+
+class LocationRuleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """UCM地点识别规则API（IP网段、名称前缀）"""
+    queryset = LocationRule.objects.all()
+    serializer_class = LocationRuleSerializer
+    permission_classes = [IsAuthenticated]
+    etag_models = (LocationRule,)
+
+    # 每次调用最多检查的记录数
+    RECOMPUTE_DEFAULT_LIMIT = 5000
+    RECOMPUTE_MAX_LIMIT = 20000
+
+    @action(detail=False, methods=['post'])
+    def recompute(self, request):
+        """
+        按当前规则分段重新计算已有需求和归档需求的地点
+
+        请求在当前连接中同步执行，每次最多检查 limit 条记录（默认5000，最多20000），避免请求超时
+        和长时间占用写队列。参数 table（requirement / archive，默认 requirement）、after_id
+        （默认0）；返回的 next 不为空时以其中的 table、after_id 继续调用，直到 next 为空。
+        全量重新计算请在服务器上执行 python manage.py recompute_requirement_locations。
+        """
+        table = request.data.get('table', 'requirement')
+        if table not in RECOMPUTE_TABLES:
+            return Response({'error': f'不支持的表: {table}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            after_id = int(request.data.get('after_id', 0))
+            limit = int(request.data.get('limit', self.RECOMPUTE_DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            return Response({'error': 'after_id 和 limit 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+        if after_id < 0 or not 1 <= limit <= self.RECOMPUTE_MAX_LIMIT:
+            return Response({'error': f'after_id 不能为负数，limit 范围为 1-{self.RECOMPUTE_MAX_LIMIT}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(recompute_locations_chunk(table, after_id, limit))
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def user_login(request):
@@ -1722,17 +2370,12 @@ def get_current_user(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(UCMDateConfig)
 def get_ucm_date_config(request):
     """获取UCM日期配置"""
     try:
-        config = UCMDateConfig.objects.first()
-        if not config:
-            # 如果没有配置，创建默认配置
-            config = UCMDateConfig.objects.create(
-                wednesday_deadline_hours=7,
-                saturday_deadline_hours=31
-            )
-        
+        config = UCMDateConfig.get_solo()
+
         return Response({
             'wednesday_deadline_hours': config.wednesday_deadline_hours,
             'saturday_deadline_hours': config.saturday_deadline_hours
@@ -1741,18 +2384,68 @@ def get_ucm_date_config(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def write_queue_stats(request):
+    """获取写队列指标（队列深度、等待时间、重试次数等）"""
+    return Response(write_queue.stats())
+
+
+async def requirement_events(request):
+    """
+    需求变更推送（text/event-stream）
+
+    参数: dates（可选，逗号分隔），只推送这些日期的变更；不带日期的 requirements_updated / resync 事件总是推送
+    事件: requirements_changed {'date', 'requirement_type', 'created', 'processed', 'deleted'}
+    """
+    import asyncio
+    from django.conf import settings
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse, StreamingHttpResponse
+    from .events import broker
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': '未登录'}, status=status.HTTP_401_UNAUTHORIZED)
+    if not isinstance(request, ASGIRequest):
+        # WSGI 下长连接会一直占用工作线程，客户端收到非事件流响应后改为手动刷新
+        return JsonResponse({'error': '实时推送需要以 ASGI 方式运行服务'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    dates = parse_field_list(request.GET.get('dates'))
+    heartbeat = getattr(settings, 'UCM_EVENTS_HEARTBEAT_SECONDS', 15)
+
+    async def stream():
+        queue = await broker.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # 心跳，防止代理断开空闲连接
+                    yield ': ping\n\n'
+                    continue
+                if dates and event.get('date') and event['date'] not in dates:
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # 关闭 nginx 代理缓冲，事件立即送达
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
+@conditional_get(UCMDateConfig)
 def deadline_config(request):
     """获取或更新登记截止配置"""
     try:
-        config = UCMDateConfig.objects.first()
-        if not config:
-            config = UCMDateConfig.objects.create(
-                wednesday_deadline_hours=7,
-                saturday_deadline_hours=31
-            )
-        
+        config = UCMDateConfig.get_solo()
+
         if request.method == 'GET':
             return Response({
                 'wednesday_deadline_hours': config.wednesday_deadline_hours,
@@ -1779,7 +2472,8 @@ def deadline_config(request):
                 except (ValueError, TypeError):
                     return Response({'error': '周六截止小时数格式错误'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # 更新配置
+            # 更新配置（在副本上修改，保存后通过信号清除缓存，避免其他请求读到未保存的值）
+            config = copy.copy(config)
             if wednesday_hours is not None:
                 config.wednesday_deadline_hours = wednesday_hours
             if saturday_hours is not None:
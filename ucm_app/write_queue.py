@@ -0,0 +1,252 @@
+"""
+写入串行化队列
+
+SQLite 同一时刻只允许一个写事务，截止时间前大量并发提交时容易出现
+"database is locked" 错误和很长的尾延迟。这里在进程内用单一写线程串行执行
+所有写操作：短时间内到达的多个小写入合并到同一个事务提交，遇到锁冲突时
+按指数退避重试，并记录队列深度、等待时间等指标。
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.UCM_WRITE_QUEUE 覆盖
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'MAX_BATCH_SIZE': 20,       # 单个事务最多合并的写任务数
+    'BATCH_WINDOW_MS': 10,      # 收集同批写任务的等待窗口（毫秒）
+    'MAX_RETRIES': 5,           # 锁冲突最大重试次数
+    'RETRY_BACKOFF_MS': 50,     # 首次重试退避时间（毫秒），之后按2倍递增
+    'MAX_BACKOFF_MS': 2000,     # 单次退避时间上限（毫秒）
+}
+
+
+def get_config():
+    """获取写队列配置"""
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'UCM_WRITE_QUEUE', {}))
+    return config
+
+
+def is_lock_error(exc):
+    """判断是否为 SQLite 锁冲突错误"""
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def enable_sqlite_wal(sender, connection, **kwargs):
+    """新建 SQLite 连接时开启 WAL 模式，读操作不再被写事务阻塞"""
+    if connection.vendor == 'sqlite' and getattr(settings, 'UCM_SQLITE_WAL', True):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL;')
+
+
+class _WriteJob:
+    """单个写任务"""
+
+    def __init__(self, func):
+        self.func = func
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class WriteQueue:
+    """进程内写入串行化队列"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wait_times = deque(maxlen=1000)
+        self._stats = {
+            'jobs': 0,
+            'batches': 0,
+            'retries': 0,
+            'failures': 0,
+            'max_wait_ms': 0.0,
+            'total_wait_ms': 0.0,
+            'max_batch_size': 0,
+        }
+
+    def submit(self, func, timeout=None):
+        """
+        提交写任务并等待执行结果
+
+        func 在写线程的事务（保存点）内执行，返回值即为本方法返回值；
+        func 抛出的异常会原样抛给调用方，且只回滚该任务自己的写入。
+        """
+        config = get_config()
+
+        # 未启用、调用方已在事务中或当前就是写线程时直接执行，避免死锁
+        if (not config['ENABLED'] or connection.in_atomic_block
+                or threading.current_thread() is self._thread):
+            return self._execute_inline(func, config)
+
+        job = _WriteJob(func)
+        self._ensure_worker()
+        self._queue.put(job)
+        return job.future.result(timeout=timeout)
+
+    def stats(self):
+        """返回队列指标"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            wait_times = sorted(self._wait_times)
+
+        jobs = stats.pop('jobs')
+        total_wait_ms = stats.pop('total_wait_ms')
+        stats.update({
+            'enabled': get_config()['ENABLED'],
+            'queue_depth': self._queue.qsize(),
+            'total_jobs': jobs,
+            'avg_wait_ms': round(total_wait_ms / jobs, 2) if jobs else 0.0,
+            'p95_wait_ms': round(wait_times[int(len(wait_times) * 0.95) - 1], 2) if wait_times else 0.0,
+            'avg_batch_size': round(jobs / stats['batches'], 2) if stats['batches'] else 0.0,
+            'max_wait_ms': round(stats['max_wait_ms'], 2),
+        })
+        return stats
+
+    def _ensure_worker(self):
+        """按需启动写线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ucm-write-queue', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """写线程主循环"""
+        while True:
+            jobs = [self._queue.get()]
+            config = get_config()
+
+            # 在等待窗口内尽量收集更多写任务合并为一个事务
+            deadline = time.monotonic() + config['BATCH_WINDOW_MS'] / 1000
+            while len(jobs) < config['MAX_BATCH_SIZE']:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    jobs.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._record_batch(jobs)
+            close_old_connections()
+            try:
+                self._run_batch(jobs, config)
+            except Exception as e:  # 兜底，保证写线程不退出
+                logger.exception(f"写队列批次执行异常: {e}")
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            finally:
+                close_old_connections()
+
+    def _run_batch(self, jobs, config):
+        """在一个事务中执行一批写任务，锁冲突时整批重试"""
+        attempt = 0
+        while True:
+            results = []
+            try:
+                with transaction.atomic():
+                    for job in jobs:
+                        try:
+                            # 每个任务使用独立保存点，失败只回滚自身
+                            with transaction.atomic():
+                                results.append((True, job.func()))
+                        except OperationalError as e:
+                            if is_lock_error(e):
+                                raise
+                            results.append((False, e))
+                        except Exception as e:
+                            results.append((False, e))
+            except OperationalError as e:
+                if is_lock_error(e) and attempt < config['MAX_RETRIES']:
+                    attempt += 1
+                    self._record_retry()
+                    time.sleep(self._backoff(attempt, config))
+                    continue
+                self._record_failure(len(jobs))
+                for job in jobs:
+                    job.future.set_exception(e)
+                return
+
+            for job, (ok, value) in zip(jobs, results):
+                if ok:
+                    job.future.set_result(value)
+                else:
+                    self._record_failure(1)
+                    job.future.set_exception(value)
+            return
+
+    def _execute_inline(self, func, config):
+        """在调用线程中直接执行（同样带锁冲突重试）"""
+        if connection.in_atomic_block:
+            # 外层事务中无法整体重试，直接使用保存点执行
+            with transaction.atomic():
+                return func()
+
+        attempt = 0
+        while True:
+            try:
+                with transaction.atomic():
+                    return func()
+            except OperationalError as e:
+                if is_lock_error(e) and attempt < config['MAX_RETRIES']:
+                    attempt += 1
+                    self._record_retry()
+                    time.sleep(self._backoff(attempt, config))
+                    continue
+                raise
+
+    @staticmethod
+    def _backoff(attempt, config):
+        """计算指数退避时间（秒）"""
+        delay_ms = min(config['RETRY_BACKOFF_MS'] * (2 ** (attempt - 1)), config['MAX_BACKOFF_MS'])
+        return delay_ms / 1000
+
+    def _record_batch(self, jobs):
+        now = time.monotonic()
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['jobs'] += len(jobs)
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(jobs))
+            for job in jobs:
+                wait_ms = (now - job.enqueued_at) * 1000
+                self._wait_times.append(wait_ms)
+                self._stats['total_wait_ms'] += wait_ms
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+
+    def _record_retry(self):
+        with self._stats_lock:
+            self._stats['retries'] += 1
+
+    def _record_failure(self, count):
+        with self._stats_lock:
+            self._stats['failures'] += count
+
+
+# 全局写队列实例
+write_queue = WriteQueue()
+
+
+def submit_write(func, timeout=None):
+    """提交写任务到全局写队列并等待结果"""
+    return write_queue.submit(func, timeout=timeout)
+
+
+def connect_signals():
+    """注册数据库连接信号"""
+    connection_created.connect(enable_sqlite_wal, dispatch_uid='ucm_enable_sqlite_wal')
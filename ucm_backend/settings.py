@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ucm_app.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,7 +65,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'ucm_app.renderers.UCMJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'ucm_app.renderers.UCMJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -131,9 +137,60 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': 'd:/database/mydb_ucm.db',
+        'OPTIONS': {
+            # 等待写锁的超时时间（秒），配合写队列重试避免 database is locked
+            'timeout': 20,
+        },
     }
 }
 
+# SQLite 开启 WAL 模式，读操作不被写事务阻塞
+UCM_SQLITE_WAL = True
+
+# 游标分页时 ?with_count=true 返回的总数缓存秒数
+UCM_LIST_COUNT_CACHE_SECONDS = 30
+
+# 需求领取租约默认时长（秒），过期后自动释放
+UCM_CLAIM_LEASE_SECONDS = 900
+
+# 已处理需求的保留天数，超过后由 archive_requirements 命令迁移到归档表
+UCM_ARCHIVE_AFTER_DAYS = 180
+
+# 响应压缩（见 ucm_app/middleware.py）：超过该字节数的响应才压缩，brotli 压缩级别
+UCM_COMPRESS_MIN_SIZE = 1024
+UCM_BROTLI_QUALITY = 4
+
+# 变更日历（见 ucm_app/change_calendar.py）缓存秒数，缓存键包含日期配置的表版本号，修改后所有进程立即生效
+UCM_CHANGE_CALENDAR_CACHE_SECONDS = 300
+# 进程内变更日历重新校验表版本号的间隔秒数，间隔内校验截止时间等不查询数据库，其他进程的修改最多延迟该时长
+UCM_CHANGE_CALENDAR_RECHECK_SECONDS = 5
+
+# 地点识别规则（见 ucm_app/locations.py）编译结果的进程内缓存秒数（仅用于不支持表版本号的数据库，支持时按表版本号失效）
+UCM_LOCATION_RULES_CACHE_SECONDS = 60
+
+# UCMDateConfig.get_solo() 进程内缓存秒数（仅用于不支持表版本号的数据库，支持时按表版本号失效）
+UCM_DATE_CONFIG_CACHE_SECONDS = 60
+
+# 首页汇总接口（dashboard_summary）结果缓存秒数
+UCM_DASHBOARD_CACHE_SECONDS = 15
+
+# 趋势统计（见 ucm_app/analytics.py）：周期结束超过该天数后视为不再变化，结果永久缓存（删除需求等操作时失效）
+UCM_ANALYTICS_SETTLE_DAYS = 7
+
+# 需求变更推送（见 ucm_app/events.py）：每进程检查变更的间隔秒数、SSE 心跳秒数
+UCM_EVENTS_POLL_SECONDS = 0.5
+UCM_EVENTS_HEARTBEAT_SECONDS = 15
+
+# 写入串行化队列配置（见 ucm_app/write_queue.py）
+UCM_WRITE_QUEUE = {
+    'ENABLED': True,
+    'MAX_BATCH_SIZE': 20,
+    'BATCH_WINDOW_MS': 10,
+    'MAX_RETRIES': 5,
+    'RETRY_BACKOFF_MS': 50,
+    'MAX_BACKOFF_MS': 2000,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
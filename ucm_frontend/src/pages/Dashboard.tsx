@@ -1,57 +1,222 @@
-import { Card, Row, Col, Statistic } from 'antd';
-import { FormOutlined, CheckCircleOutlined, ClockCircleOutlined, DatabaseOutlined } from '@ant-design/icons';
+import { useEffect, useState } from 'react';
+import { Card, Row, Col, Statistic, Table, Tag, Button, Space, Spin } from 'antd';
+import {
+  FormOutlined, CheckCircleOutlined, ClockCircleOutlined, DatabaseOutlined, LeftOutlined, RightOutlined
+} from '@ant-design/icons';
+import api from '../services/api';
+import { subscribeRequirementEvents } from '../services/events';
+
+interface TypeStatistics {
+  count: number;
+  pending: number;
+  processed: number;
+}
+
+interface WeekDate {
+  date: string;
+  day_type: string;
+  label: string;
+  blackout: boolean;
+  statistics: Record<string, TypeStatistics>;
+}
+
+interface DashboardSummary {
+  week_offset: number;
+  dates: WeekDate[];
+  boundaries: { min_week_offset: number; max_week_offset: number };
+  list_dates: string[];
+  totals: { count: number; pending: number; processed: number; month_count: number };
+  device_count: number;
+  recent_requirements: any[];
+  generated_at: string;
+}
+
+const requirementTypeText: Record<string, string> = {
+  import: '导入',
+  modify: '修改',
+  delete: '删除'
+};
 
 export default function Dashboard() {
+  const [weekOffset, setWeekOffset] = useState<number>(0);
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
+  const [loading, setLoading] = useState<boolean>(false);
+
+  // 首页数据一次请求获取
+  const loadSummary = async (offset: number) => {
+    setLoading(true);
+    try {
+      const response = await api.get('/requirements/dashboard_summary/', {
+        params: { week_offset: offset }
+      });
+      setSummary(response.data);
+    } catch (error) {
+      console.error('加载首页数据失败:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    loadSummary(weekOffset);
+  }, [weekOffset]);
+
+  // 需求有变更时重新加载（服务端短时缓存，且支持 304）
+  useEffect(() => {
+    return subscribeRequirementEvents(() => loadSummary(weekOffset), [], 1000);
+  }, [weekOffset]);
+
+  const recentColumns = [
+    {
+      title: '变更日期',
+      dataIndex: 'ucm_change_date',
+      width: 110,
+    },
+    {
+      title: '类型',
+      dataIndex: 'requirement_type',
+      width: 70,
+      render: (type: string) => requirementTypeText[type] || type,
+    },
+    {
+      title: '设备名称',
+      dataIndex: 'device_name',
+    },
+    {
+      title: 'IP',
+      dataIndex: 'ip',
+      width: 130,
+    },
+    {
+      title: '登记人',
+      dataIndex: 'submitter_name',
+      width: 100,
+    },
+    {
+      title: '状态',
+      dataIndex: 'status',
+      width: 80,
+      render: (status: string) => (
+        <Tag color={status === 'processed' ? 'green' : 'orange'}>
+          {status === 'processed' ? '已处理' : '待处理'}
+        </Tag>
+      ),
+    },
+  ];
+
+  const boundaries = summary?.boundaries;
+
   return (
     <div>
       <h1 style={{ marginBottom: 24 }}>系统首页</h1>
-      
-      <Row gutter={16}>
-        <Col span={6}>
-          <Card>
-            <Statistic
-              title="待处理需求"
-              value={12}
-              prefix={<ClockCircleOutlined style={{ color: '#faad14' }} />}
-              styles={{ content: { color: '#faad14' } }}
-            />
-          </Card>
-        </Col>
-        
-        <Col span={6}>
-          <Card>
-            <Statistic
-              title="已处理需求"
-              value={89}
-              prefix={<CheckCircleOutlined style={{ color: '#52c41a' }} />}
-              styles={{ content: { color: '#52c41a' } }}
-            />
-          </Card>
-        </Col>
-        
-        <Col span={6}>
-          <Card>
-            <Statistic
-              title="设备总数"
-              value={156}
-              prefix={<DatabaseOutlined style={{ color: '#1890ff' }} />}
-              styles={{ content: { color: '#1890ff' } }}
-            />
-          </Card>
-        </Col>
-        
-        <Col span={6}>
-          <Card>
-            <Statistic
-              title="本月登记"
-              value={23}
-              prefix={<FormOutlined style={{ color: '#722ed1' }} />}
-              styles={{ content: { color: '#722ed1' } }}
-            />
-          </Card>
-        </Col>
-      </Row>
-      
+
+      <Spin spinning={loading}>
+        <Row gutter={16}>
+          <Col span={6}>
+            <Card>
+              <Statistic
+                title="待处理需求"
+                value={summary?.totals.pending ?? 0}
+                prefix={<ClockCircleOutlined style={{ color: '#faad14' }} />}
+                styles={{ content: { color: '#faad14' } }}
+              />
+            </Card>
+          </Col>
+
+          <Col span={6}>
+            <Card>
+              <Statistic
+                title="已处理需求"
+                value={summary?.totals.processed ?? 0}
+                prefix={<CheckCircleOutlined style={{ color: '#52c41a' }} />}
+                styles={{ content: { color: '#52c41a' } }}
+              />
+            </Card>
+          </Col>
+
+          <Col span={6}>
+            <Card>
+              <Statistic
+                title="设备总数"
+                value={summary?.device_count ?? 0}
+                prefix={<DatabaseOutlined style={{ color: '#1890ff' }} />}
+                styles={{ content: { color: '#1890ff' } }}
+              />
+            </Card>
+          </Col>
+
+          <Col span={6}>
+            <Card>
+              <Statistic
+                title="本月登记"
+                value={summary?.totals.month_count ?? 0}
+                prefix={<FormOutlined style={{ color: '#722ed1' }} />}
+                styles={{ content: { color: '#722ed1' } }}
+              />
+            </Card>
+          </Col>
+        </Row>
+
+        <Card
+          title="变更日统计"
+          style={{ marginTop: 24 }}
+          extra={
+            <Space>
+              <Button
+                icon={<LeftOutlined />}
+                disabled={!boundaries || weekOffset <= boundaries.min_week_offset}
+                onClick={() => setWeekOffset(weekOffset - 1)}
+              >
+                上一周
+              </Button>
+              <Button
+                disabled={!boundaries || weekOffset >= boundaries.max_week_offset}
+                onClick={() => setWeekOffset(weekOffset + 1)}
+              >
+                下一周 <RightOutlined />
+              </Button>
+            </Space>
+          }
+        >
+          <Row gutter={16}>
+            {summary?.dates.map(item => (
+              <Col span={12} key={item.date}>
+                <Card
+                  type="inner"
+                  title={item.label}
+                  extra={item.blackout ? <Tag color="red">停止变更</Tag> : null}
+                >
+                  <Row gutter={16}>
+                    {Object.entries(requirementTypeText).map(([type, text]) => {
+                      const stats = item.statistics[type];
+                      return (
+                        <Col span={8} key={type}>
+                          <Statistic
+                            title={text}
+                            value={stats?.count ?? 0}
+                            suffix={stats?.count ? `（待处理 ${stats.pending}）` : undefined}
+                          />
+                        </Col>
+                      );
+                    })}
+                  </Row>
+                </Card>
+              </Col>
+            ))}
+          </Row>
+        </Card>
+
+        <Card title="最近登记" style={{ marginTop: 24 }}>
+          <Table
+            rowKey="id"
+            size="small"
+            pagination={false}
+            columns={recentColumns}
+            dataSource={summary?.recent_requirements || []}
+          />
+        </Card>
+      </Spin>
+
       <Row gutter={16} style={{ marginTop: 24 }}>
         <Col span={12}>
           <Card title="快速开始">
@@ -63,7 +228,7 @@ export default function Dashboard() {
             </ul>
           </Card>
         </Col>
-        
+
         <Col span={12}>
           <Card title="系统说明">
             <p>本系统用于管理UCM设备的变更需求，包括：</p>
@@ -7,6 +7,7 @@ import { useSearchParams } from 'react-router-dom';
 import ExcelJS from 'exceljs';
 import JSZip from 'jszip';
 import api from '../../services/api';
+import { subscribeRequirementEvents } from '../../services/events';
 
 interface Requirement {
   id: number;
@@ -172,6 +173,17 @@ export default function RequirementList() {
     }
   }, [selectedDate, selectedType]);
 
+  // 订阅选中日期的需求变更，其他用户登记、处理、删除后自动刷新统计和列表
+  useEffect(() => {
+    if (!selectedDate) return;
+    return subscribeRequirementEvents(() => {
+      loadDateStatistics(selectedDate);
+      if (selectedType) {
+        loadData();
+      }
+    }, [selectedDate]);
+  }, [selectedDate, selectedType]);
+
   // 加载模板列配置和校验数据
   useEffect(() => {
     loadTemplateColumns();
@@ -497,10 +509,14 @@ export default function RequirementList() {
     }
 
     try {
-      await api.post('/requirements/batch_complete/', {
+      const response = await api.post('/requirements/batch_complete/', {
         requirement_ids: selectedRowKeys
       });
-      message.success('批量完成成功');
+      if (response.data.leased_count) {
+        message.warning(`已完成 ${response.data.count} 条，${response.data.leased_count} 条已被其他处理人领取，未处理`);
+      } else {
+        message.success('批量完成成功');
+      }
       setSelectedRowKeys([]);
       loadData();
       // 重新加载统计
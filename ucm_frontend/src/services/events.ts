@@ -0,0 +1,53 @@
+// ========== 需求变更推送（SSE） ==========
+
+export interface RequirementChangedEvent {
+  type: 'requirements_changed';
+  date: string;
+  requirement_type: 'import' | 'modify' | 'delete';
+  created: number;
+  processed: number;
+  deleted: number;
+}
+
+export type RequirementEvent =
+  | RequirementChangedEvent
+  | { type: 'requirements_updated' }
+  | { type: 'resync' };
+
+const EVENT_TYPES = ['requirements_changed', 'requirements_updated', 'resync'];
+
+/**
+ * 订阅需求变更事件，返回取消订阅函数
+ *
+ * dates 为空时接收所有日期的变更；短时间内的多个事件合并为一次回调（debounceMs）。
+ * 服务未以 ASGI 方式运行时接口返回 503，EventSource 不再重连，页面退回手动刷新。
+ */
+export const subscribeRequirementEvents = (
+  onEvents: (events: RequirementEvent[]) => void,
+  dates: string[] = [],
+  debounceMs = 300
+): (() => void) => {
+  const params = dates.length ? `?dates=${encodeURIComponent(dates.join(','))}` : '';
+  const source = new EventSource(`/api/events/requirements/${params}`, { withCredentials: true });
+
+  let pending: RequirementEvent[] = [];
+  let timer: ReturnType<typeof setTimeout> | null = null;
+
+  const handle = (message: MessageEvent) => {
+    pending.push(JSON.parse(message.data));
+    if (timer) return;
+    timer = setTimeout(() => {
+      const events = pending;
+      pending = [];
+      timer = null;
+      onEvents(events);
+    }, debounceMs);
+  };
+
+  EVENT_TYPES.forEach(type => source.addEventListener(type, handle as EventListener));
+
+  return () => {
+    if (timer) clearTimeout(timer);
+    source.close();
+  };
+};